@@ -3,6 +3,13 @@ const mongoose = require('mongoose');
 const cors = require('cors');
 const authRoutes = require('./routes/auth');
 const bankStatementsRouter = require('./routes/BankStatements');
+const jobsRouter = require('./routes/jobs');
+const analyticsRouter = require('./routes/analytics');
+const transactionsRouter = require('./routes/transactions');
+const { getJobQueue } = require('./services/jobQueue');
+const { registerStatementJobs } = require('./services/bankStatementService');
+const { registerRecategorizationJobs, enqueueRecategorizationIfRulesChanged } = require('./services/recategorizationService');
+const metrics = require('./utils/metrics');
 const cookieParser = require('cookie-parser');
 const session = require('express-session');
 require('dotenv').config();42
@@ -32,6 +39,18 @@ app.use(express.json());
 // Routes
 app.use('/api/auth', authRoutes);
 app.use('/api/bankStatements', bankStatementsRouter);
+app.use('/api/jobs', jobsRouter);
+app.use('/api/analytics', analyticsRouter);
+app.use('/api/transactions', transactionsRouter);
+
+// Prometheus scrape endpoint; set METRICS_TOKEN to require "Authorization: Bearer <token>"
+app.get('/metrics', (req, res) => {
+    if (process.env.METRICS_TOKEN && req.headers.authorization !== `Bearer ${process.env.METRICS_TOKEN}`) {
+        return res.status(401).send('Unauthorized');
+    }
+    res.set('Content-Type', metrics.CONTENT_TYPE);
+    res.send(metrics.registry.render());
+});
 
 app.use(session({
     secret: process.env.JWT_SECRET,
@@ -59,6 +78,17 @@ mongoose.connect(process.env.MONGODB_URI || 'mongodb://192.168.105.23:27017/fina
                 console.log('Available collections:', collections.map(c => c.name));
             }
         });
+
+        // Start processing queued statements, including any left over from a restart
+        const jobQueue = getJobQueue();
+        registerStatementJobs(jobQueue);
+        registerRecategorizationJobs(jobQueue);
+        jobQueue.start();
+
+        // Bring stored categories up to date if categories.json changed since the last run
+        enqueueRecategorizationIfRulesChanged(jobQueue).catch((err) => {
+            console.error('Failed to check category rules version:', err);
+        });
     })
     .catch(err => {
         console.error('MongoDB Connection Error:', err);
@@ -0,0 +1,64 @@
+// migrations/backfillTransactions.js
+//
+// Writes the Transaction collection from processed statements. Run it once
+// to backfill existing statements, or to repair transactions after a
+// failed incremental update. Safe to re-run: each statement's rows are
+// replaced.
+//
+// Usage (from the server directory):
+//   node migrations/backfillTransactions.js [--user <userId>]
+const mongoose = require('mongoose');
+require('dotenv').config();
+const BankStatement = require('../models/BankStatement');
+const Transaction = require('../models/Transaction');
+const { addTransactions } = require('../services/transactionService');
+
+// Statements written per batch
+const BATCH_SIZE = 50;
+
+function parseUserId(argv) {
+    const index = argv.indexOf('--user');
+    return index === -1 ? undefined : argv[index + 1];
+}
+
+async function backfill({ userId }) {
+    const started = Date.now();
+    const query = { isProcessed: true };
+    if (userId) {
+        query.userId = userId;
+    }
+
+    await Transaction.init();
+
+    const cursor = BankStatement.find(query)
+        .select('userId uploadDate bankName statementPeriod isProcessed mlResults.expenses')
+        .lean()
+        .cursor({ batchSize: BATCH_SIZE });
+
+    let statements = 0;
+    let transactions = 0;
+    let batch = [];
+    for await (const statement of cursor) {
+        batch.push(statement);
+        if (batch.length === BATCH_SIZE) {
+            transactions += await addTransactions(batch);
+            statements += batch.length;
+            batch = [];
+        }
+    }
+    if (batch.length > 0) {
+        transactions += await addTransactions(batch);
+        statements += batch.length;
+    }
+
+    console.log(`Wrote ${transactions} transactions from ${statements} statements${userId ? ` for user ${userId}` : ''} in ${Date.now() - started}ms`);
+}
+
+mongoose.connect(process.env.MONGODB_URI || 'mongodb://192.168.105.23:27017/financetracker')
+    .then(() => backfill({ userId: parseUserId(process.argv) }))
+    .then(() => mongoose.disconnect())
+    .catch(async (err) => {
+        console.error('Transaction backfill failed:', err);
+        await mongoose.disconnect();
+        process.exit(1);
+    });
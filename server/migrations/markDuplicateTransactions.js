@@ -0,0 +1,65 @@
+// migrations/markDuplicateTransactions.js
+//
+// Re-checks every processed statement for transactions already held by an
+// earlier statement, then rebuilds the Transaction, MonthlyRollup and
+// RecurringCharge collections to match. Run it once to flag duplicates in
+// existing statements, or to repair flags after a failed incremental
+// update.
+//
+// Statements are replayed in upload order, so the earliest upload keeps
+// each transaction and later copies are flagged.
+//
+// Usage (from the server directory):
+//   node migrations/markDuplicateTransactions.js [--user <userId>]
+const mongoose = require('mongoose');
+require('dotenv').config();
+const BankStatement = require('../models/BankStatement');
+const Transaction = require('../models/Transaction');
+const { markDuplicates } = require('../services/duplicateService');
+const { addTransactions } = require('../services/transactionService');
+const { rebuildRollups } = require('../services/rollupService');
+const { rebuildRecurringCharges } = require('../services/recurringService');
+
+function parseUserId(argv) {
+    const index = argv.indexOf('--user');
+    return index === -1 ? undefined : argv[index + 1];
+}
+
+async function replay({ userId }) {
+    const started = Date.now();
+    const scope = {};
+    if (userId) {
+        scope.userId = new mongoose.Types.ObjectId(userId);
+    }
+
+    await Transaction.init();
+    // Each statement is only checked against the statements replayed before it
+    await Transaction.deleteMany(scope);
+
+    const cursor = BankStatement.find({ ...scope, isProcessed: true })
+        .sort({ uploadDate: 1, _id: 1 })
+        .cursor();
+
+    let statements = 0;
+    let duplicates = 0;
+    for await (const statement of cursor) {
+        duplicates += await markDuplicates(statement);
+        await statement.save();
+        await addTransactions(statement);
+        statements++;
+    }
+
+    const rollups = await rebuildRollups({ userId });
+    const charges = await rebuildRecurringCharges({ userId });
+    console.log(`Flagged ${duplicates} duplicate transactions in ${statements} statements${userId ? ` for user ${userId}` : ''}; ` +
+        `rebuilt ${rollups} monthly rollups and ${charges} recurring charges in ${Date.now() - started}ms`);
+}
+
+mongoose.connect(process.env.MONGODB_URI || 'mongodb://192.168.105.23:27017/financetracker')
+    .then(() => replay({ userId: parseUserId(process.argv) }))
+    .then(() => mongoose.disconnect())
+    .catch(async (err) => {
+        console.error('Duplicate transaction replay failed:', err);
+        await mongoose.disconnect();
+        process.exit(1);
+    });
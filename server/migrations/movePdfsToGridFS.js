@@ -0,0 +1,57 @@
+// migrations/movePdfsToGridFS.js
+//
+// Moves PDFs stored inline in BankStatement.pdfData into GridFS and
+// replaces them with a pdfHash reference.
+//
+// Usage (from the server directory):
+//   node migrations/movePdfsToGridFS.js [--dry-run]
+const mongoose = require('mongoose');
+require('dotenv').config();
+const BankStatement = require('../models/BankStatement');
+const { storePdf } = require('../services/pdfStorageService');
+
+async function migrate({ dryRun }) {
+    // Read the raw collection so multi-megabyte documents are handled one at a time
+    const cursor = BankStatement.collection.find(
+        { pdfData: { $exists: true } },
+        { projection: { pdfData: 1, pdfHash: 1, fileName: 1 } }
+    );
+
+    let migrated = 0;
+    let bytesMoved = 0;
+
+    for await (const doc of cursor) {
+        const pdfBuffer = Buffer.from(doc.pdfData.buffer);
+
+        if (dryRun) {
+            console.log(`[dry run] Would move ${doc._id} (${pdfBuffer.length} bytes)`);
+            migrated++;
+            bytesMoved += pdfBuffer.length;
+            continue;
+        }
+
+        const { pdfHash, pdfSize } = doc.pdfHash
+            ? { pdfHash: doc.pdfHash, pdfSize: pdfBuffer.length }
+            : await storePdf(pdfBuffer, doc.fileName);
+
+        await BankStatement.collection.updateOne(
+            { _id: doc._id },
+            { $set: { pdfHash, pdfSize }, $unset: { pdfData: '' } }
+        );
+
+        migrated++;
+        bytesMoved += pdfBuffer.length;
+        console.log(`Moved statement ${doc._id} -> ${pdfHash.substring(0, 12)} (${pdfSize} bytes)`);
+    }
+
+    console.log(`${dryRun ? 'Would move' : 'Moved'} ${migrated} PDFs (${bytesMoved} bytes) out of BankStatement documents`);
+}
+
+mongoose.connect(process.env.MONGODB_URI || 'mongodb://192.168.105.23:27017/financetracker')
+    .then(() => migrate({ dryRun: process.argv.includes('--dry-run') }))
+    .then(() => mongoose.disconnect())
+    .catch(async (err) => {
+        console.error('PDF migration failed:', err);
+        await mongoose.disconnect();
+        process.exit(1);
+    });
@@ -0,0 +1,31 @@
+// migrations/rebuildMonthlyRollups.js
+//
+// Rebuilds the MonthlyRollup collection from processed statements. Run it
+// once to backfill existing statements, or to repair rollups after a failed
+// incremental update.
+//
+// Usage (from the server directory):
+//   node migrations/rebuildMonthlyRollups.js [--user <userId>]
+const mongoose = require('mongoose');
+require('dotenv').config();
+const { rebuildRollups } = require('../services/rollupService');
+
+function parseUserId(argv) {
+    const index = argv.indexOf('--user');
+    return index === -1 ? undefined : argv[index + 1];
+}
+
+async function rebuild({ userId }) {
+    const started = Date.now();
+    const written = await rebuildRollups({ userId });
+    console.log(`Rebuilt ${written} monthly rollups${userId ? ` for user ${userId}` : ''} in ${Date.now() - started}ms`);
+}
+
+mongoose.connect(process.env.MONGODB_URI || 'mongodb://192.168.105.23:27017/financetracker')
+    .then(() => rebuild({ userId: parseUserId(process.argv) }))
+    .then(() => mongoose.disconnect())
+    .catch(async (err) => {
+        console.error('Rollup rebuild failed:', err);
+        await mongoose.disconnect();
+        process.exit(1);
+    });
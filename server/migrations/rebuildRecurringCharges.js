@@ -0,0 +1,34 @@
+// migrations/rebuildRecurringCharges.js
+//
+// Re-detects the RecurringCharge collection from the Transaction collection
+// (run migrations/backfillTransactions.js first on an existing database).
+// Run it once to backfill, or to repair recurring charges after a failed
+// incremental update.
+//
+// Usage (from the server directory):
+//   node migrations/rebuildRecurringCharges.js [--user <userId>]
+const mongoose = require('mongoose');
+require('dotenv').config();
+const RecurringCharge = require('../models/RecurringCharge');
+const { rebuildRecurringCharges } = require('../services/recurringService');
+
+function parseUserId(argv) {
+    const index = argv.indexOf('--user');
+    return index === -1 ? undefined : argv[index + 1];
+}
+
+async function rebuild({ userId }) {
+    const started = Date.now();
+    await RecurringCharge.init();
+    const written = await rebuildRecurringCharges({ userId });
+    console.log(`Detected ${written} recurring charges${userId ? ` for user ${userId}` : ''} in ${Date.now() - started}ms`);
+}
+
+mongoose.connect(process.env.MONGODB_URI || 'mongodb://192.168.105.23:27017/financetracker')
+    .then(() => rebuild({ userId: parseUserId(process.argv) }))
+    .then(() => mongoose.disconnect())
+    .catch(async (err) => {
+        console.error('Recurring charge rebuild failed:', err);
+        await mongoose.disconnect();
+        process.exit(1);
+    });
@@ -0,0 +1,34 @@
+// migrations/recategorizeTransactions.js
+//
+// Re-applies the parser's current categories.json to stored transactions
+// without re-reading any PDF. The server queues the same work on startup
+// whenever the rules version changes; run this to apply a rules change
+// straight away, or with --full to recategorize every merchant regardless
+// of which keywords changed.
+//
+// Usage (from the server directory):
+//   node migrations/recategorizeTransactions.js [--full]
+const mongoose = require('mongoose');
+require('dotenv').config();
+const CategoryRules = require('../models/CategoryRules');
+const { recategorizeTransactions } = require('../services/recategorizationService');
+const { getWorkerPool } = require('../utils/pythonWorkerPool');
+
+async function recategorize({ full }) {
+    await CategoryRules.init();
+    const summary = await recategorizeTransactions({ full });
+    console.log(JSON.stringify(summary, null, 2));
+}
+
+mongoose.connect(process.env.MONGODB_URI || 'mongodb://192.168.105.23:27017/financetracker')
+    .then(() => recategorize({ full: process.argv.includes('--full') }))
+    .then(() => {
+        getWorkerPool().close();
+        return mongoose.disconnect();
+    })
+    .catch(async (err) => {
+        console.error('Recategorization failed:', err);
+        getWorkerPool().close();
+        await mongoose.disconnect();
+        process.exit(1);
+    });
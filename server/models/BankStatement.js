@@ -16,6 +16,10 @@ const transactionSchema = new mongoose.Schema({
         type: Number,
         required: true
     },
+    merchant: {
+        type: String,  // Normalized merchant key from the parser
+        trim: true
+    },
     category: {
         type: String,
         required: true,
@@ -25,6 +29,11 @@ const transactionSchema = new mongoose.Schema({
         type: String,
         enum: ['debit', 'credit'],
         default: 'debit'
+    },
+    // Statement already holding this transaction; duplicates are left out of the totals
+    duplicateOf: {
+        type: mongoose.Schema.Types.ObjectId,
+        ref: 'BankStatement'
     }
 });
 
@@ -44,9 +53,28 @@ const bankStatementSchema = new mongoose.Schema({
         type: String,
         required: true
     },
+    // Set by the parser's bank identification
+    bankName: {
+        type: String,
+        default: null
+    },
+    // Period printed on the statement, when the parser finds one
+    statementPeriod: {
+        start: Date,
+        end: Date
+    },
+    // PDFs live in GridFS, content-addressed by SHA-256 (see services/pdfStorageService.js)
+    pdfHash: {
+        type: String,
+        index: true
+    },
+    pdfSize: {
+        type: Number
+    },
+    // Legacy inline copy of the PDF, only present until migrations/movePdfsToGridFS.js has run
     pdfData: {
         type: Buffer,
-        required: true
+        select: false
     },
     uploadDate: {
         type: Date,
@@ -60,11 +88,22 @@ const bankStatementSchema = new mongoose.Schema({
         type: String,
         default: null
     },
+    // Job allowed to process the statement (see claimStatement in services/bankStatementService.js)
+    processingJob: {
+        type: mongoose.Schema.Types.ObjectId,
+        default: null
+    },
+    // Set once the statement is counted in the monthly rollups (see services/rollupService.js)
+    rolledUpAt: {
+        type: Date,
+        default: null
+    },
     mlResults: {
         expenses: [transactionSchema],
         totalExpenses: Number,
         totalCredits: Number,
         totalTransactions: Number,
+        duplicateTransactions: Number,  // Suppressed as duplicates of other statements
         processedDate: Date,
         categoryBreakdown: mongoose.Schema.Types.Mixed  // Store as a simple object
     }
@@ -73,6 +112,13 @@ const bankStatementSchema = new mongoose.Schema({
 // Simple index for quick user-based queries
 bankStatementSchema.index({ userId: 1, uploadDate: -1 });
 
+// Support the spending aggregations (see services/analyticsService.js)
+bankStatementSchema.index({ userId: 1, bankName: 1 });
+bankStatementSchema.index({ userId: 1, 'mlResults.expenses.category': 1 });
+
+// Find the statements holding a merchant when category rules change (see services/recategorizationService.js)
+bankStatementSchema.index({ 'mlResults.expenses.merchant': 1 });
+
 const BankStatement = mongoose.model('BankStatement', bankStatementSchema);
 
 module.exports = BankStatement;
\ No newline at end of file
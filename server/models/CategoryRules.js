@@ -0,0 +1,34 @@
+// models/CategoryRules.js
+const mongoose = require('mongoose');
+
+// A version of the parser's category keyword table (categories.json) that
+// stored transactions have been recategorized with; the latest one is the
+// baseline for the next rules change (see services/recategorizationService.js)
+const categoryRulesSchema = new mongoose.Schema({
+    version: {
+        type: String,  // rulesVersion reported by the parser
+        required: true,
+        unique: true
+    },
+    categories: {
+        type: mongoose.Schema.Types.Mixed,  // { category: [keywords] } in table order
+        required: true
+    },
+    appliedAt: {
+        type: Date,
+        default: Date.now
+    },
+    // What applying this version changed
+    changedKeywords: Number,  // null when there was no previous version to compare with
+    merchantsChecked: Number,
+    merchantsAffected: Number,
+    statementsUpdated: Number,
+    transactionsUpdated: Number,
+    statementsRekeyed: Number  // Statements whose merchant keys were derived again
+});
+
+categoryRulesSchema.index({ appliedAt: -1 });
+
+const CategoryRules = mongoose.model('CategoryRules', categoryRulesSchema);
+
+module.exports = CategoryRules;
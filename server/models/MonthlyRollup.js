@@ -0,0 +1,51 @@
+// models/MonthlyRollup.js
+const mongoose = require('mongoose');
+
+// Per-user transaction totals for one month, bank, category and type,
+// maintained incrementally as statements are processed and deleted
+// (see services/rollupService.js)
+const monthlyRollupSchema = new mongoose.Schema({
+    userId: {
+        type: mongoose.Schema.Types.ObjectId,
+        required: true,
+        ref: 'User'
+    },
+    month: {
+        type: String,  // YYYY-MM of the transaction date (UTC)
+        required: true
+    },
+    bankName: {
+        type: String,
+        required: true
+    },
+    category: {
+        type: String,
+        required: true
+    },
+    type: {
+        type: String,
+        enum: ['debit', 'credit'],
+        required: true
+    },
+    sum: {
+        type: Number,
+        default: 0
+    },
+    count: {
+        type: Number,
+        default: 0
+    },
+    min: Number,
+    max: Number,
+    updatedAt: {
+        type: Date,
+        default: Date.now
+    }
+});
+
+// One document per key; dashboard reads scan a user's months in order
+monthlyRollupSchema.index({ userId: 1, month: 1, bankName: 1, category: 1, type: 1 }, { unique: true });
+
+const MonthlyRollup = mongoose.model('MonthlyRollup', monthlyRollupSchema);
+
+module.exports = MonthlyRollup;
@@ -0,0 +1,72 @@
+// models/ProcessingJob.js
+const mongoose = require('mongoose');
+
+// Background work persisted in MongoDB so it survives server restarts
+// (see services/jobQueue.js)
+const processingJobSchema = new mongoose.Schema({
+    type: {
+        type: String,
+        required: true
+    },
+    data: {
+        type: mongoose.Schema.Types.Mixed,  // Handler arguments, e.g. { statementId }
+        default: {}
+    },
+    userId: {
+        type: mongoose.Schema.Types.ObjectId,
+        ref: 'User',
+        index: true
+    },
+    statementId: {
+        type: mongoose.Schema.Types.ObjectId,
+        ref: 'BankStatement',
+        index: true
+    },
+    status: {
+        type: String,
+        enum: ['queued', 'running', 'completed', 'failed'],
+        default: 'queued'
+    },
+    attempts: {
+        type: Number,
+        default: 0
+    },
+    maxAttempts: {
+        type: Number,
+        default: 3
+    },
+    // Earliest time the job may run; pushed back on each retry
+    runAt: {
+        type: Date,
+        default: Date.now
+    },
+    // Renewed by the worker while the job runs; a lock left unrenewed is stale
+    lockedAt: {
+        type: Date,
+        default: null
+    },
+    lockedBy: {
+        type: String,
+        default: null
+    },
+    lastError: {
+        type: String,
+        default: null
+    },
+    result: {
+        type: mongoose.Schema.Types.Mixed,
+        default: null
+    },
+    completedAt: {
+        type: Date,
+        default: null
+    }
+}, { timestamps: true });
+
+// Claiming picks the oldest runnable job; stale-lock recovery scans running jobs
+processingJobSchema.index({ status: 1, runAt: 1 });
+processingJobSchema.index({ status: 1, lockedAt: 1 });
+
+const ProcessingJob = mongoose.model('ProcessingJob', processingJobSchema);
+
+module.exports = ProcessingJob;
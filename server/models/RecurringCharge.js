@@ -0,0 +1,73 @@
+// models/RecurringCharge.js
+const mongoose = require('mongoose');
+
+// A periodic charge detected in a user's transactions: one document per
+// merchant and amount series, rewritten for a merchant whenever one of its
+// transactions is added or removed (see services/recurringService.js)
+const recurringChargeSchema = new mongoose.Schema({
+    userId: {
+        type: mongoose.Schema.Types.ObjectId,
+        required: true,
+        ref: 'User'
+    },
+    merchant: {
+        type: String,  // Normalized merchant key
+        required: true
+    },
+    category: {
+        type: String,
+        default: 'Other'
+    },
+    frequency: {
+        type: String,
+        enum: ['weekly', 'biweekly', 'monthly', 'quarterly', 'annual'],
+        required: true
+    },
+    // Median days between charges
+    intervalDays: {
+        type: Number,
+        required: true
+    },
+    // Median and latest charge, in integer cents
+    amountCents: {
+        type: Number,
+        required: true
+    },
+    lastAmountCents: {
+        type: Number,
+        required: true
+    },
+    occurrences: {
+        type: Number,
+        required: true
+    },
+    firstDate: {
+        type: Date,
+        required: true
+    },
+    lastDate: {
+        type: Date,
+        required: true
+    },
+    nextExpectedDate: {
+        type: Date,
+        required: true
+    },
+    // Share of intervals that fit the frequency, scaled down for short histories
+    confidence: {
+        type: Number,
+        required: true
+    },
+    updatedAt: {
+        type: Date,
+        default: Date.now
+    }
+});
+
+// Charges are replaced per merchant; listings read a user's upcoming charges in order
+recurringChargeSchema.index({ userId: 1, merchant: 1 });
+recurringChargeSchema.index({ userId: 1, nextExpectedDate: 1 });
+
+const RecurringCharge = mongoose.model('RecurringCharge', recurringChargeSchema);
+
+module.exports = RecurringCharge;
@@ -0,0 +1,80 @@
+// models/Transaction.js
+const mongoose = require('mongoose');
+
+// One row per parsed transaction, kept alongside the statement's embedded
+// mlResults.expenses so transactions can be queried across statements
+// (see services/transactionService.js)
+const transactionSchema = new mongoose.Schema({
+    userId: {
+        type: mongoose.Schema.Types.ObjectId,
+        required: true,
+        ref: 'User'
+    },
+    statementId: {
+        type: mongoose.Schema.Types.ObjectId,
+        required: true,
+        index: true,
+        ref: 'BankStatement'
+    },
+    bankName: {
+        type: String,
+        default: 'Unknown Bank'
+    },
+    // Full date; the year is inferred from the statement period when the line omits it
+    date: {
+        type: Date,
+        required: true
+    },
+    // Date exactly as printed on the statement
+    rawDate: {
+        type: String
+    },
+    description: {
+        type: String,
+        required: true,
+        trim: true
+    },
+    merchant: {
+        type: String,  // Normalized merchant key from the parser
+        trim: true
+    },
+    category: {
+        type: String,
+        default: 'Other'
+    },
+    type: {
+        type: String,
+        enum: ['debit', 'credit'],
+        default: 'debit'
+    },
+    // Integer cents so sums are exact
+    amountCents: {
+        type: Number,
+        required: true
+    },
+    // Hash of bank, type, amount and merchant used to find the same transaction in overlapping statements
+    dedupKey: {
+        type: String
+    },
+    // Set when this is a copy of a transaction in an earlier statement; left out of totals
+    duplicateOf: {
+        type: mongoose.Schema.Types.ObjectId,
+        ref: 'BankStatement'
+    }
+});
+
+// Range queries by date, by category and by merchant; _id breaks ties for cursor pagination
+transactionSchema.index({ userId: 1, date: -1, _id: -1 });
+transactionSchema.index({ userId: 1, category: 1, date: -1, _id: -1 });
+transactionSchema.index({ userId: 1, merchant: 1, date: -1, _id: -1 });
+
+// Duplicate lookups on ingest, and the duplicates report and release on delete
+transactionSchema.index({ userId: 1, dedupKey: 1, date: 1 });
+transactionSchema.index(
+    { userId: 1, duplicateOf: 1 },
+    { partialFilterExpression: { duplicateOf: { $type: 'objectId' } } }
+);
+
+const Transaction = mongoose.model('Transaction', transactionSchema);
+
+module.exports = Transaction;
@@ -2,12 +2,16 @@
 const express = require('express');
 const router = express.Router();
 const multer = require('multer');
-const path = require('path');
-const fs = require('fs');
-const os = require('os');
 const BankStatement = require('../models/BankStatement');
 const auth = require('../middleware/auth');
-const { parseBankStatement } = require('../utils/pythonExecutor');
+const {
+    enqueueStatementProcessing,
+    importStatementBatch,
+    processExistingStatement,
+    deleteStatement
+} = require('../services/bankStatementService');
+const { storePdf } = require('../services/pdfStorageService');
+const { readZipEntries } = require('../utils/zipReader');
 
 // Configure multer for PDF uploads
 const upload = multer({
@@ -24,6 +28,32 @@ const upload = multer({
     }
 });
 
+// Batch imports take several PDFs and/or zip archives of PDFs
+const MAX_BATCH_STATEMENTS = 60;
+const MAX_PDF_BYTES = 10 * 1024 * 1024;
+const ZIP_MIMETYPES = ['application/zip', 'application/x-zip-compressed', 'application/x-zip'];
+
+const batchUpload = multer({
+    storage: multer.memoryStorage(),
+    limits: {
+        fileSize: 100 * 1024 * 1024, // 100MB per file, so zip archives fit
+        files: MAX_BATCH_STATEMENTS
+    },
+    fileFilter: (req, file, cb) => {
+        if (file.mimetype === 'application/pdf' || ZIP_MIMETYPES.includes(file.mimetype)) {
+            cb(null, true);
+        } else {
+            cb(new Error('Only PDF and zip files are allowed'));
+        }
+    }
+});
+
+// PDFs inside a zip, skipping macOS resource forks
+function isPdfEntry(name) {
+    const baseName = name.split('/').pop();
+    return baseName.toLowerCase().endsWith('.pdf') && !baseName.startsWith('._');
+}
+
 // Add some debug logging
 router.use((req, res, next) => {
     console.log(`[${new Date().toISOString()}] Bank Statement Route accessed:`, req.method, req.url);
@@ -53,12 +83,16 @@ router.post('/upload', auth, upload.single('statement'), async (req, res) => {
 
         console.log('File received:', req.file.originalname, 'size:', req.file.size);
 
+        // Store the PDF in GridFS; the statement only references it by hash
+        const { pdfHash, pdfSize } = await storePdf(req.file.buffer, req.file.originalname);
+
         // Create a new bank statement entry
         const bankStatement = new BankStatement({
             userId: req.userId,
             title: req.body.title || 'Bank Statement',
             fileName: req.file.originalname,
-            pdfData: req.file.buffer,
+            pdfHash,
+            pdfSize,
             uploadDate: new Date(),
             isProcessed: false
         });
@@ -67,89 +101,101 @@ router.post('/upload', auth, upload.single('statement'), async (req, res) => {
         await bankStatement.save();
         console.log('Statement saved to database, ID:', bankStatement._id);
 
+        // Queue the statement for parsing; the job survives restarts and is retried on failure
+        const job = await enqueueStatementProcessing(bankStatement);
+
         // Return success response immediately to avoid timeout
         res.status(201).json({
             message: 'Bank statement uploaded successfully',
             statementId: bankStatement._id,
+            jobId: job._id,
             isProcessed: false
         });
 
-        // Process with Python in the background
-        try {
-            console.log('Starting background processing for statement:', bankStatement._id);
-            processStatementWithPython(bankStatement);
-        } catch (backgroundError) {
-            console.error('Error starting background processing:', backgroundError);
-        }
-
     } catch (error) {
         console.error('Upload error:', error);
         res.status(500).json({ error: 'Error uploading bank statement' });
     }
 });
 
-// Function to process a statement with Python in the background
-async function processStatementWithPython(statement) {
+// Import many statements at once; they are parsed in parallel and saved together
+router.post('/batch', auth, batchUpload.array('statements', MAX_BATCH_STATEMENTS), async (req, res) => {
+    console.log('Batch upload endpoint hit, user:', req.userId);
     try {
-        // Create a temporary file for the PDF
-        const tempDir = os.tmpdir();
-        const tempFilePath = path.join(tempDir, `statement_${Date.now()}.pdf`);
-
-        // Write the PDF data to a temporary file
-        fs.writeFileSync(tempFilePath, statement.pdfData);
-        console.log(`PDF saved to temporary file: ${tempFilePath}`);
-
-        // Use the enhanced parseBankStatement function to identify bank and parse
-        console.log('Executing Python parser...');
-        const result = await parseBankStatement(tempFilePath);
-
-        // Use the parsed JSON
-        const parserOutput = result.parsedJson;
+        if (!req.files || req.files.length === 0) {
+            return res.status(400).json({ error: 'No files uploaded' });
+        }
 
-        if (!parserOutput) {
-            throw new Error('Failed to get valid data from Python parser');
+        // Expand zip archives into their PDFs
+        const files = [];
+        for (const file of req.files) {
+            // One past the limit is enough to reject the batch below
+            if (files.length > MAX_BATCH_STATEMENTS) {
+                break;
+            }
+            if (file.mimetype === 'application/pdf') {
+                if (file.size > MAX_PDF_BYTES) {
+                    return res.status(400).json({ error: `${file.originalname} is larger than 10MB` });
+                }
+                files.push({ fileName: file.originalname, pdfData: file.buffer });
+                continue;
+            }
+
+            try {
+                const entries = await readZipEntries(file.buffer, {
+                    filter: isPdfEntry,
+                    maxEntryBytes: MAX_PDF_BYTES,
+                    maxEntries: MAX_BATCH_STATEMENTS + 1 - files.length
+                });
+                entries.forEach(entry => files.push({ fileName: entry.name, pdfData: entry.data }));
+            } catch (zipError) {
+                return res.status(400).json({ error: `Could not read ${file.originalname}: ${zipError.message}` });
+            }
         }
 
-        console.log(`Parser found ${parserOutput.summary.totalTransactions} transactions`);
-        console.log(`Identified bank: ${parserOutput.bankIdentifier || 'Unknown'}`);
-
-        // Update the statement with the parsed data
-        statement.mlResults = {
-            expenses: parserOutput.transactions,
-            totalExpenses: parserOutput.summary.totalDebits,
-            totalCredits: parserOutput.summary.totalCredits,
-            totalTransactions: parserOutput.summary.totalTransactions,
-            processedDate: new Date(),
-            categoryBreakdown: parserOutput.categoryBreakdown
-        };
-
-        // Update bank name
-        statement.bankName = parserOutput.bankIdentifier || 'Unknown Bank';
-        statement.isProcessed = true;
-        await statement.save();
-        console.log('Statement updated with parsed data, ID:', statement._id);
-
-        // Clean up the temporary file
-        if (fs.existsSync(tempFilePath)) {
-            fs.unlinkSync(tempFilePath);
-            console.log('Temporary PDF file deleted');
+        if (files.length === 0) {
+            return res.status(400).json({ error: 'No PDF statements found in upload' });
         }
-    } catch (error) {
-        console.error('Error processing statement with Python:', error);
+        if (files.length > MAX_BATCH_STATEMENTS) {
+            return res.status(400).json({ error: `A batch may contain at most ${MAX_BATCH_STATEMENTS} statements` });
+        }
+
+        console.log(`Batch of ${files.length} statements received`);
+        const { statements, failed } = await importStatementBatch({
+            userId: req.userId,
+            title: req.body.title,
+            files
+        });
 
-        // Update the statement with the error
-        statement.processingError = error.message;
-        await statement.save();
+        res.status(201).json({
+            message: `Imported ${statements.length - failed} of ${statements.length} statements`,
+            imported: statements.length - failed,
+            failed,
+            statements: statements.map(statement => ({
+                statementId: statement._id,
+                fileName: statement.fileName,
+                isProcessed: statement.isProcessed,
+                bankName: statement.bankName,
+                transactionCount: statement.isProcessed ? statement.mlResults.totalTransactions : 0,
+                processingError: statement.processingError
+            }))
+        });
+    } catch (error) {
+        console.error('Batch upload error:', error);
+        res.status(500).json({ error: 'Error importing bank statements' });
     }
-}
+});
 
 // Get user's bank statements
 router.get('/statements', auth, async (req, res) => {
     console.log('Statements endpoint hit for user:', req.user.userId);
     try {
+        // Transactions are left out unless asked for; the dashboard works from
+        // the stored totals and the /api/analytics aggregations
+        const projection = req.query.include === 'transactions' ? '-pdfData' : '-pdfData -mlResults.expenses';
         const statements = await BankStatement.find({
             userId: req.user.userId
-        }).select('-pdfData')  // Exclude PDF data from the response
+        }).select(projection)  // Exclude PDF data from the response
             .sort({ uploadDate: -1 });
 
         console.log('Found statements:', statements.length);
@@ -163,78 +209,31 @@ router.get('/statements', auth, async (req, res) => {
 
 // Request processing for a statement manually
 router.post('/analyze/:id', auth, async (req, res) => {
+    const statementId = req.params.id;
     try {
-        const statementId = req.params.id;
-        const statement = await BankStatement.findOne({
-            _id: statementId,
-            userId: req.user.userId
-        });
+        // Parsing always runs as a queued job; poll /api/jobs/statement/:id for the result
+        const { job, queued } = await processExistingStatement(statementId, req.user.userId);
 
-        if (!statement) {
+        res.status(202).json({
+            message: queued ? 'Statement queued for processing' : 'Statement is already being processed',
+            statementId: statementId,
+            jobId: job._id,
+            status: job.status,
+            isProcessed: false
+        });
+    } catch (error) {
+        if (error.message === 'Statement not found') {
             return res.status(404).json({ error: 'Statement not found' });
         }
-
-        if (statement.isProcessed) {
+        if (error.message === 'Statement already processed') {
             return res.status(400).json({
                 error: 'Statement already processed',
                 statementId: statementId,
                 isProcessed: true
             });
         }
-
-        // Create a temporary file for the PDF
-        const tempDir = os.tmpdir();
-        const tempFilePath = path.join(tempDir, `statement_${Date.now()}.pdf`);
-
-        // Write the PDF data to a temporary file
-        fs.writeFileSync(tempFilePath, statement.pdfData);
-        console.log(`PDF saved to temporary file: ${tempFilePath}`);
-
-        // Use the enhanced parseBankStatement function to identify bank and parse
-        console.log('Executing Python parser...');
-        const result = await parseBankStatement(tempFilePath);
-
-        // Use the parsed JSON
-        const parserOutput = result.parsedJson;
-
-        if (!parserOutput) {
-            throw new Error('Failed to get valid data from Python parser');
-        }
-
-        console.log(`Parser found ${parserOutput.summary.totalTransactions} transactions`);
-        console.log(`Identified bank: ${parserOutput.bankIdentifier || 'Unknown'}`);
-
-        // Update the statement with the parsed data
-        statement.mlResults = {
-            expenses: parserOutput.transactions,
-            totalExpenses: parserOutput.summary.totalDebits,
-            totalCredits: parserOutput.summary.totalCredits,
-            totalTransactions: parserOutput.summary.totalTransactions,
-            processedDate: new Date(),
-            categoryBreakdown: parserOutput.categoryBreakdown
-        };
-
-        // Update bank name
-        statement.bankName = parserOutput.bankIdentifier || 'Unknown Bank';
-        statement.isProcessed = true;
-        await statement.save();
-
-        // Clean up the temporary file
-        if (fs.existsSync(tempFilePath)) {
-            fs.unlinkSync(tempFilePath);
-            console.log('Temporary PDF file deleted');
-        }
-
-        res.json({
-            message: 'Statement processed successfully',
-            statementId: statementId,
-            isProcessed: true,
-            bankName: statement.bankName,
-            transactionCount: parserOutput.summary.totalTransactions
-        });
-    } catch (error) {
         console.error('Analysis request error:', error);
-        res.status(500).json({ error: 'Error processing statement: ' + error.message });
+        res.status(500).json({ error: 'Error queueing statement: ' + error.message });
     }
 });
 
@@ -271,11 +270,15 @@ router.get('/analysis/:id', auth, async (req, res) => {
     }
 });
 
-router.delete('/statements/:id', async (req, res) => {
+// Delete a statement and everything derived from it
+router.delete('/statements/:id', auth, async (req, res) => {
     const statementId = req.params.id;
     try {
         console.log('Deleting statement with ID:', statementId);
-        await BankStatement.findByIdAndDelete(statementId);
+        const deleted = await deleteStatement(statementId, req.user.userId);
+        if (!deleted) {
+            return res.status(404).json({ error: 'Statement not found' });
+        }
         res.status(200).json({ message: 'Statement deleted successfully' });
     } catch (err) {
         console.error('Failed to delete statement:', err);
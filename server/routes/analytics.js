@@ -0,0 +1,167 @@
+// routes/analytics.js
+const express = require('express');
+const router = express.Router();
+const mongoose = require('mongoose');
+const auth = require('../middleware/auth');
+const {
+    getCategoryTotals,
+    getMonthlyTotals,
+    getBankTotals,
+    compareStatements,
+    getSpendingInsights
+} = require('../services/analyticsService');
+const { FREQUENCIES, getRecurringCharges } = require('../services/recurringService');
+
+const MAX_TOP_MERCHANTS = 100;
+const MAX_WINDOW_DAYS = 365;
+
+// Statement filters shared by the aggregation endpoints: ?bank=&from=&to=
+function parseFilters(query) {
+    const filters = {};
+    if (query.bank && query.bank !== 'all') {
+        filters.bankName = query.bank;
+    }
+    for (const key of ['from', 'to']) {
+        if (query[key]) {
+            if (Number.isNaN(Date.parse(query[key]))) {
+                throw new Error(`Invalid ${key} date`);
+            }
+            filters[key] = query[key];
+        }
+    }
+    return filters;
+}
+
+// Total spending per category
+router.get('/categories', auth, async (req, res) => {
+    let filters;
+    try {
+        filters = parseFilters(req.query);
+    } catch (error) {
+        return res.status(400).json({ error: error.message });
+    }
+
+    try {
+        res.json(await getCategoryTotals(req.user.userId, filters));
+    } catch (error) {
+        console.error('Category totals error:', error);
+        res.status(500).json({ error: 'Error computing category totals' });
+    }
+});
+
+// Spending per month, optionally for one category: ?category=
+router.get('/monthly', auth, async (req, res) => {
+    let filters;
+    try {
+        filters = parseFilters(req.query);
+    } catch (error) {
+        return res.status(400).json({ error: error.message });
+    }
+    if (req.query.category) {
+        filters.category = req.query.category;
+    }
+
+    try {
+        res.json(await getMonthlyTotals(req.user.userId, filters));
+    } catch (error) {
+        console.error('Monthly totals error:', error);
+        res.status(500).json({ error: 'Error computing monthly totals' });
+    }
+});
+
+// Totals per bank
+router.get('/banks', auth, async (req, res) => {
+    let filters;
+    try {
+        filters = parseFilters(req.query);
+    } catch (error) {
+        return res.status(400).json({ error: error.message });
+    }
+
+    try {
+        res.json(await getBankTotals(req.user.userId, filters));
+    } catch (error) {
+        console.error('Bank totals error:', error);
+        res.status(500).json({ error: 'Error computing bank totals' });
+    }
+});
+
+// Per-category deltas between two statements: ?first=&second=
+router.get('/compare', auth, async (req, res) => {
+    const { first, second } = req.query;
+    if (!mongoose.isValidObjectId(first) || !mongoose.isValidObjectId(second)) {
+        return res.status(400).json({ error: 'first and second must be statement IDs' });
+    }
+
+    try {
+        const comparison = await compareStatements(req.user.userId, first, second);
+        if (!comparison) {
+            return res.status(404).json({ error: 'Both statements must exist and be processed' });
+        }
+        res.json(comparison);
+    } catch (error) {
+        console.error('Statement comparison error:', error);
+        res.status(500).json({ error: 'Error comparing statements' });
+    }
+});
+
+// Category breakdown, month-over-month changes, rolling daily averages and top
+// merchants over individual transactions: ?category=&top=&windows=7,30
+router.get('/insights', auth, async (req, res) => {
+    let filters;
+    try {
+        filters = parseFilters(req.query);
+    } catch (error) {
+        return res.status(400).json({ error: error.message });
+    }
+    if (req.query.category) {
+        filters.category = req.query.category;
+    }
+
+    const options = {};
+    if (req.query.top) {
+        options.top = parseInt(req.query.top, 10);
+        if (!(options.top >= 1 && options.top <= MAX_TOP_MERCHANTS)) {
+            return res.status(400).json({ error: `top must be between 1 and ${MAX_TOP_MERCHANTS}` });
+        }
+    }
+    if (req.query.windows) {
+        options.windows = String(req.query.windows).split(',').map(days => parseInt(days, 10));
+        if (options.windows.some(days => !(days >= 1 && days <= MAX_WINDOW_DAYS))) {
+            return res.status(400).json({ error: `windows must be days between 1 and ${MAX_WINDOW_DAYS}` });
+        }
+    }
+
+    try {
+        res.json(await getSpendingInsights(req.user.userId, filters, options));
+    } catch (error) {
+        console.error('Spending insights error:', error);
+        res.status(500).json({ error: 'Error computing spending insights' });
+    }
+});
+
+// Detected recurring charges, next expected first: ?active=true&frequency=monthly&minConfidence=0.5
+router.get('/recurring', auth, async (req, res) => {
+    const filters = { active: req.query.active === 'true' };
+    if (req.query.frequency) {
+        if (!FREQUENCIES.some(({ frequency }) => frequency === req.query.frequency)) {
+            return res.status(400).json({ error: `frequency must be one of ${FREQUENCIES.map(({ frequency }) => frequency).join(', ')}` });
+        }
+        filters.frequency = req.query.frequency;
+    }
+    if (req.query.minConfidence) {
+        filters.minConfidence = parseFloat(req.query.minConfidence);
+        if (!(filters.minConfidence >= 0 && filters.minConfidence <= 1)) {
+            return res.status(400).json({ error: 'minConfidence must be between 0 and 1' });
+        }
+    }
+
+    try {
+        res.json(await getRecurringCharges(req.user.userId, filters));
+    } catch (error) {
+        console.error('Recurring charges error:', error);
+        res.status(500).json({ error: 'Error fetching recurring charges' });
+    }
+});
+
+module.exports = router;
@@ -0,0 +1,57 @@
+// routes/jobs.js
+const express = require('express');
+const router = express.Router();
+const ProcessingJob = require('../models/ProcessingJob');
+const auth = require('../middleware/auth');
+const { getJobQueue } = require('../services/jobQueue');
+
+// Fields returned for a job; handler arguments stay internal
+const JOB_FIELDS = 'type statementId status attempts maxAttempts runAt lastError result completedAt createdAt updatedAt';
+
+// Queue depth, job counts by state and this server's worker slots
+router.get('/stats', auth, async (req, res) => {
+    try {
+        res.json(await getJobQueue().getStats());
+    } catch (error) {
+        console.error('Job stats error:', error);
+        res.status(500).json({ error: 'Error fetching job queue stats' });
+    }
+});
+
+// Latest processing job for one of the user's statements
+router.get('/statement/:statementId', auth, async (req, res) => {
+    try {
+        const job = await ProcessingJob.findOne({
+            statementId: req.params.statementId,
+            userId: req.user.userId
+        }).sort({ createdAt: -1 }).select(JOB_FIELDS);
+
+        if (!job) {
+            return res.status(404).json({ error: 'No job found for this statement' });
+        }
+        res.json(job);
+    } catch (error) {
+        console.error('Fetch statement job error:', error);
+        res.status(500).json({ error: 'Error fetching job' });
+    }
+});
+
+// State of a single job
+router.get('/:id', auth, async (req, res) => {
+    try {
+        const job = await ProcessingJob.findOne({
+            _id: req.params.id,
+            userId: req.user.userId
+        }).select(JOB_FIELDS);
+
+        if (!job) {
+            return res.status(404).json({ error: 'Job not found' });
+        }
+        res.json(job);
+    } catch (error) {
+        console.error('Fetch job error:', error);
+        res.status(500).json({ error: 'Error fetching job' });
+    }
+});
+
+module.exports = router;
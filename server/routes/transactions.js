@@ -0,0 +1,101 @@
+// routes/transactions.js
+const express = require('express');
+const router = express.Router();
+const mongoose = require('mongoose');
+const auth = require('../middleware/auth');
+const { searchTransactions, getTransactionTotals } = require('../services/transactionService');
+const { getDuplicateReport } = require('../services/duplicateService');
+
+// Transaction filters: ?from=&to=&category=&merchant=&bank=&type=&statementId=&includeDuplicates=true
+function parseFilters(query) {
+    const filters = {};
+    for (const key of ['from', 'to']) {
+        if (query[key]) {
+            if (Number.isNaN(Date.parse(query[key]))) {
+                throw new Error(`Invalid ${key} date`);
+            }
+            filters[key] = query[key];
+        }
+    }
+    if (query.type) {
+        if (!['debit', 'credit'].includes(query.type)) {
+            throw new Error('type must be debit or credit');
+        }
+        filters.type = query.type;
+    }
+    if (query.statementId) {
+        if (!mongoose.isValidObjectId(query.statementId)) {
+            throw new Error('Invalid statementId');
+        }
+        filters.statementId = query.statementId;
+    }
+    if (query.bank && query.bank !== 'all') {
+        filters.bankName = query.bank;
+    }
+    if (query.category) {
+        filters.category = query.category;
+    }
+    if (query.merchant) {
+        filters.merchant = query.merchant;
+    }
+    if (query.includeDuplicates === 'true') {
+        filters.includeDuplicates = true;
+    }
+    return filters;
+}
+
+// One page of transactions, newest first; pass nextCursor back as ?cursor= for the next page
+router.get('/', auth, async (req, res) => {
+    let filters;
+    try {
+        filters = parseFilters(req.query);
+    } catch (error) {
+        return res.status(400).json({ error: error.message });
+    }
+
+    try {
+        res.json(await searchTransactions(req.user.userId, filters, {
+            limit: req.query.limit,
+            cursor: req.query.cursor
+        }));
+    } catch (error) {
+        if (error.message === 'Invalid cursor') {
+            return res.status(400).json({ error: error.message });
+        }
+        console.error('Transaction search error:', error);
+        res.status(500).json({ error: 'Error fetching transactions' });
+    }
+});
+
+// Debit and credit totals for the same filters
+router.get('/totals', auth, async (req, res) => {
+    let filters;
+    try {
+        filters = parseFilters(req.query);
+    } catch (error) {
+        return res.status(400).json({ error: error.message });
+    }
+
+    try {
+        res.json(await getTransactionTotals(req.user.userId, filters));
+    } catch (error) {
+        console.error('Transaction totals error:', error);
+        res.status(500).json({ error: 'Error computing transaction totals' });
+    }
+});
+
+// Transactions left out of the totals as duplicates of another statement's: ?statementId=
+router.get('/duplicates', auth, async (req, res) => {
+    if (req.query.statementId && !mongoose.isValidObjectId(req.query.statementId)) {
+        return res.status(400).json({ error: 'Invalid statementId' });
+    }
+
+    try {
+        res.json(await getDuplicateReport(req.user.userId, { statementId: req.query.statementId }));
+    } catch (error) {
+        console.error('Duplicate report error:', error);
+        res.status(500).json({ error: 'Error fetching duplicate transactions' });
+    }
+});
+
+module.exports = router;
@@ -0,0 +1,13 @@
+#!/usr/bin/env python3
+"""
+Batch Parser
+Identifies and parses several statements in one invocation, spreading them
+across a process pool, and prints one outcome per statement as a JSON list.
+"""
+
+import sys
+
+from parser_core.cli import run_batch_parser
+
+if __name__ == "__main__":
+    sys.exit(run_batch_parser())
@@ -0,0 +1,19 @@
+#!/usr/bin/env python3
+"""
+Parser Benchmarks
+Times extraction, bank identification, transaction matching, categorization
+and JSON serialization for every bank parser on synthetic statements, and
+exits non-zero when a stage has regressed against benchmarks/baseline.json.
+
+Usage:
+    python benchmark_parsers.py                      compare against the baseline
+    python benchmark_parsers.py --update-baseline    record a new baseline
+    python benchmark_parsers.py --write-fixtures DIR write the synthetic PDFs and text
+"""
+
+import sys
+
+from benchmarks.cli import run_benchmark_cli
+
+if __name__ == "__main__":
+    sys.exit(run_benchmark_cli())
@@ -0,0 +1,12 @@
+"""
+Parser benchmarks.
+
+Synthetic Chase, TD Bank and Wells Fargo statements are generated from a
+fixed seed and run through each stage of parser_core, reporting throughput
+and peak memory per stage and comparing them against baseline.json.
+
+Run from the scripts directory with benchmark_parsers.py.
+"""
+
+from .harness import benchmark_bank, compare_to_baseline, run_benchmarks
+from .synthetic import build_pdf, generate_statement, write_fixtures
@@ -0,0 +1,63 @@
+"""
+Command-line entry point for the parser benchmarks.
+"""
+
+import os
+import sys
+import json
+import argparse
+
+from .harness import DEFAULT_TOLERANCE, compare_to_baseline, format_report, run_benchmarks
+from .synthetic import BANKS, write_fixtures
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+def parse_arguments():
+    parser = argparse.ArgumentParser(description="Benchmark the bank statement parsers on synthetic statements")
+    parser.add_argument("--banks", nargs="+", choices=BANKS, help="Banks to benchmark (default: all)")
+    parser.add_argument("--pages", type=int, default=10, help="Pages per statement")
+    parser.add_argument("--per-page", type=int, default=50, help="Transactions per page")
+    parser.add_argument("--repeat", type=int, default=5, help="Timed repetitions per bank")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the synthetic statements")
+    parser.add_argument("--text-only", action="store_true", help="Skip PDF extraction and parse the raw-text fixtures")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="Baseline report to compare against")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                        help="Allowed fractional slowdown or memory growth per stage")
+    parser.add_argument("--update-baseline", action="store_true", help="Save this run as the new baseline")
+    parser.add_argument("--write-fixtures", metavar="DIR",
+                        help="Write the synthetic PDF and text fixtures to DIR and exit")
+    return parser.parse_args()
+
+def run_benchmark_cli():
+    """Run the benchmarks, exiting non-zero when a stage regressed against the baseline"""
+    args = parse_arguments()
+
+    if args.write_fixtures:
+        for path in write_fixtures(args.write_fixtures, args.pages, args.per_page, args.seed):
+            print(path)
+        return 0
+
+    report = run_benchmarks(args.banks, args.pages, args.per_page, args.repeat, args.seed, args.text_only)
+    print(json.dumps(report, indent=2) if args.json else format_report(report))
+
+    if args.update_baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+            f.write("\n")
+        print(f"Saved baseline to {args.baseline}", file=sys.stderr)
+        return 0
+
+    try:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        print(f"No baseline at {args.baseline}; run with --update-baseline to create one", file=sys.stderr)
+        return 0
+
+    regressions = compare_to_baseline(report, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION: {regression}", file=sys.stderr)
+    if not regressions:
+        print(f"No regressions against {args.baseline} (tolerance {args.tolerance:.0%})", file=sys.stderr)
+    return 1 if regressions else 0
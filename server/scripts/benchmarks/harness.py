@@ -0,0 +1,209 @@
+"""
+Per-stage parser benchmarks.
+
+Each bank plugin is run over a synthetic statement and every stage of the
+pipeline is timed on its own:
+
+  extract     PDF bytes to page text (pdfplumber)
+  identify    bank identification on the leading pages
+  match       the plugin's transaction regex, skip and credit rules
+  categorize  merchant normalization and keyword categorization (cold cache)
+  serialize   building the result object and encoding it as JSON
+
+Timings are the median of several repetitions. Peak memory is measured in
+a separate pass under tracemalloc, since tracing slows everything down.
+"""
+
+import gc
+import json
+import platform
+import statistics
+import time
+import tracemalloc
+
+from parser_core import __version__
+from parser_core.categories import category_cache
+from parser_core.extraction import extract_pages
+from parser_core.identification import identify_bank
+from parser_core.parsing import categorize_matched, match_transactions
+from parser_core.pipeline import IDENTIFY_PAGES
+from parser_core.registry import get_plugin
+from parser_core.summary import build_result
+
+from .synthetic import BANKS, build_pdf, generate_statement
+
+STAGES = ["extract", "identify", "match", "categorize", "serialize"]
+
+# A stage regresses when its throughput drops, or its peak memory grows, by more than this
+DEFAULT_TOLERANCE = 0.25
+
+def run_stages(bank, pdf_bytes, page_texts, stage_hook):
+    """
+    Run the pipeline stages once, calling stage_hook(name, fn) around each.
+
+    With pdf_bytes=None the extract stage is skipped and page_texts (the
+    raw-text fixture) is used instead. Returns the number of transactions.
+    """
+    if pdf_bytes is not None:
+        page_texts = stage_hook("extract", lambda: extract_pages(pdf_bytes))
+
+    plugin = get_plugin(bank)
+    identified = stage_hook("identify", lambda: identify_bank("".join(page_texts[:IDENTIFY_PAGES])))
+    if identified != bank:
+        raise ValueError(f"Synthetic {bank} statement was identified as {identified}")
+
+    transactions = stage_hook("match", lambda: [
+        transaction for text in page_texts for transaction in match_transactions(text, plugin)
+    ])
+
+    category_cache.clear()
+    stage_hook("categorize", lambda: categorize_matched(transactions))
+    stage_hook("serialize", lambda: json.dumps(build_result(transactions, bank)))
+    return len(transactions)
+
+def time_stages(bank, pdf_bytes, page_texts, repeat):
+    """Median seconds per stage over repeat runs"""
+    samples = {}
+
+    def timed(name, fn):
+        start = time.perf_counter()
+        value = fn()
+        samples.setdefault(name, []).append(time.perf_counter() - start)
+        return value
+
+    for _ in range(repeat):
+        transactions = run_stages(bank, pdf_bytes, page_texts, timed)
+    return {name: statistics.median(values) for name, values in samples.items()}, transactions
+
+def measure_memory(bank, pdf_bytes, page_texts):
+    """Peak traced memory, in KiB, allocated while each stage runs"""
+    peaks = {}
+
+    def traced(name, fn):
+        gc.collect()
+        tracemalloc.reset_peak()
+        baseline, _ = tracemalloc.get_traced_memory()
+        value = fn()
+        _, peak = tracemalloc.get_traced_memory()
+        peaks[name] = max(0, peak - baseline) // 1024
+        return value
+
+    tracemalloc.start()
+    try:
+        run_stages(bank, pdf_bytes, page_texts, traced)
+    finally:
+        tracemalloc.stop()
+    return peaks
+
+def benchmark_bank(bank, pages=10, transactions_per_page=50, repeat=5, seed=0, text_only=False):
+    """Benchmark one bank plugin, returning throughput and memory per stage"""
+    statement = generate_statement(bank, pages, transactions_per_page, seed)
+    pdf_bytes = None if text_only else build_pdf(statement)
+    page_texts = ["\n".join(lines) + "\n" for lines in statement]
+
+    # Warm-up run: imports, regex compilation and pdfminer's font caches
+    run_stages(bank, pdf_bytes, page_texts, lambda name, fn: fn())
+
+    seconds, transactions = time_stages(bank, pdf_bytes, page_texts, repeat)
+    peaks = measure_memory(bank, pdf_bytes, page_texts)
+
+    expected = pages * transactions_per_page
+    if transactions != expected:
+        raise ValueError(f"{bank} parser found {transactions} of {expected} synthetic transactions")
+
+    stages = {}
+    for name in STAGES:
+        if name not in seconds:
+            continue
+        stages[name] = {
+            "seconds": round(seconds[name], 6),
+            "transactionsPerSec": round(transactions / seconds[name], 1) if seconds[name] else None,
+            "pagesPerSec": round(pages / seconds[name], 1) if seconds[name] else None,
+            "peakMemoryKb": peaks[name]
+        }
+    total = sum(seconds.values())
+
+    return {
+        "pages": pages,
+        "transactions": transactions,
+        "pdfBytes": len(pdf_bytes) if pdf_bytes is not None else None,
+        "stages": stages,
+        "total": {
+            "seconds": round(total, 6),
+            "transactionsPerSec": round(transactions / total, 1),
+            "pagesPerSec": round(pages / total, 1),
+            "peakMemoryKb": max(peaks.values())
+        }
+    }
+
+def run_benchmarks(banks=None, pages=10, transactions_per_page=50, repeat=5, seed=0, text_only=False):
+    """Benchmark every requested bank plugin and return the full report"""
+    return {
+        "config": {
+            "pages": pages,
+            "transactionsPerPage": transactions_per_page,
+            "repeat": repeat,
+            "seed": seed,
+            "textOnly": text_only,
+            "parserVersion": __version__,
+            "python": platform.python_version(),
+            "machine": platform.machine()
+        },
+        "banks": {
+            bank: benchmark_bank(bank, pages, transactions_per_page, repeat, seed, text_only)
+            for bank in (banks or BANKS)
+        }
+    }
+
+def compare_to_baseline(report, baseline, tolerance=DEFAULT_TOLERANCE):
+    """
+    Return a list of regression messages, empty when nothing regressed.
+
+    Throughput is compared per stage, so a slower categorizer is reported
+    even when extraction dominates the total. Reports generated with a
+    different workload are not comparable and are rejected outright.
+    """
+    workload = ("pages", "transactionsPerPage", "seed", "textOnly")
+    if any(report["config"].get(key) != baseline["config"].get(key) for key in workload):
+        return [f"Baseline workload {dict((k, baseline['config'].get(k)) for k in workload)} "
+                f"does not match this run; regenerate it with --update-baseline"]
+
+    regressions = []
+    for bank, result in report["banks"].items():
+        base_bank = baseline["banks"].get(bank)
+        if base_bank is None:
+            continue
+        for name, stage in result["stages"].items():
+            base_stage = base_bank["stages"].get(name)
+            if base_stage is None:
+                continue
+            # Sub-millisecond stages are dominated by timer noise
+            if base_stage["seconds"] >= 0.001 and stage["transactionsPerSec"] < base_stage["transactionsPerSec"] * (1 - tolerance):
+                regressions.append(
+                    f"{bank} {name}: {stage['transactionsPerSec']:.0f} tx/s vs baseline "
+                    f"{base_stage['transactionsPerSec']:.0f} tx/s"
+                )
+            # Stages allocating only a few KiB are too noisy to compare
+            if base_stage["peakMemoryKb"] >= 64 and stage["peakMemoryKb"] > base_stage["peakMemoryKb"] * (1 + tolerance):
+                regressions.append(
+                    f"{bank} {name}: peak {stage['peakMemoryKb']} KiB vs baseline {base_stage['peakMemoryKb']} KiB"
+                )
+    return regressions
+
+def format_report(report):
+    """Plain-text table of the report"""
+    config = report["config"]
+    lines = [
+        f"Parser {config['parserVersion']} on Python {config['python']} ({config['machine']}): "
+        f"{config['pages']} pages x {config['transactionsPerPage']} transactions, "
+        f"median of {config['repeat']}" + (", text only" if config["textOnly"] else ""),
+        "",
+        f"{'bank':<12} {'stage':<11} {'ms':>9} {'tx/s':>11} {'pages/s':>9} {'peak KiB':>9}"
+    ]
+    for bank, result in report["banks"].items():
+        for name, stage in list(result["stages"].items()) + [("total", result["total"])]:
+            lines.append(
+                f"{bank:<12} {name:<11} {stage['seconds'] * 1000:>9.2f} "
+                f"{stage['transactionsPerSec']:>11,.0f} {stage['pagesPerSec']:>9,.1f} {stage['peakMemoryKb']:>9}"
+            )
+    return "\n".join(lines)
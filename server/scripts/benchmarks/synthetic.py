@@ -0,0 +1,149 @@
+"""
+Synthetic bank statements for benchmarking.
+
+Statements are generated from a fixed seed in the line formats the bank
+plugins read (Chase "MM/DD ... 1,234.56", TD Bank "MM/DD/YYYY ... $12.34",
+Wells Fargo "M/D ... 12.34 2,000.00"), so runs are repeatable and no real
+customer data is needed. PDFs are written directly with the standard
+Helvetica font, without any PDF library.
+"""
+
+import os
+import random
+
+# Descriptions as they appear on real statements, with a placeholder for
+# the store or order number that changes between charges
+DEBIT_DESCRIPTIONS = [
+    "DOORDASH*WENDYS",
+    "AMZN Mktp US*{code}",
+    "WAWA {number}",
+    "SHOPRITE #{number}",
+    "NETFLIX.COM",
+    "UBER TRIP HELP.UBER.COM",
+    "SHELL OIL {number}",
+    "Zelle to {name}",
+    "TARGET T-{number}",
+    "STARBUCKS STORE {number}",
+    "CVS/PHARMACY #{number}",
+    "SPOTIFY USA",
+    "PSE&G ELECTRIC BILL",
+    "PLANET FITNESS CLUB FEES",
+    "CHIPOTLE {number}",
+    "APPLE.COM/BILL",
+    "LOCAL HARDWARE STORE {number}",
+]
+CREDIT_DESCRIPTIONS = {
+    "Chase": ["DEPOSIT PAYROLL {name}", "REFUND AMAZON {code}"],
+    "TD Bank": ["DIRECT DEPOSIT {name} PAYROLL", "TRANSFER FROM SAV {number}"],
+    "Wells Fargo": ["DIRECT DEPOSIT {name}", "ZELLE FROM {name}"],
+}
+NAMES = ["JOHN SMITH", "MARIA GARCIA", "ACME CORP", "J DOE", "PAT LEE"]
+
+HEADERS = {
+    "Chase": ["Chase Bank Statement chase.com", "January 1, 2025 through January 31, 2025"],
+    "TD Bank": ["TD Bank Statement tdbank.com", "Statement Period: Jan 01 2025-Jan 31 2025"],
+    "Wells Fargo": ["Wells Fargo Everyday Checking wellsfargo.com", "January 1, 2025 - January 31, 2025"],
+}
+BANKS = list(HEADERS)
+
+# Share of generated transactions that are credits
+CREDIT_RATE = 0.1
+
+def format_amount(amount):
+    return f"{amount:,.2f}"
+
+def transaction_line(bank, rng, balance):
+    """One transaction line in the bank's format, and the running balance after it"""
+    is_credit = rng.random() < CREDIT_RATE
+    template = rng.choice(CREDIT_DESCRIPTIONS[bank] if is_credit else DEBIT_DESCRIPTIONS)
+    description = template.format(
+        number=rng.randint(100, 9999),
+        code=f"{rng.randint(1, 9)}{rng.choice('ABCDEFGHJK')}{rng.randint(100, 999)}",
+        name=rng.choice(NAMES)
+    )
+    amount = round(rng.uniform(1200, 3000) if is_credit else rng.lognormvariate(3.2, 1.0), 2)
+    balance += amount if is_credit else -amount
+    day = rng.randint(1, 31)
+
+    if bank == "Chase":
+        line = f"01/{day:02d} {description} {format_amount(amount)}"
+    elif bank == "TD Bank":
+        line = f"01/{day:02d}/2025 {description} ${format_amount(amount)}"
+    else:
+        line = f"1/{day} {description} {format_amount(amount)} {format_amount(balance)}"
+    return line, balance
+
+def generate_statement(bank, pages=4, transactions_per_page=40, seed=0):
+    """Return the statement as a list of pages, each a list of text lines"""
+    rng = random.Random(f"{bank}:{seed}")
+    balance = 5000.0
+    statement = []
+    for page_number in range(1, pages + 1):
+        lines = list(HEADERS[bank]) if page_number == 1 else []
+        lines.append(f"Page {page_number} of {pages}")
+        for _ in range(transactions_per_page):
+            line, balance = transaction_line(bank, rng, balance)
+            lines.append(line)
+        statement.append(lines)
+    return statement
+
+def statement_text(statement):
+    """Plain-text fixture of a generated statement, one line per transaction"""
+    return "\n".join("\n".join(lines) for lines in statement) + "\n"
+
+def escape_pdf_text(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+def build_pdf(statement):
+    """Render a generated statement as PDF bytes, one text line per transaction"""
+    objects = []
+
+    def add(body):
+        objects.append(body)
+        return len(objects)
+
+    font_id = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>")
+    # Object numbers are known up front: contents, then pages, then the page tree
+    pages_id = len(objects) + 2 * len(statement) + 1
+
+    content_ids = []
+    for lines in statement:
+        # Shrink the line spacing so long pages still fit on a letter-size page
+        leading = min(12, 720 / max(1, len(lines)))
+        stream = "".join(f"({escape_pdf_text(line)}) Tj T*\n" for line in lines)
+        stream = f"BT /F1 {min(9, leading * 0.8):.1f} Tf 36 756 Td {leading:.2f} TL\n{stream}ET".encode("latin-1")
+        content_ids.append(add(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream)))
+
+    page_ids = [
+        add(b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>" % (pages_id, font_id, content_id))
+        for content_id in content_ids
+    ]
+    add(b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(b"%d 0 R" % i for i in page_ids), len(page_ids)))
+    catalog_id = add(b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id)
+
+    pdf = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(pdf))
+        pdf += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+
+    xref_offset = len(pdf)
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    pdf += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    pdf += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, catalog_id, xref_offset)
+    return bytes(pdf)
+
+def write_fixtures(output_dir, pages=4, transactions_per_page=40, seed=0):
+    """Write a PDF and a raw-text fixture per bank, returning the written paths"""
+    os.makedirs(output_dir, exist_ok=True)
+    paths = []
+    for bank in BANKS:
+        statement = generate_statement(bank, pages, transactions_per_page, seed)
+        stem = os.path.join(output_dir, bank.lower().replace(" ", "_"))
+        with open(f"{stem}.pdf", "wb") as f:
+            f.write(build_pdf(statement))
+        with open(f"{stem}.txt", "w", encoding="utf-8") as f:
+            f.write(statement_text(statement))
+        paths.extend([f"{stem}.pdf", f"{stem}.txt"])
+    return paths
@@ -0,0 +1,23 @@
+"""
+Shared bank statement parsing library.
+
+Text extraction, categorization, summaries and JSON output live here once;
+individual banks are declared as plugins in banks/*.json.
+"""
+
+__version__ = "2.1.0"
+
+from .analytics import TransactionColumns, analyze, statement_analytics
+from .batch import iter_batch, parse_batch
+from .cache import CategoryCache
+from .categories import categorize_transaction, categorize_transactions, finance_categories, merchant_key, rules_version
+from .categorizer import KeywordCategorizer
+from .identification import identify_bank, identify_pdf, identify_text
+from .merchant import normalize_merchant
+from .metrics import StageMetrics
+from .parsing import parse_transactions
+from .period import extract_statement_period
+from .pipeline import process_text, process_statement, parse_statement, stream_statement
+from .recategorize import recategorize_merchants, rekey_descriptions
+from .registry import BankPlugin, get_plugin, get_default_plugin, list_plugins, plugins_version
+from .summary import build_summary, build_result
@@ -0,0 +1,45 @@
+"""
+Batch parsing: many statements in one call, spread across the process pool.
+
+Each statement is parsed whole inside one pool process (with serial page
+extraction, so pools are never nested). Failures are reported per
+statement instead of aborting the batch.
+"""
+
+import sys
+from concurrent.futures import as_completed
+
+from .extraction import EXTRACT_PROCESSES, get_executor
+from .metrics import StageMetrics
+from .pipeline import parse_statement
+
+def parse_one(pdf_source):
+    """Parse a single statement, returning {"ok": True, "result"} or {"ok": False, "error"} with its metrics"""
+    metrics = StageMetrics()
+    try:
+        result = parse_statement(pdf_source, processes=1, metrics=metrics)
+        return {"ok": True, "result": result, "metrics": metrics.as_dict()}
+    except Exception as e:
+        print(f"Failed to parse statement: {e}", file=sys.stderr)
+        return {"ok": False, "error": str(e), "metrics": metrics.as_dict()}
+
+def iter_batch(pdf_sources, processes=None):
+    """Yield (index, outcome) for each statement as soon as it has been parsed"""
+    processes = processes or EXTRACT_PROCESSES
+    if processes < 2 or len(pdf_sources) < 2:
+        for index, pdf_source in enumerate(pdf_sources):
+            yield index, parse_one(pdf_source)
+        return
+
+    print(f"Parsing {len(pdf_sources)} statements across {processes} processes", file=sys.stderr)
+    executor = get_executor(processes)
+    futures = {executor.submit(parse_one, pdf_source): index for index, pdf_source in enumerate(pdf_sources)}
+    for future in as_completed(futures):
+        yield futures[future], future.result()
+
+def parse_batch(pdf_sources, processes=None):
+    """Parse every statement, returning the outcomes in input order"""
+    outcomes = [None] * len(pdf_sources)
+    for index, outcome in iter_batch(pdf_sources, processes):
+        outcomes[index] = outcome
+    return outcomes
@@ -0,0 +1,76 @@
+"""
+Bounded LRU cache from normalized merchant to category.
+
+The cache can be persisted to disk between worker runs. Saved entries are
+tagged with the rules version of the category table and are discarded on
+load if the table has changed since.
+"""
+
+import os
+import sys
+import json
+from collections import OrderedDict
+
+class CategoryCache:
+    """Least-recently-used cache with hit/miss counters"""
+
+    def __init__(self, max_size=50000):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.unsaved = 0
+
+    def get(self, key):
+        category = self.entries.get(key)
+        if category is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return category
+
+    def put(self, key, category):
+        self.entries[key] = category
+        self.entries.move_to_end(key)
+        self.unsaved += 1
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+        self.unsaved = 0
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "size": len(self.entries)}
+
+    def load(self, path, rules_version):
+        """Load saved entries, ignoring files written for other category rules"""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                saved = json.load(f)
+        except FileNotFoundError:
+            return 0
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable category cache {path}: {e}", file=sys.stderr)
+            return 0
+
+        if saved.get("rulesVersion") != rules_version:
+            print("Category rules changed; discarding saved category cache", file=sys.stderr)
+            return 0
+
+        for key, category in saved.get("entries", [])[-self.max_size:]:
+            self.entries[key] = category
+        return len(self.entries)
+
+    def save(self, path, rules_version):
+        """Atomically write the cache, most recently used entries last"""
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        temp_path = f"{path}.{os.getpid()}.tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"rulesVersion": rules_version, "entries": list(self.entries.items())}, f)
+        os.replace(temp_path, path)
+        self.unsaved = 0
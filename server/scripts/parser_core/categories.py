@@ -0,0 +1,63 @@
+"""
+Transaction categorization shared by every bank parser.
+
+The keyword table lives in categories.json so that every bank uses the
+same rules; categories are checked in file order and the first match wins.
+Where the old per-bank tables disagreed the broader keyword was kept: the
+Chase and TD Bank "Zelle" replaced Wells Fargo's "Zelle to", so incoming
+Zelle credits are Financial Services & Banks for every bank, not Other.
+The table is compiled once per process into a KeywordCategorizer, and
+results are memoized per normalized merchant in a CategoryCache. A
+description's category is the category of its merchant key, so the key
+keeps every keyword normalization would otherwise cut up.
+"""
+
+import os
+import json
+import hashlib
+
+from .cache import CategoryCache
+from .categorizer import KeywordCategorizer
+from .merchant import keyword_guard, normalize_merchant
+
+CATEGORIES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "categories.json")
+DEFAULT_CATEGORY = "Other"
+
+def load_categories(path=CATEGORIES_PATH):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def compute_rules_version(categories):
+    """Fingerprint of the category table, used to invalidate cached results"""
+    canonical = json.dumps(list(categories.items()), separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:12]
+
+finance_categories = load_categories()
+rules_version = compute_rules_version(finance_categories)
+categorizer = KeywordCategorizer(finance_categories, DEFAULT_CATEGORY)
+merchant_guard = keyword_guard(keyword for keywords in finance_categories.values() for keyword in keywords)
+category_cache = CategoryCache(int(os.environ.get("PARSER_CATEGORY_CACHE_SIZE", 50000)))
+
+def merchant_key(description):
+    """Normalized merchant key of a description, with the table's digit-bearing keywords intact"""
+    return normalize_merchant(description, merchant_guard)
+
+def categorize_merchant(merchant):
+    """Categorize a normalized merchant key, consulting the cache first"""
+    category = category_cache.get(merchant)
+    if category is None:
+        category = categorizer.categorize(merchant)
+        category_cache.put(merchant, category)
+    return category
+
+def categorize_transaction(description):
+    """Categorize a transaction based on the description"""
+    return categorize_merchant(merchant_key(description))
+
+def categorize_merchants(merchants):
+    """Categorize a batch of normalized merchant keys in one call"""
+    return [categorize_merchant(merchant) for merchant in merchants]
+
+def categorize_transactions(descriptions):
+    """Categorize a batch of descriptions in one call"""
+    return categorize_merchants([merchant_key(description) for description in descriptions])
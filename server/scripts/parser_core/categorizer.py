@@ -0,0 +1,99 @@
+"""
+Compiled keyword categorizer.
+
+The keyword table is compiled once into an Aho-Corasick automaton over the
+lowercased keywords, so a description is categorized in a single pass over
+its characters instead of one substring scan per keyword. Every automaton
+state records the best (lowest) category index of the keywords ending
+there, which keeps the original semantics: the first category in table
+order with any keyword contained in the description wins.
+"""
+
+from collections import deque
+
+class KeywordCategorizer:
+    """Categorize descriptions against an ordered {category: [keywords]} table"""
+
+    def __init__(self, categories, default_category="Other"):
+        self.categories = list(categories)
+        self.default_category = default_category
+
+        # State 0 is the root; goto[state] maps a character to the next state
+        self.goto = [{}]
+        self.fail = [0]
+        self.output = [None]
+
+        for index, keywords in enumerate(categories.values()):
+            for keyword in keywords:
+                self._add_keyword(keyword.lower(), index)
+
+        self._build_failure_links()
+
+    def _add_keyword(self, keyword, index):
+        state = 0
+        for char in keyword:
+            next_state = self.goto[state].get(char)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append(None)
+                self.goto[state][char] = next_state
+            state = next_state
+        self._merge_output(state, index)
+
+    def _merge_output(self, state, index):
+        if index is not None and (self.output[state] is None or index < self.output[state]):
+            self.output[state] = index
+
+    def _build_failure_links(self):
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self.goto[state].items():
+                queue.append(next_state)
+
+                fallback = self.fail[state]
+                while fallback and char not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[next_state] = self.goto[fallback].get(char, 0)
+
+                # A state also matches every keyword that is a suffix of it
+                self._merge_output(next_state, self.output[self.fail[next_state]])
+
+    def match_index(self, description):
+        """Return the index of the winning category, or None if nothing matches"""
+        goto = self.goto
+        fail = self.fail
+        output = self.output
+
+        state = 0
+        best = output[0]
+        for char in description.lower():
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+
+            index = output[state]
+            if index is not None and (best is None or index < best):
+                best = index
+                if best == 0:
+                    break  # Nothing can beat the first category
+        return best
+
+    def categorize(self, description):
+        """Categorize a single transaction description"""
+        index = self.match_index(description)
+        return self.default_category if index is None else self.categories[index]
+
+    def categorize_many(self, descriptions):
+        """Categorize a list of descriptions, returning categories in the same order"""
+        match_index = self.match_index
+        categories = self.categories
+        default_category = self.default_category
+
+        results = []
+        for description in descriptions:
+            index = match_index(description)
+            results.append(default_category if index is None else categories[index])
+        return results
@@ -0,0 +1,99 @@
+"""
+Command-line entry points shared by the per-bank parser scripts.
+"""
+
+import sys
+import json
+import argparse
+
+from .analytics import DEFAULT_TOP_MERCHANTS, DEFAULT_WINDOWS, TransactionColumns, analyze, statement_analytics
+from .batch import parse_batch
+from .output import write_json, write_ndjson
+from .pipeline import process_statement, parse_statement, stream_statement
+from .registry import get_plugin
+
+def parse_arguments(description, allow_stream=False):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument("pdf_path", help="Path to the PDF file, or - to read the PDF from stdin")
+    parser.add_argument("--debug", action="store_true", help="Enable debug output")
+    if allow_stream:
+        parser.add_argument("--stream", action="store_true",
+                            help="Emit one NDJSON line per page followed by a summary line")
+        parser.add_argument("--analytics", action="store_true",
+                            help="Add category, monthly, rolling average and merchant analytics (requires numpy)")
+    return parser.parse_args()
+
+def read_pdf_source(pdf_path):
+    """The PDF bytes from stdin when the path is -, otherwise the path itself"""
+    if pdf_path == "-":
+        return sys.stdin.buffer.read()
+    return pdf_path
+
+def run_bank_parser(bank_name):
+    """Parse a statement with a specific bank's plugin and print the JSON result"""
+    args = parse_arguments(f"Parse {bank_name} bank statement")
+
+    try:
+        result = process_statement(read_pdf_source(args.pdf_path), get_plugin(bank_name))
+    except ValueError as e:
+        print(str(e), file=sys.stderr)
+        return 1
+
+    # Output JSON result to stdout for Node.js to capture
+    write_json(result)
+    return 0
+
+def run_statement_parser():
+    """Identify the bank, parse the statement and print the JSON result"""
+    args = parse_arguments("Identify and parse a bank statement in one pass", allow_stream=True)
+
+    try:
+        pdf_source = read_pdf_source(args.pdf_path)
+        if args.stream:
+            write_ndjson(stream_statement(pdf_source))
+            return 0
+        result = parse_statement(pdf_source)
+        if args.analytics:
+            result["analytics"] = statement_analytics(result)
+    except (ValueError, ImportError) as e:
+        print(str(e), file=sys.stderr)
+        return 1
+
+    write_json(result)
+    return 0
+
+def run_batch_parser():
+    """Parse several statements in parallel and print a JSON list of outcomes"""
+    parser = argparse.ArgumentParser(description="Identify and parse several bank statements in parallel")
+    parser.add_argument("pdf_paths", nargs="+", help="Paths to the PDF files")
+    parser.add_argument("--processes", type=int, help="Number of parser processes (default: CPU count)")
+    parser.add_argument("--debug", action="store_true", help="Enable debug output")
+    args = parser.parse_args()
+
+    outcomes = parse_batch(args.pdf_paths, args.processes)
+    write_json(outcomes)
+    return 0 if all(outcome["ok"] for outcome in outcomes) else 1
+
+def run_analytics():
+    """Summarize a file of columnar transactions (as sent by Node.js) and print the analytics as JSON"""
+    parser = argparse.ArgumentParser(description="Category, monthly, rolling average and merchant analytics")
+    parser.add_argument("columns_path", help="JSON file of transaction columns, or - to read it from stdin")
+    parser.add_argument("--top", type=int, default=DEFAULT_TOP_MERCHANTS,
+                        help=f"Number of top merchants (default: {DEFAULT_TOP_MERCHANTS})")
+    parser.add_argument("--windows", type=int, nargs="+", default=list(DEFAULT_WINDOWS),
+                        help="Rolling average windows in days (default: 7 30)")
+    args = parser.parse_args()
+
+    try:
+        if args.columns_path == "-":
+            columns = json.load(sys.stdin)
+        else:
+            with open(args.columns_path) as f:
+                columns = json.load(f)
+        result = analyze(TransactionColumns.from_columns(columns), args.top, args.windows)
+    except (OSError, KeyError, ValueError, ImportError) as e:
+        print(f"Could not analyze transactions: {e}", file=sys.stderr)
+        return 1
+
+    write_json(result)
+    return 0
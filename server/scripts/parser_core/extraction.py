@@ -0,0 +1,180 @@
+"""
+PDF text extraction.
+
+A PDF source is either a filesystem path or the raw bytes of the document
+(as received from Node.js over the worker's stdin), so statements never
+need to touch the disk.
+
+Long statements can be extracted in parallel: page ranges are sharded
+across a process pool and merged back in page order, producing exactly the
+same page texts as the serial path.
+
+Functions that take a metrics argument (a StageMetrics) record how long
+the PDF took to open and each page took to extract.
+"""
+
+import io
+import os
+import sys
+import time
+import atexit
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+from multiprocessing import shared_memory
+
+# Import pdfplumber for PDF text extraction. The rest of parser_core works
+# on plain text, so a missing pdfplumber only fails when a PDF is opened.
+try:
+    import pdfplumber
+except ImportError:
+    pdfplumber = None
+
+def require_pdfplumber():
+    if pdfplumber is None:
+        print("Required library not found. Please install with:", file=sys.stderr)
+        print("pip install pdfplumber", file=sys.stderr)
+        raise ImportError("pdfplumber is required to extract text from PDFs")
+
+class SharedPdfBytes:
+    """Picklable handle to PDF bytes placed in shared memory for pool processes"""
+
+    def __init__(self, name, size):
+        self.name = name
+        self.size = size
+
+    def read(self):
+        shm = shared_memory.SharedMemory(name=self.name)
+        try:
+            return bytes(shm.buf[:self.size])
+        finally:
+            # Only the process that created the segment unlinks it
+            shm.close()
+
+def open_pdf(source, metrics=None):
+    """Open a PDF from a path, raw bytes or a SharedPdfBytes handle"""
+    require_pdfplumber()
+    started = time.perf_counter()
+    if isinstance(source, SharedPdfBytes):
+        source = source.read()
+    if isinstance(source, (bytes, bytearray)):
+        pdf = pdfplumber.open(io.BytesIO(source))
+    else:
+        pdf = pdfplumber.open(source)
+    if metrics is not None:
+        metrics.add("open", time.perf_counter() - started)
+    return pdf
+
+def describe_source(source):
+    """Human-readable name for log messages"""
+    if isinstance(source, (bytes, bytearray)):
+        return f"<{len(source)} bytes>"
+    return str(source)
+
+def extract_pages(pdf_source, max_pages=None, metrics=None):
+    """Extract the text of every page (or the first max_pages), opening the PDF only once"""
+    require_pdfplumber()
+    try:
+        with open_pdf(pdf_source, metrics) as pdf:
+            pages = pdf.pages if max_pages is None else pdf.pages[:max_pages]
+            return [text for _, text in iter_open_pages(pages, metrics=metrics)]
+    except Exception as e:
+        print(f"Error extracting text from PDF: {e}", file=sys.stderr)
+        return []
+
+# Statements with fewer pages than this are always extracted serially
+PARALLEL_PAGE_THRESHOLD = int(os.environ.get("PARSER_PARALLEL_PAGE_THRESHOLD", 24))
+# Processes per extraction pool. The Node.js worker pool sets this to its
+# share of the CPUs (CPU count / PYTHON_POOL_SIZE), since every pooled
+# worker starts its own extraction pool.
+EXTRACT_PROCESSES = int(os.environ.get("PARSER_EXTRACT_PROCESSES", os.cpu_count() or 1))
+
+_executor = None
+
+def get_executor(processes):
+    """Process pool reused across statements for the life of this process"""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(max_workers=processes)
+        atexit.register(_executor.shutdown, wait=False, cancel_futures=True)
+    return _executor
+
+def iter_open_pages(pages, first_page_number=1, metrics=None):
+    for page_number, page in enumerate(pages, start=first_page_number):
+        started = time.perf_counter()
+        text = page.extract_text() or ""
+        page.close()
+        if metrics is not None:
+            metrics.add_page(time.perf_counter() - started)
+        yield page_number, text
+
+def iter_pages(pdf_source, metrics=None):
+    """Yield (page_number, text) one page at a time, releasing each page after use"""
+    with open_pdf(pdf_source, metrics) as pdf:
+        yield from iter_open_pages(pdf.pages, metrics=metrics)
+
+def extract_page_range(pdf_source, start, stop):
+    """Extract pages [start, stop) in a pool process"""
+    with open_pdf(pdf_source) as pdf:
+        return [text for _, text in iter_open_pages(pdf.pages[start:stop])]
+
+def iter_pages_parallel(pdf_source, processes=None, threshold=None, metrics=None):
+    """
+    Yield (page_number, text) in page order, extracting long statements in parallel.
+
+    Below the page threshold (or with a single process) this is iter_pages.
+    In parallel, a page's recorded extraction time is its share of the
+    time spent waiting for its chunk.
+    """
+    with open_pdf(pdf_source, metrics) as pdf:
+        yield from iter_open_pdf_pages(pdf, pdf_source, processes=processes, threshold=threshold, metrics=metrics)
+
+def iter_open_pdf_pages(pdf, pdf_source, extracted=(), processes=None, threshold=None, metrics=None):
+    """
+    iter_pages_parallel on a PDF the caller already opened from pdf_source.
+
+    extracted holds the texts of the leading pages the caller has already
+    extracted (e.g. during identification); they are yielded as they are
+    and only the remaining pages are extracted.
+    """
+    processes = processes or EXTRACT_PROCESSES
+    threshold = threshold or PARALLEL_PAGE_THRESHOLD
+
+    yield from enumerate(extracted, start=1)
+    first = len(extracted)
+    page_count = len(pdf.pages)
+    if page_count < threshold or processes < 2:
+        yield from iter_open_pages(pdf.pages[first:], first_page_number=first + 1, metrics=metrics)
+        return
+
+    # Several small chunks per process keeps the pool busy when pages vary in cost
+    chunk_size = max(1, -(-(page_count - first) // (processes * 4)))
+    starts = list(range(first, page_count, chunk_size))
+    stops = [min(start + chunk_size, page_count) for start in starts]
+    print(f"Extracting {page_count - first} pages in {len(starts)} chunks across {processes} processes", file=sys.stderr)
+
+    # In-memory PDFs are shared once instead of being pickled into every chunk
+    shm = None
+    if isinstance(pdf_source, (bytes, bytearray)):
+        shm = shared_memory.SharedMemory(create=True, size=max(1, len(pdf_source)))
+        shm.buf[:len(pdf_source)] = pdf_source
+        pdf_source = SharedPdfBytes(shm.name, len(pdf_source))
+
+    try:
+        # map() returns chunks in submission order, so pages are merged in order
+        chunks = get_executor(processes).map(extract_page_range, repeat(pdf_source), starts, stops)
+        for start in starts:
+            started = time.perf_counter()
+            texts = next(chunks)
+            if metrics is not None:
+                waited = time.perf_counter() - started
+                for _ in texts:
+                    metrics.add_page(waited / len(texts))
+            yield from enumerate(texts, start=start + 1)
+    finally:
+        if shm is not None:
+            shm.close()
+            shm.unlink()
+
+def extract_text_from_pdf(pdf_source):
+    """Extract text from PDF using pdfplumber"""
+    return "".join(extract_pages(pdf_source))
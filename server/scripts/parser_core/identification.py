@@ -0,0 +1,188 @@
+"""
+Bank identification.
+
+Every plugin's identification patterns are compiled into one alternation
+with a named group per pattern, so text is scanned once however many banks
+are registered. A bank scores one point per distinct pattern that matched;
+the highest score wins and ties go to plugin priority.
+
+identify_pdf() works in tiers, cheapest first, and stops at the first
+confident answer:
+
+  metadata       the PDF's Producer, Creator, Title, Author and Subject
+  contentStream  strings shown by page 1's content stream, read without
+                 any layout analysis
+  firstPage      page 1 extracted with pdfplumber
+  pages          the first IDENTIFY_PAGES pages extracted with pdfplumber
+
+Each result carries a confidence between 0 and 1.
+"""
+
+import re
+import sys
+
+from .extraction import iter_open_pages, open_pdf
+from .registry import list_plugins
+
+# pdfminer is installed with pdfplumber; only content stream scanning needs it
+try:
+    from pdfminer.pdftypes import resolve1
+except ImportError:
+    resolve1 = None
+
+# Number of leading pages used for bank identification
+IDENTIFY_PAGES = 3
+
+METADATA_FIELDS = ("Producer", "Creator", "Title", "Author", "Subject")
+
+# Confidence of a single unambiguous pattern match at each tier
+TIER_CONFIDENCE = {"metadata": 0.95, "contentStream": 0.85, "firstPage": 0.85, "pages": 0.7}
+# Each further distinct pattern of the same bank adds this much
+EXTRA_PATTERN_CONFIDENCE = 0.05
+# Tiers at or above this confidence end identification
+CONFIDENT = 0.8
+
+def compile_identifier(plugins):
+    """One case-insensitive alternation over every plugin's patterns, and the plugin owning each group"""
+    groups = []
+    owners = {}
+    for plugin in plugins:
+        for pattern in plugin.identify_patterns:
+            name = f"p{len(owners)}"
+            owners[name] = plugin
+            groups.append(f"(?P<{name}>{pattern})")
+    return re.compile("|".join(groups), re.IGNORECASE), owners
+
+IDENTIFY_PATTERN, PATTERN_OWNERS = compile_identifier(list_plugins())
+
+def score_banks(text):
+    """Number of distinct identification patterns matched per plugin"""
+    matched = {}
+    # Resume just after each match's start so overlapping names ("JPMorgan Chase Bank") all count
+    match = IDENTIFY_PATTERN.search(text)
+    while match:
+        matched.setdefault(PATTERN_OWNERS[match.lastgroup], set()).add(match.lastgroup)
+        match = IDENTIFY_PATTERN.search(text, match.start() + 1)
+    return {plugin: len(groups) for plugin, groups in matched.items()}
+
+def identify_text(text, tier="pages"):
+    """Identify the bank in a piece of text, returning {"bank", "confidence", "tier"}"""
+    scores = score_banks(text)
+    if not scores:
+        return {"bank": "Unknown", "confidence": 0.0, "tier": tier}
+
+    ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0].priority, item[0].name))
+    plugin, score = ranked[0]
+    # Other banks named in the same text (e.g. a transfer to another bank) dilute the confidence
+    share = score / sum(scores.values())
+    confidence = (TIER_CONFIDENCE[tier] + EXTRA_PATTERN_CONFIDENCE * (score - 1)) * share
+    return {"bank": plugin.name, "confidence": round(min(confidence, 0.99), 2), "tier": tier}
+
+def identify_bank(text):
+    """Identify the bank based on the plugins' patterns in the text"""
+    return identify_text(text)["bank"]
+
+def metadata_text(pdf):
+    metadata = pdf.metadata or {}
+    return "\n".join(str(metadata[field]) for field in METADATA_FIELDS if metadata.get(field))
+
+# Text-showing operators: a literal string before Tj, ' or ", or a TJ array
+LITERAL = rb"\((?:\\.|[^\\)])*\)"
+SHOW_TEXT = re.compile(rb"(" + LITERAL + rb")\s*(?:Tj|'|\")|\[((?:" + LITERAL + rb"|[^\]\\(])*)\]\s*TJ", re.DOTALL)
+TJ_PART = re.compile(LITERAL + rb"|-?\d+(?:\.\d+)?")
+ESCAPES = {b"n": b"\n", b"r": b"\r", b"t": b"\t", b"b": b"\b", b"f": b"\f"}
+ESCAPE = re.compile(rb"\\([0-7]{1,3}|.)", re.DOTALL)
+# A TJ adjustment at least this large (thousandths of an em) is a word gap
+TJ_SPACE = 200
+
+def unescape_literal(literal):
+    def replace(match):
+        escaped = match.group(1)
+        if escaped[:1].isdigit():
+            return bytes([int(escaped, 8) & 0xFF])
+        return ESCAPES.get(escaped, escaped)
+    return ESCAPE.sub(replace, literal[1:-1]).decode("latin-1")
+
+def content_stream_text(page):
+    """
+    Strings shown by a page's content stream, one operator per line.
+
+    No fonts are loaded and no layout is computed, so this costs little more
+    than decompressing the stream. Fonts with custom encodings come out as
+    gibberish, which simply fails to match.
+    """
+    contents = page.page_obj.contents or []
+    data = b"\n".join(resolve1(stream).get_data() for stream in contents)
+
+    lines = []
+    for match in SHOW_TEXT.finditer(data):
+        if match.group(1) is not None:
+            lines.append(unescape_literal(match.group(1)))
+            continue
+        parts = []
+        for part in TJ_PART.findall(match.group(2)):
+            if part.startswith(b"("):
+                parts.append(unescape_literal(part))
+            elif -float(part) >= TJ_SPACE:
+                parts.append(" ")
+        lines.append("".join(parts))
+    return "\n".join(lines)
+
+def scan_content_stream(page):
+    """content_stream_text, or nothing when the stream cannot be read"""
+    try:
+        return content_stream_text(page)
+    except Exception as e:
+        print(f"Could not scan the content stream, extracting text instead: {e}", file=sys.stderr)
+        return ""
+
+def tier_texts(pdf, texts, metrics=None):
+    """
+    Yield (tier, text) from the cheapest tier to the most expensive, computing each only when asked.
+
+    The text of every page extracted along the way is appended to texts, in
+    page order, so the caller can reuse it instead of extracting it again.
+    """
+    yield "metadata", metadata_text(pdf)
+    if not pdf.pages:
+        return
+    yield "contentStream", scan_content_stream(pdf.pages[0])
+
+    for _, text in iter_open_pages(pdf.pages[:1], metrics=metrics):
+        texts.append(text)
+    yield "firstPage", texts[0]
+    if len(pdf.pages) > 1:
+        for _, text in iter_open_pages(pdf.pages[1:IDENTIFY_PAGES], first_page_number=2, metrics=metrics):
+            texts.append(text)
+        yield "pages", "".join(texts)
+
+def identify_open_pdf(pdf, metrics=None):
+    """
+    Identify the bank of an open PDF using the cheapest tier that is confident.
+
+    Returns ({"bank", "confidence", "tier"}, texts) for the most confident
+    tier tried, where texts are the leading pages extracted on the way.
+    """
+    best = {"bank": "Unknown", "confidence": 0.0, "tier": None}
+    texts = []
+    text = ""
+    for tier, text in tier_texts(pdf, texts, metrics):
+        result = identify_text(text, tier)
+        if result["confidence"] > best["confidence"]:
+            best = result
+        if best["confidence"] >= CONFIDENT:
+            return best, texts
+
+    # Every tier was tried; no text at all means extraction failed rather than an unknown bank
+    if best["bank"] == "Unknown" and not text.strip():
+        raise ValueError("Failed to extract text from PDF")
+    return best, texts
+
+def identify_pdf(pdf_source, metrics=None):
+    """
+    Identify the bank of a PDF (a path or PDF bytes) using the cheapest tier that is confident.
+
+    Returns {"bank", "confidence", "tier"} for the most confident tier tried.
+    """
+    with open_pdf(pdf_source, metrics) as pdf:
+        return identify_open_pdf(pdf, metrics)[0]
@@ -0,0 +1,63 @@
+"""
+Merchant normalization.
+
+Strips the parts of a transaction description that change from one charge
+to the next (dates, card numbers, store numbers, reference codes) so that
+repeat charges from the same merchant share one key.
+
+Categories are looked up on the key, so category keywords that the rules
+would cut up ("24 Hour Fitness", "7-Eleven") are held out of the rules and
+kept whole.
+"""
+
+import re
+
+NORMALIZATION_RULES = [
+    # Dates such as 01/03 or 01/03/2025
+    (re.compile(r"\b\d{1,2}/\d{1,2}(?:/\d{2,4})?\b"), " "),
+    # Card numbers: "CARD 4821", "CARD #4821", "XXXX4821", "****4821"
+    (re.compile(r"\bCARD\s*#?\s*[X*\d]{4,}"), " CARD "),
+    (re.compile(r"[X*]{2,}\d{2,}\b"), " "),
+    # Reference, confirmation and trace codes
+    (re.compile(r"\b(?:REF|REFERENCE|CONF|CONFIRMATION|TRACE|TRN|TXN|ID)\b\s*(?:#|NO\.?|:)?\s*[A-Z0-9-]*\d[A-Z0-9-]*"), " "),
+    # Phone numbers
+    (re.compile(r"\b\d{3}[-.]\d{3}[-.]?\d{4}\b|\b\d{3}-\d{4}\b"), " "),
+    # Store numbers: "#1234", "STORE 1234", bare runs of three or more digits
+    (re.compile(r"#\s*\d+"), " "),
+    (re.compile(r"\b\d{3,}\b"), " "),
+    # Store numbers glued to a name: keep the name, drop the digits (WHOLE FOODS12345)
+    (re.compile(r"\b([A-Z]+)\d{2,}\b"), r"\1"),
+    # Order and terminal IDs mixing letters with at least two digits (AMZN Mktp US*2K3L45)
+    (re.compile(r"\b(?=(?:[A-Z]*\d){2})[A-Z0-9]{5,}\b"), " "),
+]
+WHITESPACE = re.compile(r"\s+")
+
+# Held keywords are swapped for private-use characters, which no rule matches
+HOLD_BASE = 0xE000
+HELD = re.compile("[\uE000-\uF8FF]")
+
+def guarded_keywords(keywords):
+    """The keywords the rules would cut up, upper-cased: those containing digits"""
+    return {keyword.upper() for keyword in keywords if any(c.isdigit() for c in keyword)}
+
+def keyword_guard(keywords):
+    """Pattern over the guarded keywords, longest first"""
+    guarded = sorted(guarded_keywords(keywords), key=len, reverse=True)
+    return re.compile("|".join(re.escape(keyword) for keyword in guarded)) if guarded else None
+
+def normalize_merchant(description, guard=None):
+    """Return a stable merchant key for a transaction description, keeping any guard matches whole"""
+    merchant = description.upper()
+    held = []
+    if guard is not None:
+        def hold(match):
+            held.append(match.group(0))
+            return chr(HOLD_BASE + len(held) - 1)
+        merchant = guard.sub(hold, merchant)
+
+    for pattern, replacement in NORMALIZATION_RULES:
+        merchant = pattern.sub(replacement, merchant)
+    if held:
+        merchant = HELD.sub(lambda match: held[ord(match.group(0)) - HOLD_BASE], merchant)
+    merchant = WHITESPACE.sub(" ", merchant).strip(" *-#:")
+    return merchant or description.strip().upper()
@@ -0,0 +1,64 @@
+"""
+Per-run stage timings and resource usage.
+
+The worker gives every request a StageMetrics and passes it down the
+pipeline; each stage adds the time it took (PDF open, page extraction,
+bank identification, regex matching, categorization, JSON serialization)
+along with page and transaction counts. The totals are returned to Node.js
+in the response's metrics field.
+"""
+
+import sys
+import time
+from contextlib import contextmanager
+
+# resource is not available on Windows
+try:
+    import resource
+except ImportError:
+    resource = None
+
+def peak_rss_kb():
+    """High-water resident set size of this process and its pool processes, in KiB"""
+    if resource is None:
+        return None
+    usage = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+                resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # macOS reports bytes, Linux kilobytes
+    return usage // 1024 if sys.platform == "darwin" else usage
+
+class StageMetrics:
+    """Seconds spent per stage and item counts for one run"""
+
+    def __init__(self):
+        self.seconds = {}
+        self.counts = {}
+        self.page_seconds = []
+
+    @contextmanager
+    def stage(self, name):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - started)
+
+    def add(self, name, seconds):
+        self.seconds[name] = self.seconds.get(name, 0.0) + seconds
+
+    def add_page(self, seconds):
+        """Record one page's extraction time"""
+        self.page_seconds.append(seconds)
+        self.add("extract", seconds)
+        self.count("pages")
+
+    def count(self, name, amount=1):
+        self.counts[name] = self.counts.get(name, 0) + amount
+
+    def as_dict(self):
+        return {
+            "stages": {name: round(seconds, 6) for name, seconds in self.seconds.items()},
+            "pageExtractSeconds": [round(seconds, 6) for seconds in self.page_seconds],
+            "counts": dict(self.counts),
+            "peakRssKb": peak_rss_kb()
+        }
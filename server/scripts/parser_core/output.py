@@ -0,0 +1,19 @@
+"""
+JSON output for Node.js.
+"""
+
+import sys
+import json
+
+def write_json(result, stream=None):
+    """Write the result as a single JSON document for Node.js to capture"""
+    stream = stream or sys.stdout
+    stream.write(json.dumps(result) + "\n")
+    stream.flush()
+
+def write_ndjson(events, stream=None):
+    """Write each event as its own JSON line as soon as it is produced"""
+    stream = stream or sys.stdout
+    for event in events:
+        stream.write(json.dumps(event) + "\n")
+        stream.flush()
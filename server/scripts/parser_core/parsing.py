@@ -0,0 +1,40 @@
+"""
+Transaction parsing driven by a bank plugin's rules.
+"""
+
+from .categories import categorize_merchants, merchant_key
+
+def parse_amount(amount_text):
+    return float(amount_text.replace("$", "").replace(",", ""))
+
+def match_transactions(text, plugin):
+    """Read transaction lines from statement text using the plugin's pattern, without categories"""
+    matched_transactions = []
+    for date, raw_description, amount_text in plugin.transaction_pattern.findall(text):
+        # Skip headers, balance summaries, payment confirmations, etc.
+        if plugin.should_skip(raw_description):
+            continue
+
+        description = raw_description.strip()
+        transaction_type, amount = plugin.transaction_type(description, parse_amount(amount_text))
+
+        matched_transactions.append({
+            "date": date,
+            "description": description,
+            "amount": amount,
+            "type": transaction_type
+        })
+    return matched_transactions
+
+def categorize_matched(transactions):
+    """Add merchant keys and categories to matched transactions, in place"""
+    # Categorize the whole statement in one batch, keyed by normalized merchant
+    merchants = [merchant_key(t["description"]) for t in transactions]
+    for transaction, merchant, category in zip(transactions, merchants, categorize_merchants(merchants)):
+        transaction["merchant"] = merchant
+        transaction["category"] = category
+    return transactions
+
+def parse_transactions(text, plugin):
+    """Parse and categorize transactions from statement text"""
+    return categorize_matched(match_transactions(text, plugin))
@@ -0,0 +1,62 @@
+"""
+Statement period detection.
+
+Most statements print their period near the top, e.g.
+"January 1, 2025 through January 31, 2025" (Chase),
+"Statement Period: Jan 01 2025-Jan 31 2025" (TD Bank) or
+"01/01/2025 - 01/31/2025". Transaction lines often omit the year, so the
+period is what Node.js uses to give each transaction a full date.
+"""
+
+import re
+from datetime import date
+
+MONTHS = {
+    "jan": 1, "feb": 2, "mar": 3, "apr": 4, "may": 5, "jun": 6,
+    "jul": 7, "aug": 8, "sep": 9, "oct": 10, "nov": 11, "dec": 12
+}
+
+# "January 1, 2025", "Jan 01 2025", "Sept. 3, 2025"
+NAMED_DATE = r"(?P<{0}month>[A-Za-z]{{3,9}})\.?\s+(?P<{0}day>\d{{1,2}}),?\s+(?P<{0}year>\d{{4}})"
+# "01/01/2025", "1/1/25"
+NUMERIC_DATE = r"(?P<{0}month>\d{{1,2}})/(?P<{0}day>\d{{1,2}})/(?P<{0}year>\d{{4}}|\d{{2}})"
+RANGE_SEPARATOR = r"\s*(?:-|–|to|through|thru)\s*"
+
+PERIOD_PATTERNS = [
+    re.compile(NAMED_DATE.format("start_") + RANGE_SEPARATOR + NAMED_DATE.format("end_"), re.IGNORECASE),
+    re.compile(NUMERIC_DATE.format("start_") + RANGE_SEPARATOR + NUMERIC_DATE.format("end_"), re.IGNORECASE)
+]
+
+def to_date(month, day, year):
+    """Build a date from matched text, or None if it is not a real date"""
+    if month.isdigit():
+        month_number = int(month)
+    else:
+        month_number = MONTHS.get(month[:3].lower())
+    if month_number is None:
+        return None
+
+    year_number = int(year)
+    if year_number < 100:
+        year_number += 2000
+
+    try:
+        return date(year_number, month_number, int(day))
+    except ValueError:
+        return None
+
+def extract_statement_period(text):
+    """
+    Find the statement period in the text.
+
+    Returns {"start": "YYYY-MM-DD", "end": "YYYY-MM-DD"} for the first
+    plausible range (start before end, at most about three months long),
+    or None when the statement does not print one.
+    """
+    for pattern in PERIOD_PATTERNS:
+        for match in pattern.finditer(text):
+            start = to_date(match.group("start_month"), match.group("start_day"), match.group("start_year"))
+            end = to_date(match.group("end_month"), match.group("end_day"), match.group("end_year"))
+            if start and end and 0 < (end - start).days <= 95:
+                return {"start": start.isoformat(), "end": end.isoformat()}
+    return None
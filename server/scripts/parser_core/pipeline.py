@@ -0,0 +1,167 @@
+"""
+End-to-end statement processing: extract, identify, parse and summarize.
+
+Statements are processed page by page. The bank is identified from the
+PDF's metadata and first pages, then the rest of the pages are extracted
+from the same open document and stream_statement() yields one event per page as soon as that page is
+parsed, followed by a summary event, so callers never need the whole
+document text or transaction list in memory.
+A statement can be given as a file path or as the PDF bytes themselves.
+parse_statement() collects the same events into a single result object.
+Each entry point takes an optional StageMetrics that records where the
+time went.
+"""
+
+import sys
+import time
+
+from .categories import category_cache
+from .extraction import describe_source, extract_pages, iter_open_pdf_pages, open_pdf
+from .identification import IDENTIFY_PAGES, identify_open_pdf
+from .metrics import StageMetrics
+from .parsing import categorize_matched, match_transactions
+from .period import extract_statement_period
+from .registry import get_plugin
+from .summary import SummaryBuilder, build_result
+
+def parse_text(text, plugin, metrics):
+    """Match and categorize the transactions in a piece of statement text"""
+    with metrics.stage("match"):
+        transactions = match_transactions(text, plugin)
+    with metrics.stage("categorize"):
+        categorize_matched(transactions)
+    metrics.count("transactions", len(transactions))
+    return transactions
+
+def process_text(pdf_text, plugin, metrics=None):
+    """Parse and summarize already-extracted statement text"""
+    metrics = metrics or StageMetrics()
+    print(f"Extracted text sample: {pdf_text[:500]}", file=sys.stderr)  # Show first 500 chars
+
+    # Parse and categorize transactions
+    cache_before = category_cache.stats()
+    transactions = parse_text(pdf_text, plugin, metrics)
+    print(f"Found {len(transactions)} transactions", file=sys.stderr)
+
+    if len(transactions) == 0:
+        print("WARNING: No transactions found. Check regex pattern.", file=sys.stderr)
+
+    result = build_result(transactions, plugin.name)
+    result["statementPeriod"] = extract_statement_period(pdf_text)
+    result["categorizationCache"] = cache_delta(cache_before)
+    return result
+
+def process_statement(pdf_source, plugin, metrics=None):
+    """Extract and parse a statement (a path or PDF bytes) with a known bank plugin"""
+    metrics = metrics or StageMetrics()
+    print(f"Processing {plugin.name} statement: {describe_source(pdf_source)}", file=sys.stderr)
+    pdf_text = "".join(extract_pages(pdf_source, metrics=metrics))
+
+    if not pdf_text.strip():
+        raise ValueError("Failed to extract text from PDF")
+
+    return process_text(pdf_text, plugin, metrics)
+
+def cache_delta(before):
+    """Category cache hits and misses since the given stats snapshot"""
+    after = category_cache.stats()
+    return {
+        "hits": after["hits"] - before["hits"],
+        "misses": after["misses"] - before["misses"],
+        "size": after["size"]
+    }
+
+def identify_source(pdf, metrics):
+    """
+    Identify the bank of an open PDF with the cheapest confident tier.
+
+    Returns (bank, plugin, texts), where texts are the leading pages the
+    tiers extracted, for extraction to carry on from.
+    """
+    extract_before = metrics.seconds.get("extract", 0.0)
+    started = time.perf_counter()
+    identified, texts = identify_open_pdf(pdf, metrics)
+    # Pages extracted along the way are recorded as extraction, not identification
+    extracted = metrics.seconds.get("extract", 0.0) - extract_before
+    metrics.add("identify", time.perf_counter() - started - extracted)
+    print(f"Identified bank: {identified['bank']} (confidence {identified['confidence']} from {identified['tier']})",
+          file=sys.stderr)
+    return identified["bank"], get_plugin(identified["bank"]), texts
+
+def stream_statement(pdf_source, processes=None, metrics=None):
+    """
+    Identify the bank and parse the statement one page at a time.
+
+    Yields {"type": "page", "page": n, "transactions": [...]} for every page
+    and finally {"type": "summary", ...} with the totals. The PDF is opened
+    once: identification and extraction share the handle, and pages the
+    identification tiers extracted are not extracted again. Every page is
+    parsed as soon as it is extracted; only the text of the first pages is
+    kept, to read the statement period from. processes=1 extracts serially.
+    """
+    print(f"Processing bank statement: {describe_source(pdf_source)}", file=sys.stderr)
+    metrics = metrics or StageMetrics()
+    with open_pdf(pdf_source, metrics) as pdf:
+        bank, plugin, extracted = identify_source(pdf, metrics)
+        pages = iter_open_pdf_pages(pdf, pdf_source, extracted, processes=processes, metrics=metrics)
+        yield from parse_pages(pages, bank, plugin, metrics)
+
+def parse_pages(pages, bank, plugin, metrics):
+    """Parse (page_number, text) pairs with a known plugin, yielding stream_statement's events"""
+    cache_before = category_cache.stats()
+    builder = SummaryBuilder()
+
+    # The statement period is printed on the leading pages
+    leading_text = []
+    has_text = False
+    page_count = 0
+
+    for page_number, text in pages:
+        page_count = page_number
+        if text.strip():
+            if not has_text:
+                print(f"Extracted text sample: {text[:500]}", file=sys.stderr)  # Show first 500 chars
+            has_text = True
+        if len(leading_text) < IDENTIFY_PAGES:
+            leading_text.append(text)
+
+        transactions = parse_text(text, plugin, metrics)
+        builder.add(transactions)
+        yield {"type": "page", "page": page_number, "transactions": transactions}
+
+    if not has_text:
+        raise ValueError("Failed to extract text from PDF")
+
+    print(f"Found {builder.total_transactions} transactions", file=sys.stderr)
+    if builder.total_transactions == 0:
+        print("WARNING: No transactions found. Check regex pattern.", file=sys.stderr)
+
+    yield {
+        "type": "summary",
+        "summary": builder.summary(),
+        "categoryBreakdown": builder.category_breakdown,
+        # Unknown statements are parsed by the default plugin but keep their label
+        "bankIdentifier": bank,
+        "statementPeriod": extract_statement_period("".join(leading_text)),
+        "pageCount": page_count,
+        "categorizationCache": cache_delta(cache_before)
+    }
+
+def parse_statement(pdf_source, processes=None, metrics=None):
+    """Identify the bank and parse the statement, returning a single result object"""
+    transactions = []
+    for event in stream_statement(pdf_source, processes, metrics):
+        if event["type"] == "page":
+            transactions.extend(event["transactions"])
+        else:
+            final = event
+
+    return {
+        "transactions": transactions,
+        "summary": final["summary"],
+        "categoryBreakdown": final["categoryBreakdown"],
+        "bankIdentifier": final["bankIdentifier"],
+        "statementPeriod": final["statementPeriod"],
+        "pageCount": final["pageCount"],
+        "categorizationCache": final["categorizationCache"]
+    }
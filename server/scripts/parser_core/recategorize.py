@@ -0,0 +1,97 @@
+"""
+Recategorization of stored transactions after a rules change.
+
+A transaction's category depends only on its normalized merchant key and
+the keyword table, so when categories.json changes only merchants that
+contain a changed keyword can end up in a different category. A keyword
+has changed when it was added, removed, moved to another category, or its
+category moved relative to another category (first match wins).
+
+The changed keywords are compiled into one automaton and every stored
+merchant key is scanned once; only the merchants that contain one are
+recategorized. No PDF is read again.
+
+Merchant keys themselves keep the table's digit-bearing keywords whole, so
+adding or removing one of those changes the key of every description that
+contains it. Those keywords are reported so the stored descriptions that
+hold them can be given new keys.
+"""
+
+from .categories import categorize_merchant, categorize_transaction, merchant_key
+from .categorizer import KeywordCategorizer
+from .merchant import guarded_keywords
+
+def keyword_categories(categories):
+    """The category each keyword selects: its first category in table order"""
+    owners = {}
+    for category, keywords in categories.items():
+        for keyword in keywords:
+            owners.setdefault(keyword.lower(), category)
+    return owners
+
+def reordered_categories(previous, current):
+    """Categories in both tables whose position among the shared categories changed"""
+    shared = [category for category in previous if category in current]
+    current_order = [category for category in current if category in previous]
+    return {before for before, after in zip(shared, current_order) if before != after}
+
+def changed_keywords(previous, current):
+    """Keywords whose match can select a different category under the current table"""
+    before = keyword_categories(previous)
+    after = keyword_categories(current)
+    changed = {keyword for keyword in before.keys() | after.keys() if before.get(keyword) != after.get(keyword)}
+
+    moved = reordered_categories(previous, current)
+    changed.update(keyword for keyword, category in after.items() if category in moved)
+    changed.update(keyword for keyword, category in before.items() if category in moved)
+    return changed
+
+def table_keywords(categories):
+    return [keyword for keywords in categories.values() for keyword in keywords]
+
+def rekey_keywords(previous, current):
+    """
+    Guarded keywords added or removed since the previous table.
+
+    Without a previous table every guarded keyword is reported, since the
+    stored keys may predate them.
+    """
+    after = guarded_keywords(table_keywords(current))
+    if previous is None:
+        return sorted(after)
+    return sorted(guarded_keywords(table_keywords(previous)) ^ after)
+
+def rekey_descriptions(descriptions):
+    """Current merchant key and category of each stored description"""
+    return {description: {"merchant": merchant_key(description), "category": categorize_transaction(description)}
+            for description in descriptions}
+
+def affected_merchants(merchants, previous, current):
+    """
+    The merchant keys whose category may differ between two tables.
+
+    Without a previous table every merchant is affected.
+    """
+    if previous is None:
+        return list(merchants)
+
+    changed = changed_keywords(previous, current)
+    if not changed:
+        return []
+    matcher = KeywordCategorizer({"changed": sorted(changed)})
+    return [merchant for merchant in merchants if matcher.match_index(merchant) is not None]
+
+def recategorize_merchants(merchants, previous, current):
+    """
+    Current categories for the merchants a rules change can affect.
+
+    Returns {"changedKeywords", "checked", "categories": {merchant: category},
+    "rekeyKeywords"}.
+    """
+    affected = affected_merchants(merchants, previous, current)
+    return {
+        "changedKeywords": None if previous is None else len(changed_keywords(previous, current)),
+        "checked": len(merchants),
+        "categories": {merchant: categorize_merchant(merchant) for merchant in affected},
+        "rekeyKeywords": rekey_keywords(previous, current)
+    }
@@ -0,0 +1,83 @@
+"""
+Bank plugin registry.
+
+Each bank is a small JSON plugin in banks/ that only declares how to
+recognise its statements and how to read its transaction lines. Skip and
+credit terms match case-insensitively. The same files drive
+getParserForBank on the Node.js side.
+"""
+
+import os
+import re
+import json
+import glob
+import hashlib
+
+BANKS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "banks")
+
+class BankPlugin:
+    """Declarative parsing rules for one bank"""
+
+    def __init__(self, config):
+        self.name = config["name"]
+        self.script = config.get("script")
+        self.priority = config.get("priority", 100)
+        self.is_default = config.get("default", False)
+        self.identify_patterns = config.get("identify", [])
+        self.transaction_pattern = re.compile(config["transactionPattern"], re.MULTILINE)
+        self.skip_terms = [term.upper() for term in config.get("skipTerms", [])]
+        self.credit_terms = [term.upper() for term in config.get("creditTerms", [])]
+        self.negative_is_credit = config.get("negativeIsCredit", False)
+
+    def should_skip(self, raw_description):
+        """Headers, balance lines and payment confirmations are not transactions"""
+        upper = raw_description.upper()
+        return any(term in upper for term in self.skip_terms)
+
+    def transaction_type(self, description, amount):
+        """Return ("credit" | "debit", absolute amount) for a parsed line"""
+        if self.negative_is_credit and amount < 0:
+            return "credit", abs(amount)
+        upper = description.upper()
+        if any(term in upper for term in self.credit_terms):
+            return "credit", amount
+        return "debit", amount
+
+    def __repr__(self):
+        return f"BankPlugin({self.name!r})"
+
+def load_plugins(banks_dir=BANKS_DIR):
+    """Load every plugin in banks_dir, ordered by identification priority"""
+    plugins = []
+    for plugin_path in glob.glob(os.path.join(banks_dir, "*.json")):
+        with open(plugin_path, "r", encoding="utf-8") as f:
+            plugins.append(BankPlugin(json.load(f)))
+    plugins.sort(key=lambda plugin: (plugin.priority, plugin.name))
+    return plugins
+
+def compute_plugins_version(banks_dir=BANKS_DIR):
+    """Fingerprint of the plugin definitions, used to invalidate cached results"""
+    digest = hashlib.sha256()
+    for plugin_path in sorted(glob.glob(os.path.join(banks_dir, "*.json"))):
+        with open(plugin_path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+PLUGINS = load_plugins()
+plugins_version = compute_plugins_version()
+
+def list_plugins():
+    return list(PLUGINS)
+
+def get_plugin(bank_name):
+    """Return the plugin for a bank, falling back to the default plugin"""
+    for plugin in PLUGINS:
+        if plugin.name == bank_name:
+            return plugin
+    return get_default_plugin()
+
+def get_default_plugin():
+    for plugin in PLUGINS:
+        if plugin.is_default:
+            return plugin
+    return PLUGINS[0]
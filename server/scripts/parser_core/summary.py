@@ -0,0 +1,50 @@
+"""
+Statement summary and category breakdown.
+"""
+
+class SummaryBuilder:
+    """Accumulate totals and the debit category breakdown page by page"""
+
+    def __init__(self):
+        self.total_transactions = 0
+        self.total_debits = 0
+        self.total_credits = 0
+        self.category_breakdown = {}
+
+    def add(self, transactions):
+        for t in transactions:
+            self.total_transactions += 1
+            if t["type"] == "credit":
+                self.total_credits += t["amount"]
+            elif t["type"] == "debit":
+                self.total_debits += t["amount"]
+
+                # Create category breakdown for debits (expenses)
+                category = t["category"]
+                if category not in self.category_breakdown:
+                    self.category_breakdown[category] = 0
+                self.category_breakdown[category] += t["amount"]
+
+    def summary(self):
+        return {
+            "totalTransactions": self.total_transactions,
+            "totalDebits": self.total_debits,
+            "totalCredits": self.total_credits,
+            "netChange": self.total_credits - self.total_debits
+        }
+
+def build_summary(transactions):
+    """Return the summary block and the debit category breakdown"""
+    builder = SummaryBuilder()
+    builder.add(transactions)
+    return builder.summary(), builder.category_breakdown
+
+def build_result(transactions, bank_name):
+    """Create the result object returned to Node.js"""
+    summary, category_breakdown = build_summary(transactions)
+    return {
+        "transactions": transactions,
+        "summary": summary,
+        "categoryBreakdown": category_breakdown,
+        "bankIdentifier": bank_name
+    }
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+"""
+Parser Worker
+Long-lived process that imports the parser library once and serves jobs from
+Node.js over a newline-delimited JSON protocol on stdin/stdout.
+
+Request:  {"id": 1, "op": "parse_statement", "pdfPath": "...", "stream": true}
+          {"id": 1, "op": "parse_statement", "inputSize": 48213}  followed by 48213 raw PDF bytes
+          {"id": 2, "op": "analyze", "inputSize": 5120}  followed by the transactions as columnar JSON
+          {"id": 3, "op": "recategorize", "inputSize": 2048}  followed by {"merchants", "previousCategories"} as JSON
+          {"id": 4, "op": "merchant_keys", "inputSize": 512}  followed by {"descriptions"} as JSON
+Events:   {"id": 1, "event": "page", "data": {...}}     (zero or more, streaming jobs only)
+Response: {"id": 1, "ok": true, "result": {...}, "metrics": {...}}
+          {"id": 1, "ok": false, "error": "...", "metrics": {...}}
+
+metrics holds the seconds spent per stage (open, extract, identify, match,
+categorize, analyze, serialize), per-page extraction times, page and
+transaction counts and the worker's peak RSS. The ready event reports how
+long the parser library took to import.
+"""
+
+import time
+
+STARTED = time.perf_counter()
+
+import sys
+import os
+import json
+import traceback
+
+SCRIPTS_DIR = os.path.dirname(os.path.abspath(__file__))
+UTILS_DIR = os.path.join(SCRIPTS_DIR, "..", "utils")
+sys.path.insert(0, SCRIPTS_DIR)
+sys.path.insert(0, UTILS_DIR)
+
+# Keep a handle on the real stdout for the protocol; anything the parsers
+# print goes to stderr so it can never corrupt a response line.
+protocol_out = sys.stdout
+sys.stdout = sys.stderr
+
+# Import the parser library, its bank plugins and pdfplumber once, up front
+import parser_core
+import bank_identifier
+from parser_core.categories import category_cache
+from parser_core.extraction import require_pdfplumber
+from parser_core.metrics import StageMetrics
+
+require_pdfplumber()
+IMPORT_SECONDS = time.perf_counter() - STARTED
+
+# Optional on-disk copy of the merchant category cache, shared across worker runs
+CATEGORY_CACHE_PATH = os.environ.get("PARSER_CATEGORY_CACHE_PATH")
+CATEGORY_CACHE_SAVE_EVERY = 500
+
+def load_category_cache():
+    if CATEGORY_CACHE_PATH:
+        loaded = category_cache.load(CATEGORY_CACHE_PATH, parser_core.rules_version)
+        print(f"Loaded {loaded} cached merchant categories", file=sys.stderr)
+
+def save_category_cache(force=False):
+    if not CATEGORY_CACHE_PATH or not category_cache.unsaved:
+        return
+    if force or category_cache.unsaved >= CATEGORY_CACHE_SAVE_EVERY:
+        try:
+            category_cache.save(CATEGORY_CACHE_PATH, parser_core.rules_version)
+        except OSError as e:
+            print(f"Could not save category cache: {e}", file=sys.stderr)
+
+def pdf_source(request):
+    """The PDF sent inline with the request, or else the path it names"""
+    if "input" in request:
+        return request["input"]
+    return request["pdfPath"]
+
+def handle_identify(request, emit, metrics):
+    with metrics.stage("identify"):
+        return bank_identifier.identify_bank_from_pdf(pdf_source(request))
+
+def handle_parse(request, emit, metrics):
+    plugin = parser_core.get_plugin(request["bank"])
+    return parser_core.process_statement(pdf_source(request), plugin, metrics)
+
+def handle_parse_statement(request, emit, metrics):
+    if not request.get("stream"):
+        result = parser_core.parse_statement(pdf_source(request), metrics=metrics)
+        if request.get("analytics"):
+            with metrics.stage("analyze"):
+                result["analytics"] = parser_core.statement_analytics(result)
+        return result
+
+    # Send each page's transactions as soon as it is parsed; the summary is the result
+    for event in parser_core.stream_statement(pdf_source(request), metrics=metrics):
+        if event["type"] != "page":
+            return event
+        emit(event)
+
+def handle_analyze(request, emit, metrics):
+    """Analytics over transactions sent as columns: {"date", "amountCents", "category", "merchant", "type"}"""
+    columns = json.loads(request["input"]) if "input" in request else request["columns"]
+    with metrics.stage("analyze"):
+        return parser_core.analyze(
+            parser_core.TransactionColumns.from_columns(columns),
+            top=request.get("top", parser_core.analytics.DEFAULT_TOP_MERCHANTS),
+            windows=request.get("windows", parser_core.analytics.DEFAULT_WINDOWS)
+        )
+
+def handle_recategorize(request, emit, metrics):
+    """Current categories for the stored merchant keys a rules change can affect"""
+    data = json.loads(request["input"]) if "input" in request else request
+    with metrics.stage("categorize"):
+        result = parser_core.recategorize_merchants(
+            data["merchants"], data.get("previousCategories"), parser_core.finance_categories
+        )
+    return {
+        "rulesVersion": parser_core.rules_version,
+        "rules": parser_core.finance_categories,
+        **result
+    }
+
+def handle_merchant_keys(request, emit, metrics):
+    """Current merchant keys and categories for stored descriptions"""
+    data = json.loads(request["input"]) if "input" in request else request
+    with metrics.stage("categorize"):
+        return parser_core.rekey_descriptions(data["descriptions"])
+
+def handle_banks(request, emit, metrics):
+    return [{"name": plugin.name, "script": plugin.script} for plugin in parser_core.list_plugins()]
+
+def handle_info(request, emit, metrics):
+    return {
+        "version": parser_core.__version__,
+        "rulesVersion": parser_core.rules_version,
+        "pluginsVersion": parser_core.plugins_version
+    }
+
+def handle_ping(request, emit, metrics):
+    return "pong"
+
+HANDLERS = {
+    "identify": handle_identify,
+    "parse": handle_parse,
+    "parse_statement": handle_parse_statement,
+    "analyze": handle_analyze,
+    "recategorize": handle_recategorize,
+    "merchant_keys": handle_merchant_keys,
+    "banks": handle_banks,
+    "info": handle_info,
+    "ping": handle_ping
+}
+
+def read_input(stdin, size):
+    """Read exactly size bytes of request input following the header line"""
+    data = stdin.read(size)
+    if len(data) != size:
+        raise EOFError(f"Expected {size} bytes of input, got {len(data)}")
+    return data
+
+def send(message, metrics=None):
+    started = time.perf_counter()
+    line = json.dumps(message)
+    if metrics is not None:
+        metrics.add("serialize", time.perf_counter() - started)
+    protocol_out.write(line + "\n")
+    protocol_out.flush()
+
+def send_result(request_id, result, metrics):
+    """Send a successful response; the result is encoded first so its serialization is timed too"""
+    started = time.perf_counter()
+    result_json = json.dumps(result)
+    metrics.add("serialize", time.perf_counter() - started)
+    protocol_out.write(
+        f'{{"id": {json.dumps(request_id)}, "ok": true, "result": {result_json}, '
+        f'"metrics": {json.dumps(metrics.as_dict())}}}\n'
+    )
+    protocol_out.flush()
+
+def main():
+    load_category_cache()
+    send({
+        "event": "ready",
+        "pid": os.getpid(),
+        "version": parser_core.__version__,
+        "importSeconds": round(IMPORT_SECONDS, 6)
+    })
+
+    # Binary stdin: a request header line may be followed by raw PDF bytes
+    stdin = sys.stdin.buffer
+    for line in iter(stdin.readline, b""):
+        line = line.strip()
+        if not line:
+            continue
+
+        request_id = None
+        metrics = StageMetrics()
+        try:
+            request = json.loads(line)
+            request_id = request.get("id")
+            if request.get("inputSize") is not None:
+                request["input"] = read_input(stdin, request["inputSize"])
+            handler = HANDLERS.get(request.get("op"))
+            if handler is None:
+                raise ValueError(f"Unknown operation: {request.get('op')}")
+            emit = lambda event: send({"id": request_id, "event": event["type"], "data": event}, metrics)
+            send_result(request_id, handler(request, emit, metrics), metrics)
+        except Exception as e:
+            traceback.print_exc(file=sys.stderr)
+            send({"id": request_id, "ok": False, "error": str(e), "metrics": metrics.as_dict()})
+
+        save_category_cache()
+
+    # stdin closed: the pool is recycling or shutting down this worker
+    save_category_cache(force=True)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,14 @@
+#!/usr/bin/env python3
+"""
+Statement Parser
+Single-pass entry point: opens the PDF once, identifies the bank from the
+first pages of the extracted text and hands the same text to that bank's
+plugin, returning transaction data as JSON.
+"""
+
+import sys
+
+from parser_core.cli import run_statement_parser
+
+if __name__ == "__main__":
+    sys.exit(run_statement_parser())
@@ -0,0 +1,50 @@
+"""
+Merchant keys must keep the keywords their category comes from.
+
+Run from server/scripts with: python -m unittest discover tests
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from parser_core.categories import DEFAULT_CATEGORY, categorize_transaction, categorizer, finance_categories, merchant_key
+
+class MerchantKeyTests(unittest.TestCase):
+    def test_store_number_rule_keeps_digit_keywords(self):
+        self.assertEqual(merchant_key("CHECKCARD # 24 Hour Fitness"), "CHECKCARD # 24 HOUR FITNESS")
+        self.assertEqual(merchant_key("#7ELEVEN 1234"), "7ELEVEN")
+        self.assertEqual(categorize_transaction("CHECKCARD # 24 Hour Fitness"), "Health & Fitness")
+        self.assertEqual(categorize_transaction("#7Eleven 1234"), "Convenience")
+
+    def test_store_numbers_are_still_stripped(self):
+        self.assertEqual(merchant_key("SHELL OIL 7484"), "SHELL OIL")
+        self.assertEqual(merchant_key("7-ELEVEN 34567 01/05"), "7-ELEVEN")
+
+    def test_store_numbers_glued_to_a_name_keep_the_name(self):
+        self.assertEqual(merchant_key("WHOLE FOODS12345"), "WHOLE FOODS")
+        self.assertEqual(merchant_key("AMZN Mktp US*2K3L45"), "AMZN MKTP US")
+
+    def test_every_keyword_categorizes_like_the_raw_description(self):
+        forms = (
+            "{keyword}12345",
+            "POS #{keyword} 1234",
+            "PURCHASE # {keyword} #55 01/05",
+            "PURCHASE {keyword} 01/05 CARD 4821",
+            "CHECKCARD 0105 {keyword} REF 8A7B6C",
+            "{keyword}12"
+        )
+        for category, keywords in finance_categories.items():
+            for keyword in keywords:
+                for form in forms:
+                    description = form.format(keyword=keyword)
+                    with self.subTest(description=description):
+                        expected = categorizer.categorize(description)
+                        if category != DEFAULT_CATEGORY:
+                            self.assertNotEqual(expected, DEFAULT_CATEGORY)
+                        self.assertEqual(categorize_transaction(description), expected)
+
+if __name__ == "__main__":
+    unittest.main()
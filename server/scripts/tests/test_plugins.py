@@ -0,0 +1,37 @@
+"""
+Bank plugin credit rules and the shared keyword table.
+
+Run from server/scripts with: python -m unittest discover tests
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from parser_core.categories import categorize_transaction
+from parser_core.registry import get_plugin, list_plugins
+
+class CreditTermTests(unittest.TestCase):
+    def test_credit_terms_match_any_case(self):
+        for plugin in list_plugins():
+            for term in plugin.credit_terms:
+                for description in (f"{term} ACME CORP", f"{term.lower()} acme corp", f"{term.title()} Acme Corp"):
+                    with self.subTest(bank=plugin.name, description=description):
+                        self.assertEqual(plugin.transaction_type(description, 12.5), ("credit", 12.5))
+
+    def test_wells_fargo_direct_dep_is_a_credit(self):
+        wells_fargo = get_plugin("Wells Fargo")
+        self.assertEqual(wells_fargo.transaction_type("Direct Dep Acme Corp", 1500.0), ("credit", 1500.0))
+        self.assertEqual(wells_fargo.transaction_type("ZELLE FROM JANE DOE", 40.0), ("credit", 40.0))
+        self.assertEqual(wells_fargo.transaction_type("ZELLE TO JANE DOE", 40.0), ("debit", 40.0))
+
+class ZelleCategoryTests(unittest.TestCase):
+    def test_zelle_is_financial_services_in_both_directions(self):
+        for description in ("ZELLE TO JANE DOE", "ZELLE FROM JANE DOE", "Zelle payment to Jane Doe"):
+            with self.subTest(description=description):
+                self.assertEqual(categorize_transaction(description), "Financial Services & Banks")
+
+if __name__ == "__main__":
+    unittest.main()
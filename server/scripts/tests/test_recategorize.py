@@ -0,0 +1,37 @@
+"""
+Recategorization after a keyword table change.
+
+Run from server/scripts with: python -m unittest discover tests
+"""
+
+import copy
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from parser_core.categories import finance_categories
+from parser_core.merchant import keyword_guard, normalize_merchant
+from parser_core.recategorize import recategorize_merchants, rekey_keywords
+
+class RekeyTests(unittest.TestCase):
+    def test_adding_a_digit_keyword_reports_it_for_rekeying(self):
+        current = copy.deepcopy(finance_categories)
+        current["Other"] = current["Other"] + ["1-800-Flowers"]
+        self.assertEqual(rekey_keywords(finance_categories, current), ["1-800-FLOWERS"])
+        self.assertEqual(rekey_keywords(current, finance_categories), ["1-800-FLOWERS"])
+        self.assertEqual(rekey_keywords(finance_categories, finance_categories), [])
+
+        # The key stored under the old table does not contain the keyword, so only a rekey applies it
+        stored = normalize_merchant("1-800-FLOWERS.COM NY", keyword_guard(sum(finance_categories.values(), [])))
+        result = recategorize_merchants([stored], finance_categories, current)
+        self.assertEqual(result["categories"], {})
+        self.assertEqual(result["rekeyKeywords"], ["1-800-FLOWERS"])
+        self.assertIn("1-800-FLOWERS", normalize_merchant("1-800-FLOWERS.COM NY", keyword_guard(sum(current.values(), []))))
+
+    def test_first_run_rekeys_every_digit_keyword(self):
+        self.assertIn("24 HOUR FITNESS", rekey_keywords(None, finance_categories))
+
+if __name__ == "__main__":
+    unittest.main()
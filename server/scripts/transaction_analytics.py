@@ -0,0 +1,15 @@
+#!/usr/bin/env python3
+"""
+Transaction Analytics
+Batch entry point for cross-statement analytics: reads a user's transactions
+as columnar JSON ({"date", "amountCents", "category", "merchant", "type"})
+and prints category breakdowns, month-over-month changes, rolling averages
+and top merchants as JSON.
+"""
+
+import sys
+
+from parser_core.cli import run_analytics
+
+if __name__ == "__main__":
+    sys.exit(run_analytics())
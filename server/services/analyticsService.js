@@ -0,0 +1,291 @@
+// services/analyticsService.js
+const mongoose = require('mongoose');
+const BankStatement = require('../models/BankStatement');
+const MonthlyRollup = require('../models/MonthlyRollup');
+const { rollupMonth } = require('./rollupService');
+const { loadTransactionColumns } = require('./transactionService');
+const { analyzeTransactions } = require('../utils/pythonExecutor');
+
+// Unwound transaction fields
+const EXPENSE = '$mlResults.expenses';
+
+/**
+ * Build the $match stage selecting a user's processed statements
+ *
+ * Aggregation pipelines bypass Mongoose casting, so ids and dates are
+ * converted here.
+ *
+ * @param {string} userId - User ID
+ * @param {Object} [filters]
+ * @param {string} [filters.bankName] - Only statements from this bank
+ * @param {string} [filters.from] - Only statements closing on or after this date
+ * @param {string} [filters.to] - Only statements closing on or before this date
+ * @param {string[]} [filters.statementIds] - Only these statements
+ * @returns {Object}
+ */
+function statementMatch(userId, filters = {}) {
+    const match = {
+        userId: new mongoose.Types.ObjectId(userId),
+        isProcessed: true
+    };
+
+    if (filters.bankName) {
+        match.bankName = filters.bankName;
+    }
+    if (filters.from || filters.to) {
+        const range = {};
+        if (filters.from) {
+            range.$gte = new Date(filters.from);
+        }
+        if (filters.to) {
+            range.$lte = new Date(filters.to);
+        }
+        // A statement belongs to the period it covers; the upload date only
+        // stands in when no period was found
+        match.$or = [
+            { 'statementPeriod.end': range },
+            { 'statementPeriod.end': null, uploadDate: range }
+        ];
+    }
+    if (filters.statementIds) {
+        match._id = { $in: filters.statementIds.map(id => new mongoose.Types.ObjectId(id)) };
+    }
+
+    return match;
+}
+
+/**
+ * Build the $match stage over a user's monthly rollups
+ *
+ * Rollups are per month, so from/to select whole months.
+ *
+ * @param {string} userId - User ID
+ * @param {Object} [filters]
+ * @param {string} [filters.bankName] - Only this bank
+ * @param {string} [filters.from] - Only months from this date's month onwards
+ * @param {string} [filters.to] - Only months up to this date's month
+ * @param {string} [filters.category] - Only this category
+ * @returns {Object}
+ */
+function rollupMatch(userId, filters = {}) {
+    const match = { userId: new mongoose.Types.ObjectId(userId) };
+
+    if (filters.bankName) {
+        match.bankName = filters.bankName;
+    }
+    if (filters.category) {
+        match.category = filters.category;
+    }
+    if (filters.from || filters.to) {
+        match.month = {};
+        if (filters.from) {
+            match.month.$gte = rollupMonth(filters.from);
+        }
+        if (filters.to) {
+            match.month.$lte = rollupMonth(filters.to);
+        }
+    }
+
+    return match;
+}
+
+/**
+ * Total debit spending per category across a user's statements
+ *
+ * Read from the monthly rollups, so the cost grows with the number of
+ * months rather than the number of transactions.
+ *
+ * @param {string} userId - User ID
+ * @param {Object} [filters] - See rollupMatch
+ * @returns {Promise<{categories: Array<{category: string, total: number, count: number}>, total: number}>}
+ */
+async function getCategoryTotals(userId, filters = {}) {
+    const categories = await MonthlyRollup.aggregate([
+        { $match: { ...rollupMatch(userId, filters), type: 'debit' } },
+        {
+            $group: {
+                _id: '$category',
+                total: { $sum: '$sum' },
+                count: { $sum: '$count' },
+                min: { $min: '$min' },
+                max: { $max: '$max' }
+            }
+        },
+        { $sort: { total: -1 } },
+        { $project: { _id: 0, category: '$_id', total: 1, count: 1, min: 1, max: 1 } }
+    ]);
+
+    return {
+        categories,
+        total: categories.reduce((sum, row) => sum + row.total, 0)
+    };
+}
+
+/**
+ * Spending per month, read from the monthly rollups
+ *
+ * Transactions are bucketed by the month they happened in, so a batch
+ * of old statements uploaded together still spreads over its months.
+ *
+ * @param {string} userId - User ID
+ * @param {Object} [filters] - See rollupMatch; with a category only that category is totalled
+ * @returns {Promise<Array<{month: string, totalDebits: number, totalCredits: number, transactions: number}>>}
+ */
+async function getMonthlyTotals(userId, filters = {}) {
+    const amountOf = type => ({ $sum: { $cond: [{ $eq: ['$type', type] }, '$sum', 0] } });
+
+    return MonthlyRollup.aggregate([
+        { $match: rollupMatch(userId, filters) },
+        {
+            $group: {
+                _id: '$month',
+                totalDebits: amountOf('debit'),
+                totalCredits: amountOf('credit'),
+                transactions: { $sum: '$count' }
+            }
+        },
+        { $sort: { _id: 1 } },
+        { $project: { _id: 0, month: '$_id', totalDebits: 1, totalCredits: 1, transactions: 1 } }
+    ]);
+}
+
+/**
+ * Totals per bank
+ *
+ * @param {string} userId - User ID
+ * @param {Object} [filters] - See statementMatch
+ * @returns {Promise<Array<{bankName: string, totalDebits: number, totalCredits: number, transactions: number, statements: number}>>}
+ */
+async function getBankTotals(userId, filters = {}) {
+    return BankStatement.aggregate([
+        { $match: statementMatch(userId, filters) },
+        {
+            $group: {
+                _id: { $ifNull: ['$bankName', 'Unknown Bank'] },
+                totalDebits: { $sum: '$mlResults.totalExpenses' },
+                totalCredits: { $sum: '$mlResults.totalCredits' },
+                transactions: { $sum: '$mlResults.totalTransactions' },
+                statements: { $sum: 1 },
+                lastUpload: { $max: '$uploadDate' }
+            }
+        },
+        { $sort: { totalDebits: -1 } },
+        {
+            $project: {
+                _id: 0,
+                bankName: '$_id',
+                totalDebits: 1,
+                totalCredits: 1,
+                transactions: 1,
+                statements: 1,
+                lastUpload: 1
+            }
+        }
+    ]);
+}
+
+/**
+ * Percent change from one value to another, or null when there is no baseline
+ */
+function percentChange(from, to) {
+    return from === 0 ? null : ((to - from) / from) * 100;
+}
+
+/**
+ * Per-category spending deltas between two statements
+ *
+ * @param {string} userId - User ID
+ * @param {string} firstId - Baseline statement
+ * @param {string} secondId - Statement compared against the baseline
+ * @returns {Promise<Object|null>} The comparison, or null if either statement is missing or unprocessed
+ */
+async function compareStatements(userId, firstId, secondId) {
+    const statementIds = [firstId, secondId];
+    const match = statementMatch(userId, { statementIds });
+
+    const [statements, rows] = await Promise.all([
+        BankStatement.find(match)
+            .select('title fileName bankName uploadDate mlResults.totalExpenses')
+            .lean(),
+        BankStatement.aggregate([
+            { $match: match },
+            { $unwind: EXPENSE },
+            { $match: { 'mlResults.expenses.type': 'debit', 'mlResults.expenses.duplicateOf': null } },
+            {
+                $group: {
+                    _id: { statement: '$_id', category: '$mlResults.expenses.category' },
+                    total: { $sum: '$mlResults.expenses.amount' }
+                }
+            }
+        ])
+    ]);
+
+    const byId = new Map(statements.map(statement => [statement._id.toString(), statement]));
+    const first = byId.get(String(firstId));
+    const second = byId.get(String(secondId));
+    if (!first || !second) {
+        return null;
+    }
+
+    const totals = new Map();
+    rows.forEach(({ _id, total }) => {
+        const entry = totals.get(_id.category) || { first: 0, second: 0 };
+        entry[_id.statement.toString() === String(firstId) ? 'first' : 'second'] += total;
+        totals.set(_id.category, entry);
+    });
+
+    const categories = [...totals.entries()]
+        .map(([category, { first: firstTotal, second: secondTotal }]) => ({
+            category,
+            first: firstTotal,
+            second: secondTotal,
+            change: secondTotal - firstTotal,
+            percentChange: percentChange(firstTotal, secondTotal)
+        }))
+        .sort((a, b) => Math.abs(b.change) - Math.abs(a.change));
+
+    const summarize = statement => ({
+        statementId: statement._id,
+        title: statement.title,
+        fileName: statement.fileName,
+        bankName: statement.bankName,
+        uploadDate: statement.uploadDate,
+        totalExpenses: statement.mlResults?.totalExpenses || 0
+    });
+    const firstTotal = first.mlResults?.totalExpenses || 0;
+    const secondTotal = second.mlResults?.totalExpenses || 0;
+
+    return {
+        first: summarize(first),
+        second: summarize(second),
+        totalChange: secondTotal - firstTotal,
+        totalPercentChange: percentChange(firstTotal, secondTotal),
+        categories
+    };
+}
+
+/**
+ * Spending insights over a user's individual transactions
+ *
+ * Unlike the rollup endpoints, months here are transaction months, and the
+ * daily rolling averages and merchant ranking need every transaction, so
+ * the work is done in a parser worker over columnar arrays rather than in
+ * a Mongo pipeline.
+ *
+ * @param {string} userId - User ID
+ * @param {Object} [filters] - Transaction filters (see transactionService.transactionQuery)
+ * @param {Object} [options] - top and windows, see pythonExecutor.analyzeTransactions
+ * @returns {Promise<Object>} Totals, categoryBreakdown, monthly, categoryChanges, rollingAverages and topMerchants
+ */
+async function getSpendingInsights(userId, filters = {}, options = {}) {
+    const columns = await loadTransactionColumns(userId, filters);
+    return analyzeTransactions(columns, options);
+}
+
+module.exports = {
+    getCategoryTotals,
+    getMonthlyTotals,
+    getBankTotals,
+    compareStatements,
+    getSpendingInsights
+};
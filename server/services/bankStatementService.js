@@ -1,42 +1,290 @@
 // services/bankStatementService.js (Backend)
-const fs = require('fs');
-const path = require('path');
-const os = require('os');
+const mongoose = require('mongoose');
 const BankStatement = require('../models/BankStatement');
-const { parseBankStatement } = require('../utils/pythonExecutor');
+const ProcessingJob = require('../models/ProcessingJob');
+const { parseBankStatement, parseBankStatements, getParserInfo } = require('../utils/pythonExecutor');
+const { getParseResultCache, computePdfHash } = require('../utils/parseResultCache');
+const { storePdf, openStatementPdf, releasePdf } = require('./pdfStorageService');
+const { getJobQueue } = require('./jobQueue');
+const { ROLLUP_FIELDS, addToRollups, removeFromRollups, updateRollupsSafely } = require('./rollupService');
+const { addTransactions, removeTransactions, updateTransactionsSafely } = require('./transactionService');
+const { updateRecurringChargesSafely } = require('./recurringService');
+const { markDuplicatesSafely, releaseDuplicatesSafely } = require('./duplicateService');
+const { stageSeconds } = require('../utils/metrics');
+
+// Job type for parsing an uploaded statement in the background
+const PROCESS_STATEMENT_JOB = 'processStatement';
+
+/**
+ * Look up a cached parse result for a PDF
+ * @param {string} pdfHash - SHA-256 of the PDF
+ * @returns {Promise<{info: (Object|null), cached: (Object|null)}>} Parser version info (needed to store a result later) and the cached output
+ */
+async function readCachedParse(pdfHash) {
+    const cache = getParseResultCache();
+    if (!cache || !pdfHash) {
+        return { info: null, cached: null };
+    }
+
+    try {
+        const info = await getParserInfo();
+        return { info, cached: await cache.get(pdfHash, info) };
+    } catch (error) {
+        console.warn('Parse cache lookup failed, parsing normally:', error.message);
+        return { info: null, cached: null };
+    }
+}
+
+/**
+ * Store a parse result in the cache
+ * @param {string} pdfHash - SHA-256 of the PDF
+ * @param {Object|null} info - Parser version info from readCachedParse
+ * @param {Object} parserOutput - Parser output to cache
+ */
+async function writeCachedParse(pdfHash, info, parserOutput) {
+    const cache = getParseResultCache();
+    if (!cache || !info) {
+        return;
+    }
+
+    try {
+        // Metrics describe one run, not the result
+        const { metrics, ...output } = parserOutput;
+        await cache.set(pdfHash, info, output);
+    } catch (error) {
+        console.warn('Failed to store parse result in cache:', error.message);
+    }
+}
 
 /**
  * Process a PDF bank statement with the appropriate parser based on bank identification
- * @param {Buffer} pdfBuffer - The PDF file as a buffer
+ *
+ * Results are cached by the SHA-256 of the PDF bytes and the parser version,
+ * so re-uploads and re-analysis of an identical PDF skip parsing entirely.
+ * The PDF is piped straight to a parser worker; nothing is written to disk.
+ *
+ * @param {Buffer|Readable} pdfSource - The PDF as a buffer or a stream (e.g. from GridFS)
  * @param {string} filename - Original filename
+ * @param {string} [pdfHash] - SHA-256 of the PDF; computed for buffers when omitted
+ * @param {number} [pdfSize] - Byte length of the PDF; required for streams
+ * @returns {Promise<Object>} Parser results
+ */
+async function processPdfWithParser(pdfSource, filename, pdfHash = null, pdfSize = null) {
+    const isBuffer = Buffer.isBuffer(pdfSource);
+    if (!pdfHash && isBuffer) {
+        pdfHash = computePdfHash(pdfSource);
+    }
+
+    const { info, cached } = await readCachedParse(pdfHash);
+    if (cached) {
+        console.log(`Parse cache hit for ${filename} (${pdfHash.substring(0, 12)})`);
+        if (!isBuffer) {
+            pdfSource.destroy();
+        }
+        return { ...cached, metrics: { cached: true, stages: {} } };
+    }
+
+    // Stream the PDF to the parser; identification and parsing happen in one pass
+    const result = await parseBankStatement(pdfSource, {
+        pdfSize: isBuffer ? pdfSource.length : pdfSize
+    });
+
+    // Parse the results
+    const parserOutput = result.parsedJson;
+
+    if (!parserOutput) {
+        throw new Error('Failed to get valid data from Python parser');
+    }
+
+    console.log(`Parser found ${parserOutput.summary.totalTransactions} transactions in ${filename}`);
+    console.log(`Identified bank: ${parserOutput.bankIdentifier || 'Unknown'}`);
+
+    await writeCachedParse(pdfHash, info, parserOutput);
+    return parserOutput;
+}
+
+/**
+ * Parse the PDF stored for a statement
+ * @param {Object} statement - BankStatement document; legacy documents must be loaded with '+pdfData'
  * @returns {Promise<Object>} Parser results
  */
-async function processPdfWithParser(pdfBuffer, filename) {
-    // Create a temporary file for the PDF
-    const tempDir = os.tmpdir();
-    const tempFilePath = path.join(tempDir, `statement_${Date.now()}_${filename.replace(/[^a-zA-Z0-9]/g, '_')}.pdf`);
+async function processStatementPdf(statement) {
+    const { source, pdfHash, pdfSize } = await openStatementPdf(statement);
+    return processPdfWithParser(source, statement.fileName, pdfHash, pdfSize);
+}
+
+/**
+ * Copy parser output onto a statement document
+ * @param {Object} statement - BankStatement document
+ * @param {Object} parserOutput - Output of processPdfWithParser
+ */
+function applyParserOutput(statement, parserOutput) {
+    statement.mlResults = {
+        expenses: parserOutput.transactions,
+        totalExpenses: parserOutput.summary.totalDebits,
+        totalCredits: parserOutput.summary.totalCredits,
+        totalTransactions: parserOutput.summary.totalTransactions,
+        processedDate: new Date(),
+        categoryBreakdown: parserOutput.categoryBreakdown
+    };
+
+    // Update the bank name
+    statement.bankName = parserOutput.bankIdentifier || 'Unknown Bank';
+    statement.statementPeriod = parserOutput.statementPeriod
+        ? { start: new Date(parserOutput.statementPeriod.start), end: new Date(parserOutput.statementPeriod.end) }
+        : undefined;
+    statement.isProcessed = true;
+    statement.processingError = null;
+}
+
+/**
+ * Save a statement that has just been given parser output, adding the
+ * duplicate check and write times to the parse metrics
+ *
+ * Transactions another statement already holds are flagged first, so the
+ * saved totals leave them out.
+ *
+ * @param {Object} statement - BankStatement document
+ * @param {Object} parserOutput - Output of processPdfWithParser
+ */
+async function saveProcessedStatement(statement, parserOutput) {
+    const endDedupTimer = stageSeconds.startTimer({ stage: 'dedup' });
+    await markDuplicatesSafely(statement);
+    const dedupSeconds = endDedupTimer();
+
+    const endTimer = stageSeconds.startTimer({ stage: 'mongoSave' });
+    await statement.save();
+    const seconds = endTimer();
+    if (parserOutput.metrics) {
+        parserOutput.metrics.stages.dedup = dedupSeconds;
+        parserOutput.metrics.stages.mongoSave = seconds;
+    }
+}
+
+/**
+ * Add processed statements to everything derived from them: the monthly
+ * rollups, the transactions collection and recurring charges
+ *
+ * @param {Object|Array<Object>} statements - Saved, processed statement(s)
+ */
+async function addStatementData(statements) {
+    await updateRollupsSafely(addToRollups, statements);
+    await updateTransactionsSafely(addTransactions, statements);
+    await updateRecurringChargesSafely(statements);
+}
+
+/**
+ * Claim an unprocessed statement for one processing run
+ *
+ * Only the run holding the claim parses and saves the statement, so a
+ * statement is never processed by two runs at once; a retry of the same
+ * job takes its claim back.
+ *
+ * @param {Object} filter - Statement query, e.g. { _id }
+ * @param {ObjectId} claim - ID of the job processing the statement
+ * @returns {Promise<Object|null>} The claimed statement, or null if it is processed or claimed by another job
+ */
+async function claimStatement(filter, claim) {
+    return BankStatement.findOneAndUpdate(
+        { ...filter, isProcessed: false, processingJob: { $in: [null, claim] } },
+        { $set: { processingJob: claim } },
+        { new: true }
+    ).select('+pdfData');  // Only present on documents not yet moved to GridFS
+}
 
+/**
+ * Apply parser output to a statement, save it and add it to the derived data
+ *
+ * Every path that processes a single statement finishes through here. The
+ * save only matches while the statement is unprocessed and still claimed
+ * by this run, so a statement is added to the derived data once.
+ *
+ * @param {Object} statement - Claimed BankStatement document
+ * @param {Object} parserOutput - Output of processPdfWithParser
+ * @returns {Promise<boolean>} False if the statement was processed or deleted in the meantime
+ */
+async function finishProcessedStatement(statement, parserOutput) {
+    const claim = statement.processingJob || null;
+    applyParserOutput(statement, parserOutput);
+    statement.processingJob = null;
+    statement.$where = { isProcessed: false, processingJob: claim };
     try {
-        // Write the PDF buffer to a temporary file
-        fs.writeFileSync(tempFilePath, pdfBuffer);
-        console.log(`PDF saved to temporary file: ${tempFilePath}`);
-
-        // Use our enhanced parser with bank identification
-        const result = await parseBankStatement(tempFilePath);
-
-        // Parse the results
-        const parserOutput = result.parsedJson;
-        console.log(`Parser found ${parserOutput.summary.totalTransactions} transactions`);
-        console.log(`Identified bank: ${parserOutput.bankIdentifier || 'Unknown'}`);
-
-        return parserOutput;
-    } finally {
-        // Clean up the temporary file
-        if (fs.existsSync(tempFilePath)) {
-            fs.unlinkSync(tempFilePath);
-            console.log('Temporary PDF file deleted');
+        await saveProcessedStatement(statement, parserOutput);
+    } catch (error) {
+        if (error instanceof mongoose.Error.DocumentNotFoundError) {
+            console.warn(`Statement ${statement._id} was processed or deleted by another run; not saving`);
+            return false;
         }
+        throw error;
+    }
+    await addStatementData(statement);
+    return true;
+}
+
+/**
+ * Queue a saved statement for background parsing
+ * @param {Object} statement - BankStatement document
+ * @returns {Promise<Object>} The queued ProcessingJob
+ */
+async function enqueueStatementProcessing(statement) {
+    return getJobQueue().enqueue(
+        PROCESS_STATEMENT_JOB,
+        { statementId: statement._id.toString() },
+        { userId: statement.userId, statementId: statement._id }
+    );
+}
+
+/**
+ * Job handler: parse a queued statement and save the results
+ *
+ * Nothing is written unless the job still holds its lease once parsing is
+ * done, so a run that timed out or lost its lock cannot save over a retry.
+ *
+ * @param {Object} job - ProcessingJob document
+ * @param {Object} lease - Job lease from the queue
+ * @returns {Promise<Object>} Summary stored on the job
+ */
+async function processQueuedStatement(job, lease) {
+    const statement = await claimStatement({ _id: job.data.statementId }, job._id);
+    if (!statement) {
+        const exists = await BankStatement.exists({ _id: job.data.statementId });
+        return { skipped: exists ? 'Statement already processed' : 'Statement no longer exists' };
+    }
+
+    const parserOutput = await processStatementPdf(statement);
+    await lease.assertHeld();
+
+    if (!(await finishProcessedStatement(statement, parserOutput))) {
+        return { skipped: 'Statement already processed' };
     }
+    console.log('Statement updated with parsed data, ID:', statement._id);
+
+    return {
+        bankName: parserOutput.bankIdentifier || 'Unknown Bank',
+        transactionCount: parserOutput.summary.totalTransactions,
+        metrics: parserOutput.metrics || null
+    };
+}
+
+/**
+ * Record the error on a statement whose processing job ran out of retries
+ * @param {Object} job - ProcessingJob document
+ * @param {Error} error - Error from the last attempt
+ */
+async function markStatementFailed(job, error) {
+    // Releasing the claim lets the statement be queued again
+    await BankStatement.updateOne(
+        { _id: job.data.statementId, isProcessed: false, processingJob: { $in: [null, job._id] } },
+        { $set: { processingError: error.message || 'Error processing the PDF', processingJob: null } }
+    );
+}
+
+/**
+ * Register the statement job handlers with a job queue
+ * @param {JobQueue} queue
+ */
+function registerStatementJobs(queue) {
+    queue.register(PROCESS_STATEMENT_JOB, processQueuedStatement, { onFailed: markStatementFailed });
 }
 
 /**
@@ -49,38 +297,37 @@ async function processPdfWithParser(pdfBuffer, filename) {
  * @returns {Promise<Object>} Created and processed statement
  */
 async function createAndProcessStatement(data) {
+    // Store the PDF outside the statement document
+    const { pdfHash, pdfSize } = await storePdf(data.pdfData, data.fileName);
+
     // Create a new bank statement record
     const bankStatement = new BankStatement({
         userId: data.userId,
         title: data.title || 'Bank Statement',
         fileName: data.fileName,
-        pdfData: data.pdfData,
+        pdfHash,
+        pdfSize,
         uploadDate: new Date(),
-        isProcessed: false
+        isProcessed: false,
+        // Claimed by this call from the start
+        processingJob: new mongoose.Types.ObjectId()
     });
 
     // Save the initial record
-    await bankStatement.save();
+    try {
+        await bankStatement.save();
+    } catch (error) {
+        await releasePdfs([pdfHash]);
+        throw error;
+    }
     console.log('Bank statement saved to database:', bankStatement._id);
 
     try {
         // Process the PDF
-        const parserOutput = await processPdfWithParser(data.pdfData, data.fileName);
+        const parserOutput = await processPdfWithParser(data.pdfData, data.fileName, pdfHash);
 
         // Update the bank statement with the parsed data
-        bankStatement.mlResults = {
-            expenses: parserOutput.transactions,
-            totalExpenses: parserOutput.summary.totalDebits,
-            totalCredits: parserOutput.summary.totalCredits,
-            totalTransactions: parserOutput.summary.totalTransactions,
-            processedDate: new Date(),
-            categoryBreakdown: parserOutput.categoryBreakdown
-        };
-
-        // Update the bank name
-        bankStatement.bankName = parserOutput.bankIdentifier || 'Unknown Bank';
-        bankStatement.isProcessed = true;
-        await bankStatement.save();
+        await finishProcessedStatement(bankStatement, parserOutput);
         console.log('Bank statement updated with parsed data');
 
         return {
@@ -88,9 +335,11 @@ async function createAndProcessStatement(data) {
             parserOutput
         };
     } catch (error) {
-        // Update statement with error information
-        bankStatement.processingError = error.message || 'Error processing the PDF';
-        await bankStatement.save();
+        // Record the error and release the claim so the statement can be queued again
+        await BankStatement.updateOne(
+            { _id: bankStatement._id, isProcessed: false },
+            { $set: { processingError: error.message || 'Error processing the PDF', processingJob: null } }
+        );
         console.error('Error processing bank statement:', error);
 
         throw error;
@@ -98,17 +347,140 @@ async function createAndProcessStatement(data) {
 }
 
 /**
- * Process an existing bank statement
+ * Import many statements at once
+ *
+ * PDFs already in the parse cache are reused; the rest are parsed as
+ * separate worker pool jobs, so one bad PDF only fails its own statement.
+ * All the statements are then saved with a single insertMany, and the ones
+ * that failed to parse are queued for processing like a single upload.
+ * If the import fails before the statements are saved, the PDF references
+ * it took are released again.
+ *
+ * @param {Object} data - Batch data
+ * @param {string} data.userId - User ID
+ * @param {string} [data.title] - Title prefix; each statement is titled with its filename
+ * @param {Array<{fileName: string, pdfData: Buffer}>} data.files - The PDFs to import
+ * @returns {Promise<{statements: Array, failed: number}>} Saved statements, including those that failed to parse
+ */
+async function importStatementBatch(data) {
+    // Every file takes a reference to its PDF blob; none may outlive a failed import
+    const stored = await Promise.allSettled(data.files.map(file => storePdf(file.pdfData, file.fileName)));
+    const pdfHashes = stored.filter(result => result.status === 'fulfilled').map(result => result.value.pdfHash);
+    const storeFailure = stored.find(result => result.status === 'rejected');
+    if (storeFailure) {
+        await releasePdfs(pdfHashes);
+        throw storeFailure.reason;
+    }
+
+    let saved;
+    let items;
+    try {
+        items = await Promise.all(data.files.map(async (file, index) => {
+            const { pdfHash, pdfSize } = stored[index].value;
+            const { info, cached } = await readCachedParse(pdfHash);
+            return { ...file, pdfHash, pdfSize, info, parserOutput: cached, error: null };
+        }));
+        saved = await saveStatementBatch(data, items);
+    } catch (error) {
+        await releasePdfs(pdfHashes);
+        throw error;
+    }
+
+    await addStatementData(saved);
+    const failed = items.filter(item => item.error).length;
+    console.log(`Batch import saved ${saved.length} statements (${failed} failed to parse)`);
+
+    // Statements the batch could not parse get the usual retried processing job
+    for (const statement of saved.filter(statement => !statement.isProcessed)) {
+        try {
+            await enqueueStatementProcessing(statement);
+        } catch (error) {
+            console.error(`Failed to queue statement ${statement._id} for processing:`, error);
+        }
+    }
+
+    return { statements: saved, failed };
+}
+
+/**
+ * Parse the uncached PDFs of a batch and insert its statements
+ * @returns {Promise<Array>} Saved statements
+ */
+async function saveStatementBatch(data, items) {
+    const toParse = items.filter(item => !item.parserOutput);
+    console.log(`Batch import: ${items.length} statements, ${items.length - toParse.length} cached, ${toParse.length} to parse`);
+
+    if (toParse.length > 0) {
+        const outcomes = await parseBankStatements(toParse.map(item => item.pdfData));
+        await Promise.all(toParse.map(async (item, index) => {
+            const outcome = outcomes[index];
+            if (!outcome || !outcome.ok) {
+                item.error = (outcome && outcome.error) || 'Error processing the PDF';
+                return;
+            }
+            item.parserOutput = outcome.parsedJson;
+            await writeCachedParse(item.pdfHash, item.info, item.parserOutput);
+        }));
+    }
+
+    const statements = items.map((item) => {
+        const statement = new BankStatement({
+            userId: data.userId,
+            title: data.title ? `${data.title} - ${item.fileName}` : item.fileName,
+            fileName: item.fileName,
+            pdfHash: item.pdfHash,
+            pdfSize: item.pdfSize,
+            uploadDate: new Date(),
+            isProcessed: false
+        });
+        if (item.parserOutput) {
+            applyParserOutput(statement, item.parserOutput);
+        } else {
+            statement.processingError = item.error;
+        }
+        return statement;
+    });
+
+    // Statements in one upload (e.g. monthly and quarterly) are checked against each other too
+    const endDedupTimer = stageSeconds.startTimer({ stage: 'dedup' });
+    await markDuplicatesSafely(statements);
+    endDedupTimer();
+
+    const endTimer = stageSeconds.startTimer({ stage: 'mongoSave' });
+    const saved = await BankStatement.insertMany(statements);
+    endTimer();
+    return saved;
+}
+
+/**
+ * Drop references taken by storePdf for statements that were never saved
+ * @param {Array<string>} pdfHashes - One entry per reference
+ */
+async function releasePdfs(pdfHashes) {
+    for (const pdfHash of pdfHashes) {
+        try {
+            await releasePdf(pdfHash);
+        } catch (error) {
+            console.error(`Failed to release PDF ${pdfHash}:`, error);
+        }
+    }
+}
+
+/**
+ * Queue an existing bank statement for processing
+ *
+ * A statement that already has a queued or running job gets that job
+ * back, so asking again never starts a second parse.
+ *
  * @param {string} statementId - The ID of the statement to process
  * @param {string} userId - User ID
- * @returns {Promise<Object>} Updated statement
+ * @returns {Promise<{statement: Object, job: Object, queued: boolean}>} The statement and its processing job
  */
 async function processExistingStatement(statementId, userId) {
-    // Find the statement
     const statement = await BankStatement.findOne({
         _id: statementId,
         userId: userId
-    });
+    }).select('userId isProcessed');
 
     if (!statement) {
         throw new Error('Statement not found');
@@ -118,39 +490,16 @@ async function processExistingStatement(statementId, userId) {
         throw new Error('Statement already processed');
     }
 
-    try {
-        // Process the PDF
-        const parserOutput = await processPdfWithParser(statement.pdfData, statement.fileName);
-
-        // Update the statement with the parsed data
-        statement.mlResults = {
-            expenses: parserOutput.transactions,
-            totalExpenses: parserOutput.summary.totalDebits,
-            totalCredits: parserOutput.summary.totalCredits,
-            totalTransactions: parserOutput.summary.totalTransactions,
-            processedDate: new Date(),
-            categoryBreakdown: parserOutput.categoryBreakdown
-        };
-
-        // Update the bank name
-        statement.bankName = parserOutput.bankIdentifier || 'Unknown Bank';
-        statement.isProcessed = true;
-        statement.processingError = null;
-        await statement.save();
-        console.log('Bank statement updated with parsed data');
-
-        return {
-            statement,
-            parserOutput
-        };
-    } catch (error) {
-        // Update statement with error information
-        statement.processingError = error.message || 'Error processing the PDF';
-        await statement.save();
-        console.error('Error processing bank statement:', error);
-
-        throw error;
+    const pending = await ProcessingJob.findOne({
+        type: PROCESS_STATEMENT_JOB,
+        statementId: statement._id,
+        status: { $in: ['queued', 'running'] }
+    }).sort({ createdAt: -1 });
+    if (pending) {
+        return { statement, job: pending, queued: false };
     }
+
+    return { statement, job: await enqueueStatementProcessing(statement), queued: true };
 }
 
 /**
@@ -215,17 +564,35 @@ async function getUserBanks(userId) {
  * @returns {Promise<boolean>} Success indicator
  */
 async function deleteStatement(statementId, userId) {
-    const result = await BankStatement.deleteOne({
+    const statement = await BankStatement.findOneAndDelete({
         _id: statementId,
         userId: userId
-    });
+    }).select(`pdfHash ${ROLLUP_FIELDS}`);
+
+    if (!statement) {
+        return false;
+    }
+
+    await updateRollupsSafely(removeFromRollups, statement);
+    await updateTransactionsSafely(removeTransactions, statement);
+    await releaseDuplicatesSafely(statement);
+    await updateRecurringChargesSafely(statement);
 
-    return result.deletedCount > 0;
+    // Drop this statement's reference to the PDF blob; the last one deletes it
+    await releasePdf(statement.pdfHash);
+    return true;
 }
 
 module.exports = {
     processPdfWithParser,
+    processStatementPdf,
+    applyParserOutput,
+    finishProcessedStatement,
+    enqueueStatementProcessing,
+    processQueuedStatement,
+    registerStatementJobs,
     createAndProcessStatement,
+    importStatementBatch,
     processExistingStatement,
     getUserStatements,
     getStatementById,
@@ -0,0 +1,392 @@
+// services/duplicateService.js
+const mongoose = require('mongoose');
+const BankStatement = require('../models/BankStatement');
+const Transaction = require('../models/Transaction');
+const { addToRollups, removeFromRollups } = require('./rollupService');
+const { addTransactions, dedupKey, inferTransactionDate } = require('./transactionService');
+
+const DAY_MS = 24 * 60 * 60 * 1000;
+
+// Copies of a transaction may be dated this many days apart (transaction
+// date on one statement, posting date on another)
+const DATE_TOLERANCE_DAYS = 3;
+
+/**
+ * Totals, debit category breakdown and duplicate count of a statement's
+ * expenses, leaving out suppressed duplicates
+ *
+ * Mirrors the parser's summary (scripts/parser_core/summary.py).
+ *
+ * @param {Array<Object>} expenses - mlResults.expenses
+ * @returns {{totalExpenses: number, totalCredits: number, totalTransactions: number, duplicateTransactions: number, categoryBreakdown: Object}}
+ */
+function statementTotals(expenses) {
+    const totals = {
+        totalExpenses: 0,
+        totalCredits: 0,
+        totalTransactions: 0,
+        duplicateTransactions: 0,
+        categoryBreakdown: {}
+    };
+
+    for (const expense of expenses) {
+        if (expense.duplicateOf) {
+            totals.duplicateTransactions++;
+            continue;
+        }
+        totals.totalTransactions++;
+        if (expense.type === 'credit') {
+            totals.totalCredits += expense.amount;
+        } else {
+            totals.totalExpenses += expense.amount;
+            totals.categoryBreakdown[expense.category] = (totals.categoryBreakdown[expense.category] || 0) + expense.amount;
+        }
+    }
+    return totals;
+}
+
+/**
+ * The dates a statement covers: its printed period, or else the span of
+ * its transactions
+ *
+ * @param {Object} [period] - statementPeriod
+ * @param {Array<number>} times - Transaction times, used without a period
+ * @returns {{start: number, end: number}|null}
+ */
+function statementCoverage(period, times) {
+    if (period && period.start && period.end) {
+        return { start: new Date(period.start).getTime(), end: new Date(period.end).getTime() };
+    }
+    const known = times.filter(time => time !== null);
+    return known.length > 0 ? { start: Math.min(...known), end: Math.max(...known) } : null;
+}
+
+/**
+ * Coverage of the existing statements holding candidate copies
+ *
+ * @param {Array<ObjectId>} statementIds
+ * @returns {Promise<Map<string, {start: number, end: number}>>}
+ */
+async function loadCoverage(statementIds) {
+    const coverage = new Map();
+    const statements = await BankStatement.find({ _id: { $in: statementIds } })
+        .select('statementPeriod')
+        .lean();
+    const unknown = [];
+    for (const statement of statements) {
+        const covered = statementCoverage(statement.statementPeriod, []);
+        if (covered) {
+            coverage.set(statement._id.toString(), covered);
+        } else {
+            unknown.push(statement._id);
+        }
+    }
+
+    if (unknown.length > 0) {
+        const spans = await Transaction.aggregate([
+            { $match: { statementId: { $in: unknown } } },
+            { $group: { _id: '$statementId', start: { $min: '$date' }, end: { $max: '$date' } } }
+        ]);
+        spans.forEach(span => coverage.set(span._id.toString(), { start: span.start.getTime(), end: span.end.getTime() }));
+    }
+    return coverage;
+}
+
+/**
+ * Hash index of the transactions that new statements may duplicate
+ *
+ * Buckets are keyed by dedupKey, so checking a transaction is one map
+ * lookup plus a scan of the few same-amount, same-merchant copies within
+ * reach, however many statements the user has.
+ */
+class DuplicateIndex {
+    constructor() {
+        this.buckets = new Map();
+    }
+
+    add(key, entry) {
+        const bucket = this.buckets.get(key);
+        if (bucket) {
+            bucket.push(entry);
+        } else {
+            this.buckets.set(key, [entry]);
+        }
+    }
+
+    /**
+     * The closest copy from another statement within the date tolerance
+     * that has not already been matched by this statement
+     *
+     * Both copies must fall inside the dates the two statements have in
+     * common, so consecutive statements never match each other: a repeat
+     * purchase either side of a statement boundary is two purchases.
+     */
+    match(key, time, statement, used) {
+        let best = null;
+        for (const entry of this.buckets.get(key) || []) {
+            const distance = Math.abs(entry.time - time);
+            if (distance > DATE_TOLERANCE_DAYS * DAY_MS || used.has(entry) || entry.statementId === statement.statementId) {
+                continue;
+            }
+            if (!statement.coverage || !entry.coverage) {
+                continue;
+            }
+            const start = Math.max(statement.coverage.start, entry.coverage.start);
+            const end = Math.min(statement.coverage.end, entry.coverage.end);
+            if (time < start || time > end || entry.time < start || entry.time > end) {
+                continue;
+            }
+            if (!best || distance < Math.abs(best.time - time)) {
+                best = entry;
+            }
+        }
+        return best;
+    }
+}
+
+/**
+ * Flag the transactions of newly processed statements that are already
+ * recorded by another of the user's statements, and recompute the
+ * statements' totals without them
+ *
+ * Existing copies are loaded with one indexed query per user; statements
+ * in the same call are checked against each other in order, so a monthly
+ * and a quarterly statement uploaded together are caught too. Only the
+ * dates both statements cover are compared, and each existing copy
+ * absorbs at most one transaction per statement, so two genuine identical
+ * purchases on one statement stay two.
+ *
+ * Call after applyParserOutput and before the statements are saved.
+ *
+ * @param {Object|Array<Object>} statements - Processed statement document(s)
+ * @returns {Promise<number>} Number of transactions flagged
+ */
+async function markDuplicates(statements) {
+    const byUser = new Map();
+    for (const statement of [].concat(statements)) {
+        if (!statement.isProcessed) {
+            continue;
+        }
+        const userId = statement.userId.toString();
+        byUser.set(userId, [...(byUser.get(userId) || []), statement]);
+    }
+
+    let flagged = 0;
+    for (const [userId, userStatements] of byUser) {
+        const keyed = userStatements.map((statement) => {
+            const rows = (statement.mlResults?.expenses || []).map((expense) => {
+                const date = inferTransactionDate(expense.date, statement);
+                return { expense, key: dedupKey(statement.bankName, expense), time: date && date.getTime() };
+            });
+            return {
+                statement,
+                statementId: statement._id.toString(),
+                coverage: statementCoverage(statement.statementPeriod, rows.map(row => row.time)),
+                rows
+            };
+        });
+
+        let earliest = Infinity;
+        let latest = -Infinity;
+        keyed.forEach(({ rows }) => rows.forEach(({ time }) => {
+            if (time !== null) {
+                earliest = Math.min(earliest, time);
+                latest = Math.max(latest, time);
+            }
+        }));
+
+        const index = new DuplicateIndex();
+        if (earliest <= latest) {
+            const existing = await Transaction.find({
+                userId: new mongoose.Types.ObjectId(userId),
+                dedupKey: { $in: [...new Set(keyed.flatMap(({ rows }) => rows.map(row => row.key)))] },
+                date: {
+                    $gte: new Date(earliest - DATE_TOLERANCE_DAYS * DAY_MS),
+                    $lte: new Date(latest + DATE_TOLERANCE_DAYS * DAY_MS)
+                },
+                statementId: { $nin: userStatements.map(statement => statement._id) },
+                duplicateOf: null
+            })
+                .select('dedupKey date statementId -_id')
+                .lean();
+            const coverage = existing.length > 0
+                ? await loadCoverage([...new Set(existing.map(row => row.statementId.toString()))])
+                : new Map();
+            existing.forEach(row => index.add(row.dedupKey, {
+                time: row.date.getTime(),
+                statementId: row.statementId.toString(),
+                coverage: coverage.get(row.statementId.toString()) || null
+            }));
+        }
+
+        for (const current of keyed) {
+            const { statement, statementId, coverage, rows } = current;
+            const used = new Set();
+            const added = [];
+            for (const { expense, key, time } of rows) {
+                const original = time === null ? null : index.match(key, time, current, used);
+                if (original) {
+                    used.add(original);
+                    expense.duplicateOf = new mongoose.Types.ObjectId(original.statementId);
+                    flagged++;
+                } else {
+                    expense.duplicateOf = undefined;
+                    if (time !== null) {
+                        added.push({ key, entry: { time, statementId, coverage } });
+                    }
+                }
+            }
+            // Later statements in the same call may duplicate this one
+            added.forEach(({ key, entry }) => index.add(key, entry));
+
+            const totals = statementTotals(statement.mlResults.expenses);
+            Object.assign(statement.mlResults, totals);
+            if (totals.duplicateTransactions > 0) {
+                console.log(`Suppressed ${totals.duplicateTransactions} duplicate transactions in statement ${statement._id}`);
+            }
+        }
+    }
+    return flagged;
+}
+
+/**
+ * Flag duplicates without failing the caller; an unflagged statement is
+ * repaired by migrations/markDuplicateTransactions.js
+ *
+ * @param {Object|Array<Object>} statements
+ */
+async function markDuplicatesSafely(statements) {
+    try {
+        await markDuplicates(statements);
+    } catch (error) {
+        console.error('Failed to check for duplicate transactions; run migrations/markDuplicateTransactions.js to repair:', error);
+    }
+}
+
+/**
+ * Re-check the statements whose duplicates pointed at deleted statements
+ *
+ * Transactions that were suppressed because a deleted statement already
+ * held them count again, unless yet another statement still holds them.
+ * The affected statements are taken out of the rollups and transactions,
+ * re-checked and put back.
+ *
+ * Call after the deleted statements' transactions have been removed.
+ *
+ * @param {Object|Array<Object>} statements - Statement(s) just deleted
+ * @returns {Promise<number>} Number of statements re-checked
+ */
+async function releaseDuplicates(statements) {
+    const deleted = [].concat(statements);
+    if (deleted.length === 0) {
+        return 0;
+    }
+
+    const statementIds = await Transaction.distinct('statementId', {
+        userId: { $in: [...new Set(deleted.map(statement => statement.userId.toString()))].map(id => new mongoose.Types.ObjectId(id)) },
+        duplicateOf: { $in: deleted.map(statement => statement._id), $type: 'objectId' }
+    });
+
+    const affected = await BankStatement.find({ _id: { $in: statementIds } }).sort({ uploadDate: 1 });
+    for (const statement of affected) {
+        await removeFromRollups(statement);
+        await markDuplicates(statement);
+        await statement.save();
+        await addToRollups(statement);
+        await addTransactions(statement);
+    }
+    return affected.length;
+}
+
+/**
+ * Release duplicates without failing the caller
+ * @param {Object|Array<Object>} statements - Statement(s) just deleted
+ */
+async function releaseDuplicatesSafely(statements) {
+    try {
+        await releaseDuplicates(statements);
+    } catch (error) {
+        console.error('Failed to release duplicate transactions; run migrations/markDuplicateTransactions.js to repair:', error);
+    }
+}
+
+/**
+ * Transactions suppressed as duplicates, grouped by statement and the
+ * statement already holding them
+ *
+ * @param {string} userId - User ID
+ * @param {Object} [filters]
+ * @param {string} [filters.statementId] - Only duplicates found in this statement
+ * @returns {Promise<{count: number, suppressedDebits: number, suppressedCredits: number, groups: Array<Object>}>}
+ */
+async function getDuplicateReport(userId, filters = {}) {
+    const query = {
+        userId: new mongoose.Types.ObjectId(userId),
+        duplicateOf: { $type: 'objectId' }
+    };
+    if (filters.statementId) {
+        query.statementId = new mongoose.Types.ObjectId(filters.statementId);
+    }
+
+    const rows = await Transaction.find(query)
+        .sort({ date: -1 })
+        .select('statementId duplicateOf date rawDate description merchant category type amountCents')
+        .lean();
+
+    const ids = [...new Set(rows.flatMap(row => [row.statementId.toString(), row.duplicateOf.toString()]))];
+    const statements = await BankStatement.find({ _id: { $in: ids } })
+        .select('title fileName bankName uploadDate statementPeriod')
+        .lean();
+    const byId = new Map(statements.map(statement => [statement._id.toString(), statement]));
+    const describe = (id) => {
+        const statement = byId.get(id.toString());
+        return statement
+            ? { statementId: id, title: statement.title, fileName: statement.fileName, bankName: statement.bankName, statementPeriod: statement.statementPeriod }
+            : { statementId: id };
+    };
+
+    const report = { count: rows.length, suppressedDebits: 0, suppressedCredits: 0, groups: [] };
+    const groups = new Map();
+    for (const row of rows) {
+        const key = `${row.statementId}|${row.duplicateOf}`;
+        let group = groups.get(key);
+        if (!group) {
+            group = {
+                statement: describe(row.statementId),
+                duplicateOf: describe(row.duplicateOf),
+                count: 0,
+                totalDebits: 0,
+                totalCredits: 0,
+                transactions: []
+            };
+            groups.set(key, group);
+            report.groups.push(group);
+        }
+
+        const amount = row.amountCents / 100;
+        group.count++;
+        group[row.type === 'credit' ? 'totalCredits' : 'totalDebits'] += amount;
+        report[row.type === 'credit' ? 'suppressedCredits' : 'suppressedDebits'] += amount;
+        group.transactions.push({
+            _id: row._id,
+            date: row.date,
+            rawDate: row.rawDate,
+            description: row.description,
+            merchant: row.merchant,
+            category: row.category,
+            type: row.type,
+            amount
+        });
+    }
+    return report;
+}
+
+module.exports = {
+    DATE_TOLERANCE_DAYS,
+    statementTotals,
+    markDuplicates,
+    markDuplicatesSafely,
+    releaseDuplicates,
+    releaseDuplicatesSafely,
+    getDuplicateReport
+};
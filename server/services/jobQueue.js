@@ -0,0 +1,363 @@
+// services/jobQueue.js
+const os = require('os');
+const ProcessingJob = require('../models/ProcessingJob');
+
+/**
+ * Durable background job queue backed by the ProcessingJob collection.
+ *
+ * Jobs are claimed atomically with findOneAndUpdate, so several server
+ * processes can share one queue. Each process runs at most `concurrency`
+ * jobs at a time; failed jobs are retried with exponential backoff, and jobs
+ * left 'running' by a crashed or restarted server are re-queued once their
+ * lock goes stale.
+ *
+ * A job keeps its slot and its lock until its handler settles. Timing out
+ * only aborts the lease passed to the handler; the job is not retried while
+ * the handler is still running, so two runs of one job never overlap.
+ */
+class JobQueue {
+    /**
+     * @param {Object} options
+     * @param {number} options.concurrency - Jobs run at once by this process
+     * @param {number} options.maxAttempts - Attempts before a job is marked failed
+     * @param {number} options.retryDelayMs - Delay before the first retry; doubled for each further attempt
+     * @param {number} options.jobTimeoutMs - Abort a job still running after this long
+     * @param {number} options.pollIntervalMs - How often to look for runnable jobs
+     * @param {number} options.staleAfterMs - Re-queue running jobs whose lock has not been renewed for this long
+     */
+    constructor(options = {}) {
+        this.concurrency = options.concurrency || 2;
+        this.maxAttempts = options.maxAttempts || 3;
+        this.retryDelayMs = options.retryDelayMs || 5000;
+        this.jobTimeoutMs = options.jobTimeoutMs || 180000;
+        this.pollIntervalMs = options.pollIntervalMs || 2000;
+        this.staleAfterMs = options.staleAfterMs || this.jobTimeoutMs * 2;
+        // Running jobs renew their lock well before it would go stale
+        this.heartbeatMs = Math.floor(this.staleAfterMs / 3);
+        this.workerId = `${os.hostname()}:${process.pid}`;
+
+        this.handlers = new Map();
+        this.active = new Set();
+        this.timer = null;
+        this.polling = false;
+        this.repoll = false;
+        this.started = false;
+    }
+
+    /**
+     * Register the handler for a job type
+     *
+     * The handler is called with the job and its lease: `lease.signal` is
+     * aborted when the job times out or its lock is lost, and
+     * `await lease.assertHeld()` throws in that case. Handlers call it
+     * before writing anything, so an abandoned run never writes.
+     *
+     * @param {string} type - Job type
+     * @param {Function} handler - async (job, lease) => result; the result is stored on the job
+     * @param {Object} [options]
+     * @param {Function} [options.onFailed] - async (job, error), called once retries are exhausted
+     * @param {number} [options.timeoutMs] - Override the queue's job timeout; 0 for none
+     */
+    register(type, handler, options = {}) {
+        this.handlers.set(type, {
+            handler,
+            onFailed: options.onFailed,
+            timeoutMs: options.timeoutMs === undefined ? this.jobTimeoutMs : options.timeoutMs
+        });
+    }
+
+    /**
+     * Add a job to the queue
+     *
+     * @param {string} type - Job type
+     * @param {Object} data - Handler arguments
+     * @param {Object} [options]
+     * @param {string} [options.userId] - Owner of the job, for status lookups
+     * @param {string} [options.statementId] - Statement the job works on
+     * @param {number} [options.maxAttempts] - Override the queue's attempt limit
+     * @returns {Promise<Object>} The created job
+     */
+    async enqueue(type, data, options = {}) {
+        const job = await ProcessingJob.create({
+            type,
+            data,
+            userId: options.userId,
+            statementId: options.statementId,
+            maxAttempts: options.maxAttempts || this.maxAttempts,
+            runAt: new Date()
+        });
+        console.log(`Queued ${type} job ${job._id}`);
+
+        if (this.started) {
+            setImmediate(() => this.poll());
+        }
+        return job;
+    }
+
+    /**
+     * Start polling for jobs
+     */
+    start() {
+        if (this.started) {
+            return;
+        }
+        this.started = true;
+        this.timer = setInterval(() => this.poll(), this.pollIntervalMs);
+        this.timer.unref();
+        console.log(`Job queue started (${this.workerId}, concurrency ${this.concurrency})`);
+        this.poll();
+    }
+
+    /**
+     * Stop claiming new jobs and wait for running ones to finish
+     */
+    async stop() {
+        this.started = false;
+        clearInterval(this.timer);
+        this.timer = null;
+        await Promise.allSettled([...this.active]);
+    }
+
+    /**
+     * Fill free slots with runnable jobs
+     */
+    async poll() {
+        if (this.polling) {
+            this.repoll = true;
+            return;
+        }
+        this.polling = true;
+
+        try {
+            await this.recoverStaleJobs();
+            while (this.started && this.active.size < this.concurrency) {
+                const job = await this.claimNext();
+                if (!job) {
+                    break;
+                }
+                const running = this.runJob(job).finally(() => {
+                    this.active.delete(running);
+                    this.poll();
+                });
+                this.active.add(running);
+            }
+        } catch (error) {
+            console.error('Job queue poll failed:', error);
+        } finally {
+            this.polling = false;
+        }
+
+        if (this.repoll) {
+            this.repoll = false;
+            this.poll();
+        }
+    }
+
+    /**
+     * Atomically claim the oldest runnable job of a registered type
+     * @returns {Promise<Object|null>}
+     */
+    claimNext() {
+        const now = new Date();
+        return ProcessingJob.findOneAndUpdate(
+            { status: 'queued', runAt: { $lte: now }, type: { $in: [...this.handlers.keys()] } },
+            {
+                $set: { status: 'running', lockedAt: now, lockedBy: this.workerId },
+                $inc: { attempts: 1 }
+            },
+            { sort: { runAt: 1 }, new: true }
+        );
+    }
+
+    /**
+     * Put jobs whose lock has expired back in the queue, or fail them if
+     * they have no attempts left
+     */
+    async recoverStaleJobs() {
+        const staleBefore = new Date(Date.now() - this.staleAfterMs);
+        const stale = { status: 'running', lockedAt: { $lt: staleBefore } };
+        const unlock = { lockedAt: null, lockedBy: null, lastError: 'Job lock expired; the worker running it stopped' };
+
+        const failed = await ProcessingJob.updateMany(
+            { ...stale, $expr: { $gte: ['$attempts', '$maxAttempts'] } },
+            { $set: { ...unlock, status: 'failed', completedAt: new Date() } }
+        );
+        const requeued = await ProcessingJob.updateMany(
+            stale,
+            { $set: { ...unlock, status: 'queued', runAt: new Date() } }
+        );
+
+        if (failed.modifiedCount || requeued.modifiedCount) {
+            console.warn(`Recovered stale jobs: ${requeued.modifiedCount} re-queued, ${failed.modifiedCount} failed`);
+        }
+    }
+
+    /**
+     * Lease handed to a job's handler
+     *
+     * @param {Object} claim - Filter matching the job only while this run holds it
+     * @param {AbortController} controller - Aborted on timeout or when the lock is lost
+     * @returns {{signal: AbortSignal, assertHeld: Function}}
+     */
+    createLease(claim, controller) {
+        const { signal } = controller;
+        const throwIfAborted = () => {
+            if (signal.aborted) {
+                throw signal.reason;
+            }
+        };
+        return {
+            signal,
+            assertHeld: async () => {
+                throwIfAborted();
+                if (!await ProcessingJob.exists(claim)) {
+                    controller.abort(new Error('Job lock lost'));
+                }
+                throwIfAborted();
+            }
+        };
+    }
+
+    async runJob(job) {
+        const { handler, onFailed, timeoutMs } = this.handlers.get(job.type);
+        // Only update the job if this claim still holds it; a re-queued job is claimed with a new attempt
+        const claim = { _id: job._id, status: 'running', lockedBy: this.workerId, attempts: job.attempts };
+        console.log(`Running ${job.type} job ${job._id} (attempt ${job.attempts}/${job.maxAttempts})`);
+
+        const controller = new AbortController();
+        const lease = this.createLease(claim, controller);
+
+        // Renew the lock for as long as the handler runs, including past its timeout
+        const heartbeat = setInterval(async () => {
+            try {
+                const renewed = await ProcessingJob.updateOne(claim, { $set: { lockedAt: new Date() } });
+                if (renewed.matchedCount === 0) {
+                    controller.abort(new Error('Job lock lost'));
+                }
+            } catch (error) {
+                console.warn(`Failed to renew lock of job ${job._id}:`, error.message);
+            }
+        }, this.heartbeatMs);
+        heartbeat.unref();
+
+        const timer = timeoutMs > 0
+            ? setTimeout(() => {
+                console.warn(`${job.type} job ${job._id} timed out after ${timeoutMs}ms; waiting for its handler to stop`);
+                controller.abort(new Error(`Job timed out after ${timeoutMs}ms`));
+            }, timeoutMs)
+            : null;
+
+        try {
+            // Wait for the handler itself, not the timeout, so the job is
+            // only released once nothing is running it
+            const result = await handler(job, lease);
+
+            await ProcessingJob.updateOne(claim, {
+                $set: {
+                    status: 'completed',
+                    result: result === undefined ? null : result,
+                    lastError: null,
+                    lockedAt: null,
+                    lockedBy: null,
+                    completedAt: new Date()
+                }
+            });
+            console.log(`Completed ${job.type} job ${job._id}`);
+        } catch (error) {
+            const retry = job.attempts < job.maxAttempts;
+            console.error(`${job.type} job ${job._id} failed (attempt ${job.attempts}/${job.maxAttempts}):`, error.message);
+
+            const update = retry
+                ? { status: 'queued', runAt: new Date(Date.now() + this.retryDelay(job.attempts)) }
+                : { status: 'failed', completedAt: new Date() };
+            const released = await ProcessingJob.updateOne(claim, {
+                $set: { ...update, lastError: error.message, lockedAt: null, lockedBy: null }
+            });
+
+            // A lost lock means another worker has taken the job over
+            if (!retry && onFailed && released.matchedCount > 0) {
+                try {
+                    await onFailed(job, error);
+                } catch (failureError) {
+                    console.error(`Error handling failure of job ${job._id}:`, failureError);
+                }
+            }
+        } finally {
+            clearTimeout(timer);
+            clearInterval(heartbeat);
+        }
+    }
+
+    /**
+     * Exponential backoff with a little jitter
+     * @param {number} attempts - Attempts made so far
+     * @returns {number} Delay in milliseconds
+     */
+    retryDelay(attempts) {
+        const delay = this.retryDelayMs * 2 ** (attempts - 1);
+        return delay + Math.floor(Math.random() * delay * 0.2);
+    }
+
+    /**
+     * Queue depth and job counts by state
+     * @returns {Promise<Object>}
+     */
+    async getStats() {
+        const counts = await ProcessingJob.aggregate([
+            { $group: { _id: '$status', count: { $sum: 1 } } }
+        ]);
+        const byStatus = { queued: 0, running: 0, completed: 0, failed: 0 };
+        counts.forEach(({ _id, count }) => {
+            byStatus[_id] = count;
+        });
+
+        const oldestQueued = await ProcessingJob.findOne({ status: 'queued' })
+            .sort({ runAt: 1 })
+            .select('runAt');
+
+        return {
+            queueDepth: byStatus.queued,
+            jobs: byStatus,
+            oldestQueuedAt: oldestQueued ? oldestQueued.runAt : null,
+            worker: {
+                id: this.workerId,
+                concurrency: this.concurrency,
+                active: this.active.size,
+                started: this.started
+            }
+        };
+    }
+}
+
+let defaultQueue = null;
+
+/**
+ * Get the shared job queue, configured from the environment
+ *
+ * JOB_CONCURRENCY       - jobs run at once by this server (default: PYTHON_POOL_SIZE, else min(4, CPU count))
+ * JOB_MAX_ATTEMPTS      - attempts before a job is marked failed (default: 3)
+ * JOB_RETRY_DELAY_MS    - delay before the first retry, doubled each time (default: 5000)
+ * JOB_TIMEOUT_MS        - per-job timeout in milliseconds, after which the job is aborted (default: 180000)
+ * JOB_POLL_INTERVAL_MS  - how often to look for runnable jobs (default: 2000)
+ *
+ * @returns {JobQueue}
+ */
+function getJobQueue() {
+    if (!defaultQueue) {
+        defaultQueue = new JobQueue({
+            concurrency: parseInt(process.env.JOB_CONCURRENCY, 10)
+                || parseInt(process.env.PYTHON_POOL_SIZE, 10)
+                || Math.min(4, os.cpus().length),
+            maxAttempts: parseInt(process.env.JOB_MAX_ATTEMPTS, 10) || 3,
+            retryDelayMs: parseInt(process.env.JOB_RETRY_DELAY_MS, 10) || 5000,
+            jobTimeoutMs: parseInt(process.env.JOB_TIMEOUT_MS, 10) || 180000,
+            pollIntervalMs: parseInt(process.env.JOB_POLL_INTERVAL_MS, 10) || 2000
+        });
+    }
+    return defaultQueue;
+}
+
+module.exports = {
+    JobQueue,
+    getJobQueue
+};
@@ -0,0 +1,282 @@
+// services/pdfStorageService.js
+const mongoose = require('mongoose');
+const BankStatement = require('../models/BankStatement');
+const { computePdfHash } = require('../utils/parseResultCache');
+
+const BUCKET_NAME = 'statementPdfs';
+
+// MongoDB duplicate key error
+const DUPLICATE_KEY = 11000;
+
+// A reference taken this long ago without a statement to hold it was leaked
+const REF_REPAIR_GRACE_MS = 24 * 60 * 60 * 1000;
+
+/**
+ * Get the GridFS bucket holding statement PDFs
+ * @returns {mongoose.mongo.GridFSBucket}
+ */
+function getBucket() {
+    return new mongoose.mongo.GridFSBucket(mongoose.connection.db, { bucketName: BUCKET_NAME });
+}
+
+function filesCollection() {
+    return mongoose.connection.db.collection(`${BUCKET_NAME}.files`);
+}
+
+function chunksCollection() {
+    return mongoose.connection.db.collection(`${BUCKET_NAME}.chunks`);
+}
+
+/**
+ * Remove the extra copies of a PDF left by uploads that raced before
+ * filenames were unique, keeping the oldest
+ */
+async function removeDuplicateBlobs() {
+    const duplicates = await filesCollection().aggregate([
+        { $sort: { uploadDate: 1 } },
+        { $group: { _id: '$filename', ids: { $push: '$_id' }, count: { $sum: 1 } } },
+        { $match: { count: { $gt: 1 } } }
+    ]).toArray();
+
+    const bucket = getBucket();
+    for (const { ids } of duplicates) {
+        for (const id of ids.slice(1)) {
+            await bucket.delete(id);
+        }
+    }
+}
+
+/**
+ * Recount the references of blobs whose count may have leaked
+ *
+ * A storePdf whose statement was never saved (e.g. the process died in
+ * between) leaves its reference behind, so the blob would never be
+ * deleted. Each blob is checked once after its last storePdf has had time
+ * to finish: its count is set to the statements that hold it, and a blob
+ * no statement holds is deleted. Every update is guarded on referencedAt,
+ * so a blob referenced again meanwhile is left alone.
+ */
+async function repairPdfRefs() {
+    const files = filesCollection();
+    const cutoff = new Date(Date.now() - REF_REPAIR_GRACE_MS);
+    const unverified = files.find({
+        'metadata.verified': { $ne: true },
+        $or: [
+            { 'metadata.referencedAt': { $lt: cutoff } },
+            { 'metadata.referencedAt': { $exists: false }, uploadDate: { $lt: cutoff } }
+        ]
+    }).project({ filename: 1, metadata: 1 });
+
+    let repaired = 0;
+    for await (const file of unverified) {
+        const unchanged = { _id: file._id, 'metadata.referencedAt': file.metadata?.referencedAt ?? null };
+        const refs = await BankStatement.countDocuments({ pdfHash: file.filename });
+        if (refs > 0) {
+            const { modifiedCount } = await files.updateOne(unchanged, {
+                $set: { 'metadata.refs': refs, 'metadata.verified': true }
+            });
+            repaired += modifiedCount > 0 && file.metadata?.refs !== refs ? 1 : 0;
+            continue;
+        }
+        const { deletedCount } = await files.deleteOne(unchanged);
+        if (deletedCount > 0) {
+            await chunksCollection().deleteMany({ files_id: file._id });
+            repaired++;
+        }
+    }
+    if (repaired > 0) {
+        console.log(`Repaired the reference counts of ${repaired} stored PDFs`);
+    }
+}
+
+/**
+ * Make filenames unique and give every blob a reference count
+ *
+ * Blobs stored before reference counting are counted from the statements
+ * that reference them. Leaked references are repaired in the background.
+ */
+async function preparePdfStore() {
+    const files = filesCollection();
+    const index = { filename: 1 };
+    try {
+        await files.createIndex(index, { unique: true });
+    } catch (error) {
+        if (error.code !== DUPLICATE_KEY) {
+            throw error;
+        }
+        await removeDuplicateBlobs();
+        await files.createIndex(index, { unique: true });
+    }
+
+    for await (const file of files.find({ 'metadata.refs': { $exists: false } }).project({ filename: 1 })) {
+        const refs = await BankStatement.countDocuments({ pdfHash: file.filename });
+        await files.updateOne(
+            { _id: file._id, 'metadata.refs': { $exists: false } },
+            { $set: { 'metadata.refs': refs } }
+        );
+    }
+
+    repairPdfRefs().catch(error => console.error('Failed to repair stored PDF reference counts:', error));
+}
+
+let prepared = null;
+
+/**
+ * The GridFS files collection, once preparePdfStore has run in this process
+ * @returns {Promise<Collection>}
+ */
+async function pdfFiles() {
+    if (!prepared) {
+        prepared = preparePdfStore().catch((error) => {
+            prepared = null;
+            throw error;
+        });
+    }
+    await prepared;
+    return filesCollection();
+}
+
+/**
+ * Upload a new blob holding one reference
+ * @returns {Promise<boolean>} False if a concurrent upload of the same PDF got there first
+ */
+async function uploadPdf(pdfHash, pdfBuffer, fileName) {
+    const upload = getBucket().openUploadStream(pdfHash, {
+        metadata: { originalName: fileName, contentType: 'application/pdf', refs: 1, referencedAt: new Date() }
+    });
+    try {
+        await new Promise((resolve, reject) => {
+            upload.once('finish', resolve);
+            upload.once('error', reject);
+            upload.end(pdfBuffer);
+        });
+        return true;
+    } catch (error) {
+        if (error.code !== DUPLICATE_KEY) {
+            throw error;
+        }
+        // The files document is written last, so only this upload's chunks were stored
+        await chunksCollection().deleteMany({ files_id: upload.id });
+        return false;
+    }
+}
+
+/**
+ * Store a PDF in GridFS, content-addressed by its SHA-256, and take a
+ * reference to it
+ *
+ * Identical PDFs are stored once; statements reference the blob by hash.
+ * Filenames are unique and each blob counts its references, so concurrent
+ * uploads of the same PDF share one blob, and a blob is only deleted by
+ * the releasePdf that drops its last reference. Every storePdf must be
+ * matched by one releasePdf when the statement is deleted, or by one when
+ * the statement is never saved; references leaked anyway are repaired by
+ * repairPdfRefs.
+ *
+ * @param {Buffer} pdfBuffer - The PDF file as a buffer
+ * @param {string} fileName - Original filename, kept as metadata
+ * @returns {Promise<{pdfHash: string, pdfSize: number}>}
+ */
+async function storePdf(pdfBuffer, fileName) {
+    const pdfHash = computePdfHash(pdfBuffer);
+    const files = await pdfFiles();
+
+    for (;;) {
+        const referenced = await files.updateOne({ filename: pdfHash }, {
+            $inc: { 'metadata.refs': 1 },
+            $set: { 'metadata.referencedAt': new Date() },
+            $unset: { 'metadata.verified': '' }
+        });
+        if (referenced.matchedCount > 0) {
+            break;
+        }
+        if (await uploadPdf(pdfHash, pdfBuffer, fileName)) {
+            console.log(`Stored PDF ${pdfHash.substring(0, 12)} in GridFS (${pdfBuffer.length} bytes)`);
+            break;
+        }
+        // Lost the race to another upload; reference its blob instead
+    }
+
+    return { pdfHash, pdfSize: pdfBuffer.length };
+}
+
+/**
+ * Open a stream over a stored PDF
+ * @param {string} pdfHash - SHA-256 of the PDF
+ * @returns {Readable}
+ */
+function openPdfStream(pdfHash) {
+    return getBucket().openDownloadStreamByName(pdfHash);
+}
+
+/**
+ * Open the PDF for a statement, whether it lives in GridFS or (for
+ * documents not yet migrated) inline in pdfData
+ *
+ * Inline PDFs are returned as the Buffer itself; stored PDFs as a download
+ * stream together with their byte length.
+ *
+ * @param {Object} statement - BankStatement document; legacy documents must be loaded with '+pdfData'
+ * @returns {Promise<{source: (Buffer|Readable), pdfHash: string, pdfSize: number}>}
+ */
+async function openStatementPdf(statement) {
+    if (statement.pdfHash) {
+        let pdfSize = statement.pdfSize;
+        if (!pdfSize) {
+            const [file] = await getBucket().find({ filename: statement.pdfHash }).limit(1).toArray();
+            if (!file) {
+                throw new Error(`Stored PDF ${statement.pdfHash.substring(0, 12)} not found`);
+            }
+            pdfSize = file.length;
+        }
+        return { source: openPdfStream(statement.pdfHash), pdfHash: statement.pdfHash, pdfSize };
+    }
+
+    if (statement.pdfData) {
+        return {
+            source: statement.pdfData,
+            pdfHash: computePdfHash(statement.pdfData),
+            pdfSize: statement.pdfData.length
+        };
+    }
+
+    throw new Error('Statement has no stored PDF');
+}
+
+/**
+ * Drop a reference taken by storePdf, deleting the blob with its last one
+ * @param {string} pdfHash - SHA-256 of the PDF
+ * @returns {Promise<boolean>} Whether the blob was deleted
+ */
+async function releasePdf(pdfHash) {
+    if (!pdfHash) {
+        return false;
+    }
+
+    const files = await pdfFiles();
+    const file = await files.findOneAndUpdate(
+        { filename: pdfHash },
+        { $inc: { 'metadata.refs': -1 } },
+        { returnDocument: 'after', projection: { metadata: 1 } }
+    );
+    if (!file || file.metadata.refs > 0) {
+        return false;
+    }
+
+    // A storePdf that took a new reference in the meantime keeps the blob
+    const { deletedCount } = await files.deleteOne({ _id: file._id, 'metadata.refs': { $lte: 0 } });
+    if (deletedCount === 0) {
+        return false;
+    }
+    await chunksCollection().deleteMany({ files_id: file._id });
+    return true;
+}
+
+module.exports = {
+    BUCKET_NAME,
+    getBucket,
+    storePdf,
+    openPdfStream,
+    openStatementPdf,
+    releasePdf
+};
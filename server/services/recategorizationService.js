@@ -0,0 +1,306 @@
+// services/recategorizationService.js
+const BankStatement = require('../models/BankStatement');
+const CategoryRules = require('../models/CategoryRules');
+const ProcessingJob = require('../models/ProcessingJob');
+const RecurringCharge = require('../models/RecurringCharge');
+const Transaction = require('../models/Transaction');
+const { getParserInfo, merchantKeys, recategorizeMerchants } = require('../utils/pythonExecutor');
+const { statementTotals } = require('./duplicateService');
+const { rebuildRecurringCharges } = require('./recurringService');
+const { rebuildRollups } = require('./rollupService');
+const { addTransactions, escapeRegExp } = require('./transactionService');
+
+const RECATEGORIZE_JOB = 'recategorizeTransactions';
+
+// Merchants per $in list, and statements per totals refresh
+const MERCHANT_BATCH_SIZE = 500;
+const STATEMENT_BATCH_SIZE = 200;
+
+function chunk(items, size) {
+    const chunks = [];
+    for (let i = 0; i < items.length; i += size) {
+        chunks.push(items.slice(i, i + size));
+    }
+    return chunks;
+}
+
+/**
+ * The keyword table stored categories were last brought up to date with
+ * @returns {Promise<Object|null>} CategoryRules document
+ */
+async function appliedRules() {
+    return CategoryRules.findOne().sort({ appliedAt: -1 }).lean();
+}
+
+/**
+ * One updateMany per target category and merchant batch
+ *
+ * @param {Map<string, string[]>} merchantsByCategory - New category to merchant keys
+ * @param {Function} operation - (category, merchants) => bulkWrite operation
+ * @returns {Array<Object>}
+ */
+function categoryOperations(merchantsByCategory, operation) {
+    const operations = [];
+    for (const [category, merchants] of merchantsByCategory) {
+        for (const batch of chunk(merchants, MERCHANT_BATCH_SIZE)) {
+            operations.push(operation(category, batch));
+        }
+    }
+    return operations;
+}
+
+/**
+ * Recompute the debit category breakdown of statements whose transactions were recategorized
+ * @param {Array<ObjectId>} statementIds
+ */
+async function refreshCategoryBreakdowns(statementIds) {
+    for (const batch of chunk(statementIds, STATEMENT_BATCH_SIZE)) {
+        const statements = await BankStatement.find({ _id: { $in: batch } })
+            .select('mlResults.expenses')
+            .lean();
+        if (statements.length === 0) {
+            continue;
+        }
+        await BankStatement.bulkWrite(statements.map(statement => ({
+            updateOne: {
+                filter: { _id: statement._id },
+                update: {
+                    $set: { 'mlResults.categoryBreakdown': statementTotals(statement.mlResults?.expenses || []).categoryBreakdown }
+                }
+            }
+        })), { ordered: false });
+    }
+}
+
+/**
+ * Derive the merchant keys of stored transactions again where the
+ * description holds a keyword that keys now keep whole, or no longer do
+ *
+ * Merchant keys keep the keyword table's digit-bearing keywords intact, so
+ * adding or removing one changes the key of every description containing
+ * it; a stored key would otherwise never match the rule, nor the keys of
+ * new uploads. The matching expenses get their new merchant and category
+ * and the statements' Transaction rows are rebuilt, so dedupKey follows.
+ *
+ * The description search scans the statements, which is acceptable for a
+ * change that only happens when such a keyword is added or removed.
+ *
+ * @param {string[]} keywords - Keywords added to or removed from the guarded set
+ * @param {Function} checkpoint - Called before each round of writes
+ * @returns {Promise<Array<Object>>} The rekeyed statements' _id and userId
+ */
+async function rekeyMerchants(keywords, checkpoint) {
+    const pattern = new RegExp(keywords.map(escapeRegExp).join('|'), 'i');
+    const statements = await BankStatement.find({ isProcessed: true, 'mlResults.expenses.description': pattern })
+        .select('userId mlResults.expenses.description')
+        .lean();
+    if (statements.length === 0) {
+        return [];
+    }
+
+    const descriptions = [...new Set(statements.flatMap(statement => statement.mlResults.expenses
+        .map(expense => expense.description)
+        .filter(description => pattern.test(description))))];
+    const keys = await merchantKeys(descriptions);
+    const statementIds = statements.map(statement => statement._id);
+
+    await checkpoint();
+    for (const batch of chunk(descriptions, MERCHANT_BATCH_SIZE)) {
+        await BankStatement.bulkWrite(batch.map(description => ({
+            updateMany: {
+                filter: { _id: { $in: statementIds }, 'mlResults.expenses.description': description },
+                update: {
+                    $set: {
+                        'mlResults.expenses.$[expense].merchant': keys[description].merchant,
+                        'mlResults.expenses.$[expense].category': keys[description].category
+                    }
+                },
+                arrayFilters: [{ 'expense.description': description }]
+            }
+        })), { ordered: false });
+    }
+
+    await checkpoint();
+    for (const batch of chunk(statementIds, STATEMENT_BATCH_SIZE)) {
+        await addTransactions(await BankStatement.find({ _id: { $in: batch } })
+            .select('userId bankName uploadDate statementPeriod isProcessed mlResults.expenses')
+            .lean());
+    }
+
+    console.log(`Rekeyed ${descriptions.length} descriptions in ${statements.length} statements for keywords ${keywords.join(', ')}`);
+    return statements.map(statement => ({ _id: statement._id, userId: statement.userId }));
+}
+
+/**
+ * Bring every stored transaction's category up to date with the parser's
+ * current categories.json, without reading any PDF again
+ *
+ * The parser compares the current keyword table with the one last applied
+ * and recategorizes only the stored merchant keys containing a changed
+ * keyword. Statements, transactions and recurring charges holding those
+ * merchants are updated with batched bulkWrites, then the affected
+ * statements' category breakdowns and their users' monthly rollups are
+ * refreshed. The first run, with no table to compare against, checks
+ * every merchant. When the digit-bearing keywords change, the merchant keys
+ * holding them are derived again from the descriptions (see rekeyMerchants)
+ * and those users' recurring charges are rebuilt.
+ *
+ * The applied version is only recorded at the end, so a run that stops
+ * part-way is simply repeated; every write is idempotent.
+ *
+ * @param {Object} [options]
+ * @param {boolean} [options.full] - Recategorize every merchant regardless of what changed
+ * @param {Object} [options.lease] - Job lease; checked before each round of writes
+ * @returns {Promise<Object>} What was changed
+ */
+async function recategorizeTransactions(options = {}) {
+    const started = Date.now();
+    const checkpoint = async () => {
+        if (options.lease) {
+            await options.lease.assertHeld();
+        }
+    };
+    const applied = options.full ? null : await appliedRules();
+
+    // Multikey index scan; only statements written since merchant keys were introduced have them
+    const merchants = (await BankStatement.distinct('mlResults.expenses.merchant', { isProcessed: true }))
+        .filter(Boolean);
+    const result = await recategorizeMerchants(merchants, applied ? applied.categories : null);
+    if (applied && applied.version === result.rulesVersion) {
+        return { skipped: 'Category rules unchanged', rulesVersion: result.rulesVersion };
+    }
+
+    const merchantsByCategory = new Map();
+    for (const [merchant, category] of Object.entries(result.categories)) {
+        if (!merchantsByCategory.has(category)) {
+            merchantsByCategory.set(category, []);
+        }
+        merchantsByCategory.get(category).push(merchant);
+    }
+    const affected = Object.keys(result.categories);
+
+    const statements = [];
+    for (const batch of chunk(affected, MERCHANT_BATCH_SIZE)) {
+        statements.push(...await BankStatement.find({ 'mlResults.expenses.merchant': { $in: batch } })
+            .select('_id userId')
+            .lean());
+    }
+    const rekeyed = result.rekeyKeywords && result.rekeyKeywords.length > 0
+        ? await rekeyMerchants(result.rekeyKeywords, checkpoint)
+        : [];
+
+    const touched = [...statements, ...rekeyed];
+    const statementIds = [...new Map(touched.map(statement => [statement._id.toString(), statement._id])).values()];
+    const userIds = [...new Map(touched.map(statement => [statement.userId.toString(), statement.userId])).values()];
+
+    let transactionsUpdated = 0;
+    if (statements.length > 0) {
+        await checkpoint();
+        await BankStatement.bulkWrite(categoryOperations(merchantsByCategory, (category, batch) => ({
+            updateMany: {
+                filter: { _id: { $in: statementIds }, 'mlResults.expenses.merchant': { $in: batch } },
+                update: { $set: { 'mlResults.expenses.$[expense].category': category } },
+                arrayFilters: [{ 'expense.merchant': { $in: batch }, 'expense.category': { $ne: category } }]
+            }
+        })), { ordered: false });
+
+        await checkpoint();
+        const scoped = (category, batch) => ({
+            updateMany: {
+                filter: { userId: { $in: userIds }, merchant: { $in: batch }, category: { $ne: category } },
+                update: { $set: { category } }
+            }
+        });
+        const transactionResult = await Transaction.bulkWrite(categoryOperations(merchantsByCategory, scoped), { ordered: false });
+        transactionsUpdated = transactionResult.modifiedCount || 0;
+        await RecurringCharge.bulkWrite(categoryOperations(merchantsByCategory, scoped), { ordered: false });
+    }
+
+    if (rekeyed.length > 0) {
+        // Charges are keyed by merchant, so the rekeyed users' charges are detected again
+        await checkpoint();
+        for (const userId of new Set(rekeyed.map(statement => statement.userId.toString()))) {
+            await rebuildRecurringCharges({ userId });
+        }
+    }
+
+    if (statementIds.length > 0) {
+        await refreshCategoryBreakdowns(statementIds);
+
+        // One aggregation over all the affected users' statements
+        await checkpoint();
+        await rebuildRollups({ userIds: userIds.map(userId => userId.toString()) });
+    }
+    await checkpoint();
+
+    const summary = {
+        rulesVersion: result.rulesVersion,
+        previousVersion: applied ? applied.version : null,
+        changedKeywords: result.changedKeywords,
+        merchantsChecked: result.checked,
+        merchantsAffected: affected.length,
+        statementsUpdated: statements.length,
+        transactionsUpdated,
+        statementsRekeyed: rekeyed.length
+    };
+    await CategoryRules.updateOne(
+        { version: result.rulesVersion },
+        {
+            $set: {
+                categories: result.rules,
+                appliedAt: new Date(),
+                changedKeywords: summary.changedKeywords,
+                merchantsChecked: summary.merchantsChecked,
+                merchantsAffected: summary.merchantsAffected,
+                statementsUpdated: summary.statementsUpdated,
+                transactionsUpdated: summary.transactionsUpdated,
+                statementsRekeyed: summary.statementsRekeyed
+            }
+        },
+        { upsert: true }
+    );
+
+    console.log(`Recategorized ${affected.length} of ${merchants.length} merchants in ${statements.length} statements ` +
+        `for rules ${result.rulesVersion} in ${Date.now() - started}ms`);
+    return summary;
+}
+
+/**
+ * Queue a recategorization when the parser's category rules differ from
+ * the last applied version and none is already waiting
+ *
+ * @param {JobQueue} queue
+ * @returns {Promise<Object|null>} The queued ProcessingJob, if one was needed
+ */
+async function enqueueRecategorizationIfRulesChanged(queue) {
+    const [{ rulesVersion }, applied] = await Promise.all([getParserInfo(), appliedRules()]);
+    if (applied && applied.version === rulesVersion) {
+        return null;
+    }
+
+    const pending = await ProcessingJob.exists({ type: RECATEGORIZE_JOB, status: { $in: ['queued', 'running'] } });
+    if (pending) {
+        return null;
+    }
+    console.log(`Category rules changed (${applied ? applied.version : 'none applied'} -> ${rulesVersion}); queueing recategorization`);
+    return queue.enqueue(RECATEGORIZE_JOB, { rulesVersion });
+}
+
+/**
+ * Register the recategorization job handler with a job queue
+ *
+ * The job has no timeout: it scales with the whole collection, and the
+ * queue's heartbeat keeps it locked for as long as it runs.
+ *
+ * @param {JobQueue} queue
+ */
+function registerRecategorizationJobs(queue) {
+    queue.register(RECATEGORIZE_JOB, (job, lease) => recategorizeTransactions({ lease }), { timeoutMs: 0 });
+}
+
+module.exports = {
+    RECATEGORIZE_JOB,
+    recategorizeTransactions,
+    enqueueRecategorizationIfRulesChanged,
+    registerRecategorizationJobs
+};
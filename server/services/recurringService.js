@@ -0,0 +1,322 @@
+// services/recurringService.js
+const mongoose = require('mongoose');
+const Transaction = require('../models/Transaction');
+const RecurringCharge = require('../models/RecurringCharge');
+
+const DAY_MS = 24 * 60 * 60 * 1000;
+
+// Accepted gaps in days between consecutive charges for each frequency
+const FREQUENCIES = [
+    { frequency: 'weekly', days: 7, min: 6, max: 8 },
+    { frequency: 'biweekly', days: 14, min: 12, max: 16 },
+    { frequency: 'monthly', days: 30, min: 26, max: 35 },
+    { frequency: 'quarterly', days: 91, min: 84, max: 98 },
+    { frequency: 'annual', days: 365, min: 350, max: 380 }
+];
+
+// Charges within this fraction (or MIN_AMOUNT_TOLERANCE_CENTS) of the
+// previous amount belong to the same series, so price changes carry over
+const AMOUNT_TOLERANCE = 0.2;
+const MIN_AMOUNT_TOLERANCE_CENTS = 100;
+
+// A series needs this many charges (two for annual) and this share of
+// gaps matching its frequency
+const MIN_OCCURRENCES = 3;
+const MIN_REGULARITY = 0.75;
+
+// Intervals after which a series counts as fully established
+const ESTABLISHED_INTERVALS = 4;
+
+// A series is no longer active once this many expected charges are missed
+const MISSED_CHARGES = 2;
+
+// Transactions written per insertMany during a rebuild
+const WRITE_BATCH_SIZE = 1000;
+
+function median(sorted) {
+    const middle = Math.floor(sorted.length / 2);
+    return sorted.length % 2 ? sorted[middle] : (sorted[middle - 1] + sorted[middle]) / 2;
+}
+
+/**
+ * Split one merchant's charges into amount series
+ *
+ * Amounts are sorted once and cut wherever consecutive amounts differ by
+ * more than the tolerance, so a merchant billing two subscriptions (or
+ * one subscription plus one-off purchases) yields separate series.
+ *
+ * @param {Array<Object>} rows - The merchant's debits, oldest first
+ * @returns {Array<Array<Object>>} Series, each oldest first
+ */
+function amountSeries(rows) {
+    const order = rows.map((row, index) => index).sort((a, b) => rows[a].amountCents - rows[b].amountCents);
+    const seriesOf = new Array(rows.length);
+    let series = 0;
+
+    order.forEach((index, position) => {
+        if (position > 0) {
+            const previous = rows[order[position - 1]].amountCents;
+            const tolerance = Math.max(MIN_AMOUNT_TOLERANCE_CENTS, previous * AMOUNT_TOLERANCE);
+            if (rows[index].amountCents - previous > tolerance) {
+                series++;
+            }
+        }
+        seriesOf[index] = series;
+    });
+
+    // Walking the rows in date order keeps each series oldest first
+    const grouped = Array.from({ length: series + 1 }, () => []);
+    rows.forEach((row, index) => grouped[seriesOf[index]].push(row));
+    return grouped;
+}
+
+/**
+ * Classify one amount series as a recurring charge
+ *
+ * @param {string} merchant - Normalized merchant key
+ * @param {Array<Object>} rows - Debits oldest first, with date, amountCents and category
+ * @returns {Object|null} RecurringCharge fields, or null if the series is not periodic
+ */
+function detectSeries(merchant, rows) {
+    // Several charges on one day (e.g. a retried payment) count once
+    const charges = rows.filter((row, index) => index === 0 || row.date.getTime() !== rows[index - 1].date.getTime());
+    if (charges.length < 2) {
+        return null;
+    }
+
+    const intervals = [];
+    for (let i = 1; i < charges.length; i++) {
+        intervals.push(Math.round((charges[i].date - charges[i - 1].date) / DAY_MS));
+    }
+    const intervalDays = Math.round(median([...intervals].sort((a, b) => a - b)));
+    const match = FREQUENCIES.find(({ min, max }) => intervalDays >= min && intervalDays <= max);
+    if (!match) {
+        return null;
+    }
+    const needed = match.frequency === 'annual' ? 2 : MIN_OCCURRENCES;
+    if (charges.length < needed) {
+        return null;
+    }
+
+    const regularity = intervals.filter(days => days >= match.min && days <= match.max).length / intervals.length;
+    if (regularity < MIN_REGULARITY) {
+        return null;
+    }
+
+    const first = charges[0];
+    const last = charges[charges.length - 1];
+    return {
+        merchant,
+        category: last.category || 'Other',
+        frequency: match.frequency,
+        intervalDays,
+        amountCents: Math.round(median(charges.map(charge => charge.amountCents).sort((a, b) => a - b))),
+        lastAmountCents: last.amountCents,
+        occurrences: charges.length,
+        firstDate: first.date,
+        lastDate: last.date,
+        nextExpectedDate: new Date(last.date.getTime() + intervalDays * DAY_MS),
+        confidence: Math.round(regularity * Math.min(1, intervals.length / ESTABLISHED_INTERVALS) * 100) / 100
+    };
+}
+
+/**
+ * Recurring charges in one merchant's debits
+ * @param {string} merchant - Normalized merchant key
+ * @param {Array<Object>} rows - The merchant's debits, oldest first
+ * @returns {Array<Object>}
+ */
+function detectMerchantCharges(merchant, rows) {
+    return amountSeries(rows)
+        .map(series => detectSeries(merchant, series))
+        .filter(Boolean);
+}
+
+/**
+ * Detect recurring charges over the debits matching a query
+ *
+ * The debits are read in (userId, merchant, date) index order, so each
+ * merchant's history arrives as one contiguous run and is classified as
+ * soon as the next merchant starts; only one merchant is held in memory
+ * and the whole scan is linear in the number of transactions.
+ *
+ * @param {Object} query - Transaction query
+ * @param {Function} onCharges - Called with each merchant's detected charges
+ */
+async function scanCharges(query, onCharges) {
+    const cursor = Transaction.find({ ...query, type: 'debit', duplicateOf: null })
+        .sort({ userId: 1, merchant: 1, date: -1, _id: -1 })
+        .select('userId merchant date amountCents category -_id')
+        .lean()
+        .cursor();
+
+    let key = null;
+    let rows = [];
+    const flush = async () => {
+        if (rows.length > 0) {
+            const charges = detectMerchantCharges(rows[0].merchant, rows.reverse())
+                .map(charge => ({ ...charge, userId: rows[0].userId }));
+            if (charges.length > 0) {
+                await onCharges(charges);
+            }
+        }
+        rows = [];
+    };
+
+    for await (const row of cursor) {
+        const rowKey = `${row.userId}|${row.merchant}`;
+        if (rowKey !== key) {
+            await flush();
+            key = rowKey;
+        }
+        rows.push(row);
+    }
+    await flush();
+}
+
+/**
+ * Re-detect recurring charges for the merchants that appear in statements
+ *
+ * Call after the statements' transactions were added to or removed from
+ * the transactions collection. Only the affected merchants' histories are
+ * read and only their RecurringCharge documents are replaced.
+ *
+ * @param {Object|Array<Object>} statements - Statement(s) just processed or deleted
+ * @returns {Promise<number>} Number of recurring charges now stored for those merchants
+ */
+async function refreshRecurringCharges(statements) {
+    const merchantsByUser = new Map();
+    for (const statement of [].concat(statements)) {
+        if (!statement.isProcessed) {
+            continue;
+        }
+        const userId = statement.userId.toString();
+        const merchants = merchantsByUser.get(userId) || new Set();
+        for (const expense of statement.mlResults?.expenses || []) {
+            if (expense.merchant && expense.type !== 'credit') {
+                merchants.add(expense.merchant);
+            }
+        }
+        merchantsByUser.set(userId, merchants);
+    }
+
+    let stored = 0;
+    for (const [userId, merchants] of merchantsByUser) {
+        if (merchants.size === 0) {
+            continue;
+        }
+        const scope = {
+            userId: new mongoose.Types.ObjectId(userId),
+            merchant: { $in: [...merchants] }
+        };
+
+        const charges = [];
+        await scanCharges(scope, async (found) => {
+            charges.push(...found);
+        });
+
+        await RecurringCharge.deleteMany(scope);
+        if (charges.length > 0) {
+            await RecurringCharge.insertMany(charges, { ordered: false, lean: true });
+        }
+        stored += charges.length;
+    }
+    return stored;
+}
+
+/**
+ * Re-detect every recurring charge from the transactions, for backfill or repair
+ * @param {Object} [options]
+ * @param {string} [options.userId] - Only rebuild this user's charges
+ * @returns {Promise<number>} Number of recurring charges written
+ */
+async function rebuildRecurringCharges(options = {}) {
+    const scope = {};
+    if (options.userId) {
+        scope.userId = new mongoose.Types.ObjectId(options.userId);
+    }
+
+    await RecurringCharge.deleteMany(scope);
+
+    let batch = [];
+    let written = 0;
+    const write = async () => {
+        await RecurringCharge.insertMany(batch, { ordered: false, lean: true });
+        written += batch.length;
+        batch = [];
+    };
+
+    await scanCharges({ ...scope, merchant: { $ne: null } }, async (charges) => {
+        batch.push(...charges);
+        if (batch.length >= WRITE_BATCH_SIZE) {
+            await write();
+        }
+    });
+    if (batch.length > 0) {
+        await write();
+    }
+    return written;
+}
+
+/**
+ * Keep recurring charges in step with transactions without failing the
+ * caller; a failed update is repaired by migrations/rebuildRecurringCharges.js
+ *
+ * @param {Object|Array<Object>} statements
+ */
+async function updateRecurringChargesSafely(statements) {
+    try {
+        await refreshRecurringCharges(statements);
+    } catch (error) {
+        console.error('Failed to update recurring charges; run migrations/rebuildRecurringCharges.js to repair:', error);
+    }
+}
+
+/**
+ * A user's recurring charges, next expected first
+ *
+ * @param {string} userId - User ID
+ * @param {Object} [filters]
+ * @param {boolean} [filters.active] - Only charges that have not missed MISSED_CHARGES expected dates
+ * @param {string} [filters.frequency] - Only this frequency
+ * @param {number} [filters.minConfidence] - Only charges at least this confident
+ * @returns {Promise<{charges: Array<Object>, monthlyTotal: number}>}
+ */
+async function getRecurringCharges(userId, filters = {}) {
+    const query = { userId: new mongoose.Types.ObjectId(userId) };
+    if (filters.frequency) {
+        query.frequency = filters.frequency;
+    }
+    if (filters.minConfidence) {
+        query.confidence = { $gte: filters.minConfidence };
+    }
+
+    const now = Date.now();
+    const charges = (await RecurringCharge.find(query)
+        .sort({ nextExpectedDate: 1 })
+        .select('-userId -__v')
+        .lean())
+        .map(charge => ({
+            ...charge,
+            amount: charge.amountCents / 100,
+            lastAmount: charge.lastAmountCents / 100,
+            // Typical cost per 30-day month
+            monthlyCost: Math.round(charge.amountCents * 30 / charge.intervalDays) / 100,
+            active: charge.lastDate.getTime() + charge.intervalDays * MISSED_CHARGES * DAY_MS >= now
+        }))
+        .filter(charge => !filters.active || charge.active);
+
+    return {
+        charges,
+        monthlyTotal: Math.round(charges.reduce((sum, charge) => sum + charge.monthlyCost * 100, 0)) / 100
+    };
+}
+
+module.exports = {
+    FREQUENCIES,
+    detectMerchantCharges,
+    refreshRecurringCharges,
+    rebuildRecurringCharges,
+    updateRecurringChargesSafely,
+    getRecurringCharges
+};
@@ -0,0 +1,439 @@
+// services/rollupService.js
+const mongoose = require('mongoose');
+const BankStatement = require('../models/BankStatement');
+const MonthlyRollup = require('../models/MonthlyRollup');
+const { inferTransactionDate } = require('./transactionService');
+
+// Statement fields needed to take a deleted statement out of the rollups
+const ROLLUP_FIELDS = 'userId uploadDate statementPeriod bankName isProcessed rolledUpAt mlResults.expenses';
+
+/**
+ * Rollup month of a date: its UTC year and month
+ * @param {Date} date
+ * @returns {string} YYYY-MM
+ */
+function rollupMonth(date) {
+    return new Date(date).toISOString().substring(0, 7);
+}
+
+/**
+ * Rollup month of one of a statement's transactions: the month it
+ * happened in, or the statement's closing month if its date is unreadable
+ *
+ * @param {Object} transaction - Entry of mlResults.expenses
+ * @param {Object} statement - BankStatement the transaction belongs to
+ * @returns {string} YYYY-MM
+ */
+function transactionMonth(transaction, statement) {
+    const date = inferTransactionDate(transaction.date, statement);
+    return rollupMonth(date || statement.statementPeriod?.end || statement.uploadDate);
+}
+
+/**
+ * Aggregation expression for transactionMonth over an unwound
+ * mlResults.expenses, so rebuilds bucket exactly like incremental updates
+ *
+ * Mirrors inferTransactionDate: a date without a year takes the year of
+ * the statement period's end (or upload date), less one if its month falls
+ * after that date's month, and rollovers such as 02/30 are unreadable.
+ */
+const TRANSACTION_MONTH = {
+    $let: {
+        vars: {
+            reference: { $ifNull: ['$statementPeriod.end', '$uploadDate'] },
+            found: {
+                $regexFind: {
+                    input: { $trim: { input: { $ifNull: ['$mlResults.expenses.date', ''] } } },
+                    regex: '^(\\d{1,2})/(\\d{1,2})(?:/(\\d{2}|\\d{4}))?$'
+                }
+            }
+        },
+        in: {
+            $let: {
+                vars: {
+                    month: { $toInt: { $arrayElemAt: ['$$found.captures', 0] } },
+                    day: { $toInt: { $arrayElemAt: ['$$found.captures', 1] } },
+                    year: { $toInt: { $arrayElemAt: ['$$found.captures', 2] } }
+                },
+                in: {
+                    $let: {
+                        vars: {
+                            date: {
+                                $dateFromParts: {
+                                    year: {
+                                        $cond: [
+                                            { $eq: ['$$year', null] },
+                                            {
+                                                $subtract: [
+                                                    { $year: '$$reference' },
+                                                    { $cond: [{ $gt: ['$$month', { $month: '$$reference' }] }, 1, 0] }
+                                                ]
+                                            },
+                                            { $cond: [{ $lt: ['$$year', 100] }, { $add: ['$$year', 2000] }, '$$year'] }
+                                        ]
+                                    },
+                                    month: '$$month',
+                                    day: '$$day'
+                                }
+                            }
+                        },
+                        in: {
+                            $dateToString: {
+                                format: '%Y-%m',
+                                date: {
+                                    $cond: [
+                                        {
+                                            $and: [
+                                                { $ne: ['$$date', null] },
+                                                { $eq: [{ $month: '$$date' }, '$$month'] },
+                                                { $eq: [{ $dayOfMonth: '$$date' }, '$$day'] }
+                                            ]
+                                        },
+                                        '$$date',
+                                        '$$reference'
+                                    ]
+                                }
+                            }
+                        }
+                    }
+                }
+            }
+        }
+    }
+};
+
+function rollupKey(row) {
+    return {
+        userId: row.userId,
+        month: row.month,
+        bankName: row.bankName,
+        category: row.category,
+        type: row.type
+    };
+}
+
+/**
+ * Aggregate one statement's transactions, other than duplicates, into rollup rows
+ * @param {Object} statement - Processed BankStatement (with mlResults.expenses)
+ * @returns {Array<Object>} One row per transaction month, category and type
+ */
+function statementRollupRows(statement) {
+    const bankName = statement.bankName || 'Unknown Bank';
+    const rows = new Map();
+
+    for (const transaction of statement.mlResults?.expenses || []) {
+        // Duplicates of another statement's transactions are counted there
+        if (transaction.duplicateOf) {
+            continue;
+        }
+        const month = transactionMonth(transaction, statement);
+        const type = transaction.type === 'credit' ? 'credit' : 'debit';
+        const category = transaction.category || 'Other';
+        const key = `${month}|${category}|${type}`;
+
+        let row = rows.get(key);
+        if (!row) {
+            row = {
+                userId: statement.userId,
+                month,
+                bankName,
+                category,
+                type,
+                sum: 0,
+                count: 0,
+                min: transaction.amount,
+                max: transaction.amount
+            };
+            rows.set(key, row);
+        }
+        row.sum += transaction.amount;
+        row.count++;
+        row.min = Math.min(row.min, transaction.amount);
+        row.max = Math.max(row.max, transaction.amount);
+    }
+
+    return [...rows.values()];
+}
+
+// Rollup writes made by this process (incremental updates and rebuilds) run
+// one after another, so a rebuild never replaces rows while an update is
+// between claiming its statements and applying them
+let rollupWrites = Promise.resolve();
+
+function serializeRollupWrite(write) {
+    const run = rollupWrites.catch(() => {}).then(write);
+    rollupWrites = run;
+    return run;
+}
+
+/**
+ * Add processed statements to the monthly rollups
+ *
+ * Each statement is claimed by setting rolledUpAt with a guarded update
+ * first, and only the statements claimed here are added, so repeating the
+ * call never counts a statement twice.
+ *
+ * @param {Object|Array<Object>} statements - Statement(s) that have just been processed
+ */
+function addToRollups(statements) {
+    return serializeRollupWrite(() => addToRollupsNow(statements));
+}
+
+async function addToRollupsNow(statements) {
+    const now = new Date();
+    const operations = [];
+
+    for (const statement of [].concat(statements)) {
+        if (!statement.isProcessed) {
+            continue;
+        }
+        const claim = await BankStatement.updateOne(
+            { _id: statement._id, isProcessed: true, rolledUpAt: null },
+            { $set: { rolledUpAt: now } }
+        );
+        if (claim.modifiedCount === 0) {
+            continue;
+        }
+        statement.rolledUpAt = now;
+
+        for (const row of statementRollupRows(statement)) {
+            operations.push({
+                updateOne: {
+                    filter: rollupKey(row),
+                    update: {
+                        $inc: { sum: row.sum, count: row.count },
+                        $min: { min: row.min },
+                        $max: { max: row.max },
+                        $set: { updatedAt: now }
+                    },
+                    upsert: true
+                }
+            });
+        }
+    }
+
+    if (operations.length > 0) {
+        await MonthlyRollup.bulkWrite(operations, { ordered: false });
+    }
+}
+
+/**
+ * Whether a statement was counted in the rollups, releasing its claim
+ *
+ * A statement that still exists is released with a guarded update, so only
+ * one caller takes it out; a deleted one was counted if the copy returned
+ * by the delete says so.
+ */
+async function releaseRollupClaim(statement) {
+    if (!statement.rolledUpAt) {
+        return false;
+    }
+    const release = await BankStatement.updateOne(
+        { _id: statement._id, rolledUpAt: { $ne: null } },
+        { $set: { rolledUpAt: null } }
+    );
+    const counted = release.modifiedCount === 1 || !(await BankStatement.exists({ _id: statement._id }));
+    // Taking the same copy out again is a no-op
+    statement.rolledUpAt = null;
+    return counted;
+}
+
+/**
+ * Take deleted statements back out of the monthly rollups
+ *
+ * Only statements counted by addToRollups (or a rebuild) are taken out.
+ * Sums and counts are decremented; min and max cannot be, so they are
+ * recomputed from the remaining statements of each affected month.
+ *
+ * @param {Object|Array<Object>} statements - Statement(s) that have just been deleted
+ */
+function removeFromRollups(statements) {
+    return serializeRollupWrite(() => removeFromRollupsNow(statements));
+}
+
+async function removeFromRollupsNow(statements) {
+    const now = new Date();
+    const operations = [];
+    const affectedMonths = new Map();
+
+    for (const statement of [].concat(statements)) {
+        if (!statement.isProcessed || !(await releaseRollupClaim(statement))) {
+            continue;
+        }
+        for (const row of statementRollupRows(statement)) {
+            operations.push({
+                updateOne: {
+                    filter: rollupKey(row),
+                    update: { $inc: { sum: -row.sum, count: -row.count }, $set: { updatedAt: now } }
+                }
+            });
+            affectedMonths.set(`${row.userId}|${row.month}`, { userId: row.userId, month: row.month });
+        }
+    }
+
+    if (operations.length === 0) {
+        return;
+    }
+    await MonthlyRollup.bulkWrite(operations, { ordered: false });
+
+    const monthsByUser = new Map();
+    for (const { userId, month } of affectedMonths.values()) {
+        monthsByUser.set(userId.toString(), [...(monthsByUser.get(userId.toString()) || []), month]);
+    }
+    await MonthlyRollup.deleteMany({
+        userId: { $in: [...monthsByUser.keys()].map(id => new mongoose.Types.ObjectId(id)) },
+        count: { $lte: 0 }
+    });
+
+    for (const [userId, months] of monthsByUser) {
+        await refreshMonthExtremes(new mongoose.Types.ObjectId(userId), months);
+    }
+}
+
+/**
+ * Recompute min and max for some of a user's months from their statements
+ *
+ * Any statement may hold transactions from a month, so all of the user's
+ * statements are read; this only runs when statements are deleted.
+ */
+async function refreshMonthExtremes(userId, months) {
+    const extremes = await BankStatement.aggregate([
+        { $match: { userId, isProcessed: true, rolledUpAt: { $ne: null } } },
+        { $unwind: '$mlResults.expenses' },
+        { $match: { 'mlResults.expenses.duplicateOf': null } },
+        { $set: { transactionMonth: TRANSACTION_MONTH } },
+        { $match: { transactionMonth: { $in: months } } },
+        {
+            $group: {
+                _id: {
+                    month: '$transactionMonth',
+                    bankName: { $ifNull: ['$bankName', 'Unknown Bank'] },
+                    category: { $ifNull: ['$mlResults.expenses.category', 'Other'] },
+                    type: { $cond: [{ $eq: ['$mlResults.expenses.type', 'credit'] }, 'credit', 'debit'] }
+                },
+                min: { $min: '$mlResults.expenses.amount' },
+                max: { $max: '$mlResults.expenses.amount' }
+            }
+        }
+    ]);
+
+    if (extremes.length === 0) {
+        return;
+    }
+    await MonthlyRollup.bulkWrite(extremes.map(({ _id, min, max }) => ({
+        updateOne: {
+            filter: { userId, ..._id },
+            update: { $set: { min, max } }
+        }
+    })), { ordered: false });
+}
+
+/**
+ * Rebuild the rollups from the statements, for backfill or repair
+ *
+ * Every processed statement not yet counted is claimed for the rebuild
+ * (see addToRollups), then every rollup is replaced in place from the
+ * claimed statements and stamped with the rebuild's start time, and the
+ * rollups not written since then are removed, so readers never see a user
+ * without rollups. A statement processed once the claims are taken is left
+ * to its own addToRollups. Rebuilds and incremental updates started by
+ * this process are queued rather than interleaved.
+ *
+ * @param {Object} [options]
+ * @param {string} [options.userId] - Only rebuild this user's rollups
+ * @param {Array<string>} [options.userIds] - Only rebuild these users' rollups
+ * @returns {Promise<number>} Number of rollup documents written
+ */
+function rebuildRollups(options = {}) {
+    return serializeRollupWrite(() => rebuildRollupsNow(options));
+}
+
+async function rebuildRollupsNow(options) {
+    const started = new Date();
+    const match = { isProcessed: true };
+    const scope = {};
+    if (options.userId) {
+        match.userId = new mongoose.Types.ObjectId(options.userId);
+        scope.userId = match.userId;
+    } else if (options.userIds) {
+        match.userId = { $in: options.userIds.map(id => new mongoose.Types.ObjectId(id)) };
+        scope.userId = match.userId;
+    }
+
+    await BankStatement.updateMany({ ...match, rolledUpAt: null }, { $set: { rolledUpAt: started } });
+
+    // $merge needs the unique key index to exist
+    await MonthlyRollup.init();
+    await BankStatement.aggregate([
+        { $match: { ...match, rolledUpAt: { $ne: null } } },
+        { $unwind: '$mlResults.expenses' },
+        { $match: { 'mlResults.expenses.duplicateOf': null } },
+        {
+            $group: {
+                _id: {
+                    userId: '$userId',
+                    month: TRANSACTION_MONTH,
+                    bankName: { $ifNull: ['$bankName', 'Unknown Bank'] },
+                    category: { $ifNull: ['$mlResults.expenses.category', 'Other'] },
+                    type: { $cond: [{ $eq: ['$mlResults.expenses.type', 'credit'] }, 'credit', 'debit'] }
+                },
+                sum: { $sum: '$mlResults.expenses.amount' },
+                count: { $sum: 1 },
+                min: { $min: '$mlResults.expenses.amount' },
+                max: { $max: '$mlResults.expenses.amount' }
+            }
+        },
+        {
+            $project: {
+                _id: 0,
+                userId: '$_id.userId',
+                month: '$_id.month',
+                bankName: '$_id.bankName',
+                category: '$_id.category',
+                type: '$_id.type',
+                sum: 1,
+                count: 1,
+                min: 1,
+                max: 1,
+                updatedAt: started
+            }
+        },
+        {
+            $merge: {
+                into: MonthlyRollup.collection.name,
+                on: ['userId', 'month', 'bankName', 'category', 'type'],
+                whenMatched: 'replace',
+                whenNotMatched: 'insert'
+            }
+        }
+    ]);
+    await MonthlyRollup.deleteMany({ ...scope, updatedAt: { $lt: started } });
+
+    return MonthlyRollup.countDocuments(scope);
+}
+
+/**
+ * Keep rollups in step with statements without failing the caller;
+ * a failed update is repaired by migrations/rebuildMonthlyRollups.js
+ *
+ * @param {Function} update - addToRollups or removeFromRollups
+ * @param {Object|Array<Object>} statements
+ */
+async function updateRollupsSafely(update, statements) {
+    try {
+        await update(statements);
+    } catch (error) {
+        console.error('Failed to update monthly rollups; run migrations/rebuildMonthlyRollups.js to repair:', error);
+    }
+}
+
+module.exports = {
+    ROLLUP_FIELDS,
+    rollupMonth,
+    transactionMonth,
+    statementRollupRows,
+    addToRollups,
+    removeFromRollups,
+    rebuildRollups,
+    updateRollupsSafely
+};
@@ -0,0 +1,335 @@
+// services/transactionService.js
+const crypto = require('crypto');
+const mongoose = require('mongoose');
+const Transaction = require('../models/Transaction');
+
+const DEFAULT_PAGE_SIZE = 50;
+const MAX_PAGE_SIZE = 200;
+
+/**
+ * Turn a statement date (MM/DD, MM/DD/YY or MM/DD/YYYY) into a full date
+ *
+ * Dates without a year take it from the statement period's end date (or,
+ * for statements without a detected period, the upload date). A month
+ * after that reference month belongs to the previous year, which covers
+ * statements that span New Year.
+ *
+ * @param {string} rawDate - Date as printed on the statement
+ * @param {Object} statement - BankStatement the transaction belongs to
+ * @returns {Date|null} UTC midnight of the transaction date, or null if it cannot be read
+ */
+function inferTransactionDate(rawDate, statement) {
+    const match = /^(\d{1,2})\/(\d{1,2})(?:\/(\d{2}|\d{4}))?$/.exec((rawDate || '').trim());
+    if (!match) {
+        return null;
+    }
+
+    const month = parseInt(match[1], 10);
+    const day = parseInt(match[2], 10);
+    let year;
+
+    if (match[3]) {
+        year = parseInt(match[3], 10);
+        if (year < 100) {
+            year += 2000;
+        }
+    } else {
+        const reference = new Date(statement.statementPeriod?.end || statement.uploadDate);
+        year = reference.getUTCFullYear();
+        if (month > reference.getUTCMonth() + 1) {
+            year--;
+        }
+    }
+
+    const date = new Date(Date.UTC(year, month - 1, day));
+    // Reject rollovers such as 02/30
+    if (date.getUTCMonth() !== month - 1 || date.getUTCDate() !== day) {
+        return null;
+    }
+    return date;
+}
+
+/**
+ * Hash of the fields that identify one transaction on one account
+ *
+ * Statements carry no account number, so the bank stands in for the
+ * account. The merchant key (or, failing that, the description with
+ * whitespace collapsed) absorbs formatting differences between statements.
+ * The date is deliberately left out so that shifted posting dates can
+ * still be matched; see services/duplicateService.js.
+ *
+ * @param {string} bankName - Statement bank
+ * @param {Object} expense - Transaction from mlResults.expenses
+ * @returns {string}
+ */
+function dedupKey(bankName, expense) {
+    const merchant = expense.merchant || expense.description.toUpperCase().replace(/\s+/g, ' ').trim();
+    const type = expense.type === 'credit' ? 'credit' : 'debit';
+    return crypto.createHash('sha1')
+        .update(`${bankName || 'Unknown Bank'}|${type}|${Math.round(expense.amount * 100)}|${merchant}`)
+        .digest('base64url')
+        .substring(0, 16);
+}
+
+/**
+ * Build Transaction documents for a processed statement
+ * @param {Object} statement - Processed BankStatement (with mlResults.expenses)
+ * @returns {Array<Object>}
+ */
+function statementTransactionRows(statement) {
+    const rows = [];
+    for (const expense of statement.mlResults?.expenses || []) {
+        const date = inferTransactionDate(expense.date, statement);
+        if (!date) {
+            console.warn(`Skipping transaction with unreadable date "${expense.date}" in statement ${statement._id}`);
+            continue;
+        }
+        const row = {
+            userId: statement.userId,
+            statementId: statement._id,
+            bankName: statement.bankName || 'Unknown Bank',
+            date,
+            rawDate: expense.date,
+            description: expense.description,
+            merchant: expense.merchant,
+            category: expense.category || 'Other',
+            type: expense.type === 'credit' ? 'credit' : 'debit',
+            amountCents: Math.round(expense.amount * 100),
+            dedupKey: dedupKey(statement.bankName, expense)
+        };
+        if (expense.duplicateOf) {
+            row.duplicateOf = expense.duplicateOf;
+        }
+        rows.push(row);
+    }
+    return rows;
+}
+
+/**
+ * Write the transactions of processed statements to the transactions collection
+ *
+ * Any rows already written for the statements are replaced, so this is
+ * safe to repeat.
+ *
+ * @param {Object|Array<Object>} statements - Processed statement(s)
+ * @returns {Promise<number>} Number of transactions written
+ */
+async function addTransactions(statements) {
+    const processed = [].concat(statements).filter(statement => statement.isProcessed);
+    if (processed.length === 0) {
+        return 0;
+    }
+
+    await Transaction.deleteMany({ statementId: { $in: processed.map(statement => statement._id) } });
+    const rows = processed.flatMap(statementTransactionRows);
+    if (rows.length > 0) {
+        await Transaction.insertMany(rows, { ordered: false, lean: true });
+    }
+    return rows.length;
+}
+
+/**
+ * Remove the transactions of deleted statements
+ * @param {Object|Array<Object>} statements - Deleted statement(s)
+ */
+async function removeTransactions(statements) {
+    const statementIds = [].concat(statements).map(statement => statement._id);
+    await Transaction.deleteMany({ statementId: { $in: statementIds } });
+}
+
+/**
+ * Keep the transactions collection in step with statements without failing
+ * the caller; a failed update is repaired by migrations/backfillTransactions.js
+ *
+ * @param {Function} update - addTransactions or removeTransactions
+ * @param {Object|Array<Object>} statements
+ */
+async function updateTransactionsSafely(update, statements) {
+    try {
+        await update(statements);
+    } catch (error) {
+        console.error('Failed to update transactions; run migrations/backfillTransactions.js to repair:', error);
+    }
+}
+
+/**
+ * Escape text for use inside a regular expression
+ */
+function escapeRegExp(text) {
+    return text.replace(/[.*+?^${}()|[\]\\]/g, '\\$&');
+}
+
+/**
+ * Build the query for a user's transactions
+ *
+ * @param {string} userId - User ID
+ * @param {Object} [filters]
+ * @param {string} [filters.from] - On or after this date
+ * @param {string} [filters.to] - On or before this date
+ * @param {string} [filters.category] - Exact category
+ * @param {string} [filters.merchant] - Merchant key prefix, e.g. 'DOORDASH'
+ * @param {string} [filters.bankName] - Exact bank name
+ * @param {string} [filters.type] - 'debit' or 'credit'
+ * @param {string} [filters.statementId] - Only this statement
+ * @param {boolean} [filters.includeDuplicates] - Include transactions suppressed as duplicates of another statement's
+ * @returns {Object}
+ */
+function transactionQuery(userId, filters = {}) {
+    const query = { userId: new mongoose.Types.ObjectId(userId) };
+    if (!filters.includeDuplicates) {
+        query.duplicateOf = null;
+    }
+
+    if (filters.from || filters.to) {
+        query.date = {};
+        if (filters.from) {
+            query.date.$gte = new Date(filters.from);
+        }
+        if (filters.to) {
+            query.date.$lte = new Date(filters.to);
+        }
+    }
+    if (filters.category) {
+        query.category = filters.category;
+    }
+    if (filters.merchant) {
+        // Anchored, case-matched prefix so the merchant index is used
+        query.merchant = { $regex: `^${escapeRegExp(filters.merchant.toUpperCase())}` };
+    }
+    if (filters.bankName) {
+        query.bankName = filters.bankName;
+    }
+    if (filters.type) {
+        query.type = filters.type;
+    }
+    if (filters.statementId) {
+        query.statementId = new mongoose.Types.ObjectId(filters.statementId);
+    }
+
+    return query;
+}
+
+function encodeCursor(transaction) {
+    return Buffer.from(JSON.stringify({ d: transaction.date.toISOString(), i: transaction._id.toString() }))
+        .toString('base64url');
+}
+
+function decodeCursor(cursor) {
+    try {
+        const { d, i } = JSON.parse(Buffer.from(cursor, 'base64url').toString('utf8'));
+        const date = new Date(d);
+        if (Number.isNaN(date.getTime()) || !mongoose.isValidObjectId(i)) {
+            throw new Error();
+        }
+        return { date, id: new mongoose.Types.ObjectId(i) };
+    } catch (error) {
+        throw new Error('Invalid cursor');
+    }
+}
+
+/**
+ * Page through a user's transactions, newest first
+ *
+ * Pages are keyed on (date, _id) rather than skip counts, so every page is
+ * an index range scan no matter how deep the client pages.
+ *
+ * @param {string} userId - User ID
+ * @param {Object} [filters] - See transactionQuery
+ * @param {Object} [options]
+ * @param {number} [options.limit] - Page size (default 50, at most 200)
+ * @param {string} [options.cursor] - nextCursor from the previous page
+ * @returns {Promise<{transactions: Array, nextCursor: (string|null)}>}
+ */
+async function searchTransactions(userId, filters = {}, options = {}) {
+    const limit = Math.min(Math.max(parseInt(options.limit, 10) || DEFAULT_PAGE_SIZE, 1), MAX_PAGE_SIZE);
+    const query = transactionQuery(userId, filters);
+
+    if (options.cursor) {
+        const { date, id } = decodeCursor(options.cursor);
+        query.$or = [
+            { date: { $lt: date } },
+            { date, _id: { $lt: id } }
+        ];
+    }
+
+    const rows = await Transaction.find(query)
+        .sort({ date: -1, _id: -1 })
+        .limit(limit + 1)
+        .select('-userId -__v')
+        .lean();
+
+    const hasMore = rows.length > limit;
+    const page = hasMore ? rows.slice(0, limit) : rows;
+
+    return {
+        transactions: page.map(row => ({ ...row, amount: row.amountCents / 100 })),
+        nextCursor: hasMore ? encodeCursor(page[page.length - 1]) : null
+    };
+}
+
+/**
+ * Total debits and credits for the transactions matching the filters
+ *
+ * @param {string} userId - User ID
+ * @param {Object} [filters] - See transactionQuery
+ * @returns {Promise<{totalDebits: number, totalCredits: number, debitCount: number, creditCount: number}>}
+ */
+async function getTransactionTotals(userId, filters = {}) {
+    const groups = await Transaction.aggregate([
+        { $match: transactionQuery(userId, filters) },
+        { $group: { _id: '$type', cents: { $sum: '$amountCents' }, count: { $sum: 1 } } }
+    ]);
+
+    const totals = { totalDebits: 0, totalCredits: 0, debitCount: 0, creditCount: 0 };
+    groups.forEach(({ _id, cents, count }) => {
+        if (_id === 'credit') {
+            totals.totalCredits = cents / 100;
+            totals.creditCount = count;
+        } else {
+            totals.totalDebits = cents / 100;
+            totals.debitCount = count;
+        }
+    });
+    return totals;
+}
+
+/**
+ * A user's matching transactions as parallel arrays, the form the Python
+ * analytics expect
+ *
+ * Only the analysed fields are read, through a cursor, so the cost per
+ * transaction is a few small values rather than a document.
+ *
+ * @param {string} userId - User ID
+ * @param {Object} [filters] - See transactionQuery
+ * @returns {Promise<{date: string[], amountCents: number[], category: string[], merchant: string[], type: string[]}>}
+ */
+async function loadTransactionColumns(userId, filters = {}) {
+    const columns = { date: [], amountCents: [], category: [], merchant: [], type: [] };
+    const cursor = Transaction.find(transactionQuery(userId, filters))
+        .select('date amountCents category merchant description type -_id')
+        .lean()
+        .cursor();
+
+    for await (const row of cursor) {
+        columns.date.push(row.date.toISOString().slice(0, 10));
+        columns.amountCents.push(row.amountCents);
+        columns.category.push(row.category || 'Other');
+        columns.merchant.push(row.merchant || row.description.toUpperCase());
+        columns.type.push(row.type);
+    }
+    return columns;
+}
+
+module.exports = {
+    inferTransactionDate,
+    dedupKey,
+    statementTransactionRows,
+    addTransactions,
+    removeTransactions,
+    updateTransactionsSafely,
+    escapeRegExp,
+    searchTransactions,
+    getTransactionTotals,
+    loadTransactionColumns
+};
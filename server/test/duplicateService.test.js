@@ -0,0 +1,59 @@
+// test/duplicateService.test.js
+//
+// Run from the server directory with: node --test test/
+const test = require('node:test');
+const assert = require('node:assert');
+const mongoose = require('mongoose');
+const Transaction = require('../models/Transaction');
+const { markDuplicates } = require('../services/duplicateService');
+
+// Nothing stored yet: only the statements passed in are compared with each other
+Transaction.find = () => ({ select: () => ({ lean: async () => [] }) });
+
+const userId = new mongoose.Types.ObjectId();
+
+function statement(period, expenses) {
+    return {
+        _id: new mongoose.Types.ObjectId(),
+        userId,
+        bankName: 'Chase',
+        isProcessed: true,
+        statementPeriod: period && { start: new Date(period[0]), end: new Date(period[1]) },
+        mlResults: {
+            expenses: expenses.map(([date, amount]) => ({
+                date,
+                amount,
+                description: 'STARBUCKS STORE 1234',
+                merchant: 'STARBUCKS STORE',
+                category: 'Dining',
+                type: 'debit'
+            }))
+        }
+    };
+}
+
+test('consecutive monthly statements do not duplicate each other', async () => {
+    const january = statement(['2025-01-01', '2025-01-31'], [['01/05', 4.5], ['01/30', 4.5]]);
+    const february = statement(['2025-02-01', '2025-02-28'], [['02/01', 4.5], ['02/20', 4.5]]);
+
+    assert.strictEqual(await markDuplicates([january, february]), 0);
+    assert.strictEqual(february.mlResults.totalExpenses, 9);
+});
+
+test('consecutive statements without a printed period are compared over their transaction dates', async () => {
+    const january = statement(null, [['01/05', 4.5], ['01/30', 4.5]]);
+    const february = statement(null, [['02/01', 4.5], ['02/20', 4.5]]);
+    january.uploadDate = new Date('2025-02-02');
+    february.uploadDate = new Date('2025-03-02');
+
+    assert.strictEqual(await markDuplicates([january, february]), 0);
+});
+
+test('a monthly statement inside a quarterly one is suppressed', async () => {
+    const quarter = statement(['2025-01-01', '2025-03-31'], [['01/30', 4.5], ['02/10', 4.5], ['03/15', 4.5]]);
+    const february = statement(['2025-02-01', '2025-02-28'], [['02/11', 4.5]]);
+
+    assert.strictEqual(await markDuplicates([quarter, february]), 1);
+    assert.strictEqual(february.mlResults.expenses[0].duplicateOf.toString(), quarter._id.toString());
+    assert.strictEqual(february.mlResults.totalExpenses, 0);
+});
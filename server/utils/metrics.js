@@ -0,0 +1,283 @@
+// utils/metrics.js
+//
+// Minimal Prometheus metrics: counters, gauges and histograms rendered in
+// the text exposition format by GET /metrics. Kept dependency-free; only
+// what the statement pipeline needs is implemented.
+
+const CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8';
+
+// Histogram buckets in seconds, from a fast regex pass to a slow PDF
+const DEFAULT_BUCKETS = [0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120];
+
+function escapeLabelValue(value) {
+    return String(value).replace(/\\/g, '\\\\').replace(/"/g, '\\"').replace(/\n/g, '\\n');
+}
+
+function formatLabels(labels) {
+    const entries = Object.entries(labels);
+    if (entries.length === 0) {
+        return '';
+    }
+    return `{${entries.map(([name, value]) => `${name}="${escapeLabelValue(value)}"`).join(',')}}`;
+}
+
+function formatValue(value) {
+    if (value === Infinity) {
+        return '+Inf';
+    }
+    return Number.isFinite(value) ? String(value) : 'NaN';
+}
+
+/**
+ * Shared bookkeeping for one metric and its labelled series
+ */
+class Metric {
+    /**
+     * @param {Object} options
+     * @param {string} options.name - Metric name
+     * @param {string} options.help - Description shown in # HELP
+     * @param {string[]} [options.labelNames] - Allowed label names
+     */
+    constructor(type, { name, help, labelNames = [] }) {
+        this.type = type;
+        this.name = name;
+        this.help = help;
+        this.labelNames = labelNames;
+        this.series = new Map();
+    }
+
+    labelsFor(labels = {}) {
+        const picked = {};
+        for (const name of this.labelNames) {
+            if (labels[name] !== undefined) {
+                picked[name] = labels[name];
+            }
+        }
+        return picked;
+    }
+
+    seriesFor(labels, create) {
+        const picked = this.labelsFor(labels);
+        const key = JSON.stringify(picked);
+        let series = this.series.get(key);
+        if (!series) {
+            series = create(picked);
+            this.series.set(key, series);
+        }
+        return series;
+    }
+
+    header() {
+        return [`# HELP ${this.name} ${this.help}`, `# TYPE ${this.name} ${this.type}`];
+    }
+}
+
+class Counter extends Metric {
+    constructor(options) {
+        super('counter', options);
+    }
+
+    inc(labels = {}, value = 1) {
+        this.seriesFor(labels, picked => ({ labels: picked, value: 0 })).value += value;
+    }
+
+    render() {
+        return [...this.series.values()].map(({ labels, value }) => `${this.name}${formatLabels(labels)} ${formatValue(value)}`);
+    }
+}
+
+class Gauge extends Metric {
+    /**
+     * @param {Object} options - See Metric
+     * @param {Function} [options.collect] - Called before each scrape to refresh the value
+     */
+    constructor(options) {
+        super('gauge', options);
+        this.collect = options.collect;
+    }
+
+    set(labels = {}, value) {
+        this.seriesFor(labels, picked => ({ labels: picked, value: 0 })).value = value;
+    }
+
+    render() {
+        if (this.collect) {
+            this.collect(this);
+        }
+        return [...this.series.values()].map(({ labels, value }) => `${this.name}${formatLabels(labels)} ${formatValue(value)}`);
+    }
+}
+
+class Histogram extends Metric {
+    /**
+     * @param {Object} options - See Metric
+     * @param {number[]} [options.buckets] - Upper bounds, ascending
+     */
+    constructor(options) {
+        super('histogram', options);
+        this.buckets = options.buckets || DEFAULT_BUCKETS;
+    }
+
+    observe(labels = {}, value) {
+        const series = this.seriesFor(labels, picked => ({
+            labels: picked,
+            counts: new Array(this.buckets.length).fill(0),
+            sum: 0,
+            count: 0
+        }));
+        const index = this.buckets.findIndex(bound => value <= bound);
+        if (index !== -1) {
+            series.counts[index]++;
+        }
+        series.sum += value;
+        series.count++;
+    }
+
+    /**
+     * Start timing; the returned function observes and returns the elapsed seconds
+     */
+    startTimer(labels = {}) {
+        const started = process.hrtime.bigint();
+        return (extraLabels = {}) => {
+            const seconds = Number(process.hrtime.bigint() - started) / 1e9;
+            this.observe({ ...labels, ...extraLabels }, seconds);
+            return seconds;
+        };
+    }
+
+    render() {
+        const lines = [];
+        for (const { labels, counts, sum, count } of this.series.values()) {
+            let cumulative = 0;
+            this.buckets.forEach((bound, index) => {
+                cumulative += counts[index];
+                lines.push(`${this.name}_bucket${formatLabels({ ...labels, le: bound })} ${cumulative}`);
+            });
+            lines.push(`${this.name}_bucket${formatLabels({ ...labels, le: '+Inf' })} ${count}`);
+            lines.push(`${this.name}_sum${formatLabels(labels)} ${formatValue(sum)}`);
+            lines.push(`${this.name}_count${formatLabels(labels)} ${count}`);
+        }
+        return lines;
+    }
+}
+
+class Registry {
+    constructor() {
+        this.metrics = new Map();
+    }
+
+    register(metric) {
+        if (this.metrics.has(metric.name)) {
+            throw new Error(`Metric ${metric.name} is already registered`);
+        }
+        this.metrics.set(metric.name, metric);
+        return metric;
+    }
+
+    counter(options) {
+        return this.register(new Counter(options));
+    }
+
+    gauge(options) {
+        return this.register(new Gauge(options));
+    }
+
+    histogram(options) {
+        return this.register(new Histogram(options));
+    }
+
+    /**
+     * All metrics in the Prometheus text exposition format
+     * @returns {string}
+     */
+    render() {
+        const lines = [];
+        for (const metric of this.metrics.values()) {
+            lines.push(...metric.header(), ...metric.render());
+        }
+        return lines.join('\n') + '\n';
+    }
+}
+
+const registry = new Registry();
+
+// Statement pipeline metrics. Stages reported by the parser worker: open,
+// extract, identify, match, categorize, analyze, serialize; added on the Node side:
+// queue (waiting for a free worker), spawn, import, dedup and mongoSave.
+const stageSeconds = registry.histogram({
+    name: 'statement_stage_duration_seconds',
+    help: 'Time spent in each stage of statement processing',
+    labelNames: ['stage']
+});
+const pageExtractSeconds = registry.histogram({
+    name: 'parser_page_extract_duration_seconds',
+    help: 'Text extraction time per PDF page',
+    buckets: [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5]
+});
+const parserJobSeconds = registry.histogram({
+    name: 'parser_job_duration_seconds',
+    help: 'Python worker job time from submission to response',
+    labelNames: ['op']
+});
+const parserJobs = registry.counter({
+    name: 'parser_jobs_total',
+    help: 'Python worker jobs by operation and outcome',
+    labelNames: ['op', 'status']
+});
+const parserPages = registry.counter({
+    name: 'parser_pages_total',
+    help: 'PDF pages extracted by the parser'
+});
+const parserTransactions = registry.counter({
+    name: 'parser_transactions_total',
+    help: 'Transactions parsed from statements'
+});
+const parserPeakRss = registry.gauge({
+    name: 'parser_worker_peak_rss_bytes',
+    help: 'Peak resident memory reported by the most recent parser worker job'
+});
+registry.gauge({
+    name: 'process_resident_memory_bytes',
+    help: 'Resident memory of the Node.js server',
+    collect: gauge => gauge.set({}, process.memoryUsage().rss)
+});
+registry.gauge({
+    name: 'nodejs_heap_used_bytes',
+    help: 'V8 heap in use by the Node.js server',
+    collect: gauge => gauge.set({}, process.memoryUsage().heapUsed)
+});
+
+/**
+ * Record the metrics a parser worker returned for one job or statement
+ *
+ * @param {Object} metrics - The worker's metrics field (stages, pageExtractSeconds, counts, peakRssKb)
+ */
+function observeParserMetrics(metrics) {
+    if (!metrics) {
+        return;
+    }
+    for (const [stage, seconds] of Object.entries(metrics.stages || {})) {
+        stageSeconds.observe({ stage }, seconds);
+    }
+    for (const seconds of metrics.pageExtractSeconds || []) {
+        pageExtractSeconds.observe({}, seconds);
+    }
+    parserPages.inc({}, metrics.counts?.pages || 0);
+    parserTransactions.inc({}, metrics.counts?.transactions || 0);
+    if (metrics.peakRssKb) {
+        parserPeakRss.set({}, metrics.peakRssKb * 1024);
+    }
+}
+
+module.exports = {
+    CONTENT_TYPE,
+    Counter,
+    Gauge,
+    Histogram,
+    Registry,
+    registry,
+    stageSeconds,
+    parserJobSeconds,
+    parserJobs,
+    observeParserMetrics
+};
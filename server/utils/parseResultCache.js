@@ -0,0 +1,197 @@
+// utils/parseResultCache.js
+const crypto = require('crypto');
+const path = require('path');
+const os = require('os');
+const fsp = require('fs/promises');
+
+/**
+ * Compute the content hash used to key parse results
+ *
+ * @param {Buffer} pdfBuffer - The PDF file as a buffer
+ * @returns {string} - Hex SHA-256 of the PDF bytes
+ */
+function computePdfHash(pdfBuffer) {
+    return crypto.createHash('sha256').update(pdfBuffer).digest('hex');
+}
+
+/**
+ * Build the version tag for the current parser
+ *
+ * Results are only reused while the parser version, the category rules and
+ * the bank plugins are all unchanged.
+ *
+ * @param {Object} parserInfo - Output of the worker's 'info' operation
+ * @returns {string}
+ */
+function versionTag(parserInfo) {
+    return `${parserInfo.version}_${parserInfo.rulesVersion}_${parserInfo.pluginsVersion}`;
+}
+
+/**
+ * Size-bounded on-disk cache of parser output keyed by PDF content hash.
+ *
+ * Each entry is one JSON file. Reads refresh the file's mtime, and when the
+ * cache grows past maxBytes the least recently used files are evicted.
+ */
+class ParseResultCache {
+    /**
+     * @param {Object} options
+     * @param {string} options.dir - Directory holding the cache files
+     * @param {number} options.maxBytes - Upper bound on the total size of the cache
+     */
+    constructor(options = {}) {
+        this.dir = options.dir || path.join(os.tmpdir(), 'walletwise-parse-cache');
+        this.maxBytes = options.maxBytes || 256 * 1024 * 1024;
+        this.totalBytes = null;
+        this.ready = null;
+    }
+
+    fileFor(pdfHash, tag) {
+        return path.join(this.dir, `${tag}-${pdfHash}.json`);
+    }
+
+    /**
+     * Create the cache directory, drop entries written by other parser
+     * versions and measure what remains
+     *
+     * @param {string} tag - Current parser version tag
+     */
+    init(tag) {
+        if (!this.ready) {
+            this.ready = (async () => {
+                await fsp.mkdir(this.dir, { recursive: true });
+                let totalBytes = 0;
+                for (const entry of await this.listEntries()) {
+                    if (entry.name.startsWith(`${tag}-`)) {
+                        totalBytes += entry.size;
+                    } else {
+                        await fsp.rm(entry.file, { force: true });
+                    }
+                }
+                this.totalBytes = totalBytes;
+                console.log(`Parse result cache ready at ${this.dir} (${totalBytes} bytes)`);
+            })().catch((error) => {
+                this.ready = null;
+                throw error;
+            });
+        }
+        return this.ready;
+    }
+
+    async listEntries() {
+        const names = (await fsp.readdir(this.dir)).filter(name => name.endsWith('.json'));
+        const entries = [];
+        for (const name of names) {
+            const file = path.join(this.dir, name);
+            try {
+                const stats = await fsp.stat(file);
+                entries.push({ name, file, size: stats.size, mtimeMs: stats.mtimeMs });
+            } catch (error) {
+                // Removed concurrently; nothing to account for
+            }
+        }
+        return entries;
+    }
+
+    /**
+     * Look up a cached parse result
+     *
+     * @param {string} pdfHash - SHA-256 of the PDF bytes
+     * @param {Object} parserInfo - Current parser version info
+     * @returns {Promise<Object|null>} - The cached parser output, or null on a miss
+     */
+    async get(pdfHash, parserInfo) {
+        const tag = versionTag(parserInfo);
+        await this.init(tag);
+
+        const file = this.fileFor(pdfHash, tag);
+        try {
+            const parserOutput = JSON.parse(await fsp.readFile(file, 'utf8'));
+            const now = new Date();
+            await fsp.utimes(file, now, now);
+            return parserOutput;
+        } catch (error) {
+            if (error.code !== 'ENOENT') {
+                console.warn(`Discarding unreadable parse cache entry ${file}:`, error.message);
+                await fsp.rm(file, { force: true });
+            }
+            return null;
+        }
+    }
+
+    /**
+     * Store a parse result, evicting old entries if the cache is over budget
+     *
+     * @param {string} pdfHash - SHA-256 of the PDF bytes
+     * @param {Object} parserInfo - Current parser version info
+     * @param {Object} parserOutput - Parser output to cache
+     */
+    async set(pdfHash, parserInfo, parserOutput) {
+        const tag = versionTag(parserInfo);
+        await this.init(tag);
+
+        const file = this.fileFor(pdfHash, tag);
+        const data = JSON.stringify(parserOutput);
+        if (Buffer.byteLength(data) > this.maxBytes) {
+            return;
+        }
+
+        const tempFile = `${file}.${process.pid}.${Date.now()}.tmp`;
+        await fsp.writeFile(tempFile, data);
+        await fsp.rename(tempFile, file);
+        this.totalBytes += Buffer.byteLength(data);
+
+        if (this.totalBytes > this.maxBytes) {
+            await this.evict();
+        }
+    }
+
+    /**
+     * Remove least recently used entries until the cache fits in maxBytes
+     */
+    async evict() {
+        const entries = await this.listEntries();
+        entries.sort((a, b) => a.mtimeMs - b.mtimeMs);
+
+        let totalBytes = entries.reduce((sum, entry) => sum + entry.size, 0);
+        for (const entry of entries) {
+            if (totalBytes <= this.maxBytes) {
+                break;
+            }
+            await fsp.rm(entry.file, { force: true });
+            totalBytes -= entry.size;
+        }
+        this.totalBytes = totalBytes;
+    }
+}
+
+let defaultCache = null;
+
+/**
+ * Get the shared parse result cache, configured from the environment
+ *
+ * PARSE_CACHE_DIR        - cache directory (default: <tmpdir>/walletwise-parse-cache)
+ * PARSE_CACHE_MAX_BYTES  - size bound in bytes (default: 256MB)
+ * PARSE_CACHE_DISABLED   - set to 'true' to always re-parse
+ *
+ * @returns {ParseResultCache|null}
+ */
+function getParseResultCache() {
+    if (process.env.PARSE_CACHE_DISABLED === 'true') {
+        return null;
+    }
+    if (!defaultCache) {
+        defaultCache = new ParseResultCache({
+            dir: process.env.PARSE_CACHE_DIR,
+            maxBytes: parseInt(process.env.PARSE_CACHE_MAX_BYTES, 10) || undefined
+        });
+    }
+    return defaultCache;
+}
+
+module.exports = {
+    ParseResultCache,
+    getParseResultCache,
+    computePdfHash,
+    versionTag
+};
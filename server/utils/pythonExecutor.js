@@ -1,124 +1,65 @@
 // utils/pythonExecutor.js
-const { spawn } = require('child_process');
 const path = require('path');
 const fs = require('fs');
-const os = require('os');
+const { getWorkerPool } = require('./pythonWorkerPool');
 
 /**
- * Execute a Python script with given arguments and input data
+ * Build the worker arguments for a PDF given as a path, a Buffer or a stream
  *
- * @param {string} scriptPath - Path to the Python script
- * @param {Array} args - Arguments to pass to the script
- * @returns {Promise<{stdout: string, stderr: string, exitCode: number, parsedJson: Object}>}
+ * Buffers and streams are piped to the worker's stdin rather than written
+ * to a temporary file.
+ *
+ * @param {string|Buffer|Readable} pdfSource - The PDF statement
+ * @param {number} [pdfSize] - Byte length, required when pdfSource is a stream
+ * @returns {{payload: Object, input: (Buffer|Readable|undefined), inputSize: (number|undefined)}}
  */
-function executePythonScript(scriptPath, args = []) {
-    return new Promise((resolve, reject) => {
-        // Validate script exists
-        if (!fs.existsSync(scriptPath)) {
-            return reject(new Error(`Python script not found: ${scriptPath}`));
-        }
-
-        console.log(`Executing Python script: ${scriptPath}`);
-        console.log(`With arguments: ${args.join(', ')}`);
-
-        let pythonExecutable;
-        const platform = os.platform();
-
-        if (platform === 'win32') {
-            const userHome = process.env.USERPROFILE;
-            pythonExecutable = `${userHome}\\AppData\\Local\\Microsoft\\WindowsApps\\python.exe`;
-        } else {
-            pythonExecutable = '/usr/local/bin/python3';
-        }
-
-        console.log(`Resolved Python executable path: ${pythonExecutable}`);
-
-
-        // Spawn Python process
-        const pythonProcess = spawn(pythonExecutable, [scriptPath, ...args]);
-
-        let stdout = '';
-        let stderr = '';
-
-        // Collect stdout
-        pythonProcess.stdout.on('data', (data) => {
-            stdout += data.toString();
-        });
-
-        // Collect stderr
-        pythonProcess.stderr.on('data', (data) => {
-            stderr += data.toString();
-        });
-
-        // Handle process completion
-        pythonProcess.on('close', (exitCode) => {
-            console.log(`Python process exited with code ${exitCode}`);
-
-            if (exitCode !== 0) {
-                console.error(`Python script error (${exitCode}): ${stderr}`);
-                return reject(new Error(`Python script exited with code ${exitCode}: ${stderr}`));
-            }
-
-            // Extract JSON from the stdout
-            let jsonData = null;
-            const jsonStartIndex = stdout.indexOf('{');
-
-            if (jsonStartIndex !== -1) {
-                try {
-                    const jsonString = stdout.substring(jsonStartIndex);
-                    jsonData = JSON.parse(jsonString);
-                    console.log('Successfully parsed JSON output from Python script');
-                } catch (jsonError) {
-                    console.error('Error parsing JSON from Python output:', jsonError);
-                    console.log('Raw output snippet:', stdout.substring(jsonStartIndex, jsonStartIndex + 100) + '...');
-                    return reject(new Error(`Failed to parse JSON from Python output: ${jsonError.message}`));
-                }
-            } else {
-                console.warn('No JSON data found in Python script output');
-            }
-
-            resolve({
-                stdout,
-                stderr,
-                exitCode,
-                parsedJson: jsonData  // Include the parsed JSON in the response
-            });
-        });
-
-        // Handle process errors
-        pythonProcess.on('error', (err) => {
-            console.error(`Failed to start Python process: ${err.message}`);
-            reject(new Error(`Failed to execute Python script: ${err.message}`));
-        });
-    });
+function pdfJobArgs(pdfSource, pdfSize) {
+    if (typeof pdfSource === 'string') {
+        return { payload: { pdfPath: pdfSource } };
+    }
+    return { payload: {}, input: pdfSource, inputSize: pdfSize };
 }
 
 /**
  * Identify the bank from a PDF statement
  *
- * @param {string} pdfPath - Path to the PDF file
- * @returns {Promise<string>} - The identified bank name
+ * The worker checks the PDF metadata and page 1 before falling back to
+ * extracting the first pages, and reports how confident the match is.
+ *
+ * @param {string|Buffer|Readable} pdfSource - Path to the PDF file, or its contents
+ * @param {Object} [options]
+ * @param {number} [options.pdfSize] - Byte length, required when pdfSource is a stream
+ * @returns {Promise<{bankName: string, confidence: number, tier: (string|null)}>} - The identified bank
  */
-async function identifyBankFromPdf(pdfPath) {
+async function identifyBankFromPdf(pdfSource, options = {}) {
     try {
-        const identifierScript = path.join(__dirname, '..', 'scripts', 'bank_identifier.py');
-
-        if (!fs.existsSync(identifierScript)) {
-            console.error(`Bank identifier script not found: ${identifierScript}`);
-            return "Unknown";
-        }
+        const { payload, input, inputSize } = pdfJobArgs(pdfSource, options.pdfSize);
+        const { bank, confidence, tier } = await getWorkerPool().run('identify', payload, { input, inputSize });
+        console.log(`Identified bank: ${bank} (confidence ${confidence} from ${tier})`);
 
-        const result = await executePythonScript(identifierScript, [pdfPath]);
-
-        // The bank identifier outputs just the bank name on the last line
-        const bankName = result.stdout.trim();
-        console.log(`Identified bank: ${bankName}`);
-
-        return bankName;
+        return { bankName: bank, confidence, tier };
     } catch (error) {
         console.error('Error identifying bank:', error);
-        return "Unknown";
+        return { bankName: 'Unknown', confidence: 0, tier: null };
+    }
+}
+
+const BANK_PLUGINS_DIR = path.join(__dirname, '..', 'scripts', 'parser_core', 'banks');
+let bankPlugins = null;
+
+/**
+ * Load the bank plugins shared with the Python parser library
+ *
+ * @returns {Array<Object>} - Plugin definitions ordered by identification priority
+ */
+function loadBankPlugins() {
+    if (!bankPlugins) {
+        bankPlugins = fs.readdirSync(BANK_PLUGINS_DIR)
+            .filter(file => file.endsWith('.json'))
+            .map(file => JSON.parse(fs.readFileSync(path.join(BANK_PLUGINS_DIR, file), 'utf8')))
+            .sort((a, b) => (a.priority ?? 100) - (b.priority ?? 100) || a.name.localeCompare(b.name));
     }
+    return bankPlugins;
 }
 
 /**
@@ -129,59 +70,188 @@ async function identifyBankFromPdf(pdfPath) {
  */
 function getParserForBank(bankName) {
     const scriptsDir = path.join(__dirname, '..', 'scripts');
+    const plugins = loadBankPlugins();
 
-    // Map bank names to parser scripts
-    const parserMap = {
-        "Wells Fargo": "wellsfargo_parser.py",
-        "TD Bank": "tdbank_parser.py",
-        "Chase": "chase_parser.py"
-    };
-
-    const parserFile = parserMap[bankName] || "wellsfargo_parser.py"; // Default to Wells Fargo
-    const parserPath = path.join(scriptsDir, parserFile);
+    // Unknown banks fall back to the default plugin (Wells Fargo)
+    const defaultPlugin = plugins.find(plugin => plugin.default) || plugins[0];
+    const plugin = plugins.find(p => p.name === bankName) || defaultPlugin;
+    const parserPath = path.join(scriptsDir, plugin.script);
 
     // Check if parser exists
     if (!fs.existsSync(parserPath)) {
-        console.warn(`Parser for ${bankName} not found: ${parserPath}. Using Wells Fargo parser as fallback.`);
-        return path.join(scriptsDir, "wellsfargo_parser.py");
+        console.warn(`Parser for ${bankName} not found: ${parserPath}. Using ${defaultPlugin.name} parser as fallback.`);
+        return path.join(scriptsDir, defaultPlugin.script);
     }
 
     return parserPath;
 }
 
+let parserInfo = null;
+
+/**
+ * Get the parser library's version information
+ *
+ * @returns {Promise<{version: string, rulesVersion: string, pluginsVersion: string}>}
+ */
+function getParserInfo() {
+    if (!parserInfo) {
+        parserInfo = getWorkerPool().run('info').catch((error) => {
+            parserInfo = null;
+            throw error;
+        });
+    }
+    return parserInfo;
+}
+
 /**
  * Parse a bank statement PDF
  *
- * @param {string} pdfPath - Path to the PDF file
- * @returns {Promise<Object>} - The parsed data
+ * Identification and parsing happen in a single worker call on one open
+ * copy of the PDF; pages the identification tiers extracted are reused, so
+ * every page's text is extracted only once. Transactions are streamed back
+ * page by page as the worker parses them. parsedJson.metrics holds the
+ * time spent per stage, the page and transaction counts and peak RSS.
+ *
+ * @param {string|Buffer|Readable} pdfSource - Path to the PDF file, or its contents
+ * @param {Object} [options]
+ * @param {number} [options.pdfSize] - Byte length, required when pdfSource is a stream
+ * @param {Function} [options.onTransactions] - Called with (transactions, pageNumber) as each page is parsed
+ * @returns {Promise<{bankName: string, parsedJson: Object}>} - The parsed data
  */
-async function parseBankStatement(pdfPath) {
+async function parseBankStatement(pdfSource, options = {}) {
     try {
-        // First identify the bank
-        const bankName = await identifyBankFromPdf(pdfPath);
-
-        // Get the appropriate parser
-        const parserScript = getParserForBank(bankName);
-        console.log(`Using parser: ${parserScript} for bank: ${bankName}`);
-
-        // Execute the parser
-        const result = await executePythonScript(parserScript, [pdfPath]);
-
-        // Add bank identifier to the result if not already present
-        if (result.parsedJson && !result.parsedJson.bankIdentifier) {
-            result.parsedJson.bankIdentifier = bankName;
-        }
+        const transactions = [];
+        let metrics = null;
+        const { payload, input, inputSize } = pdfJobArgs(pdfSource, options.pdfSize);
+        const final = await getWorkerPool().run('parse_statement', { ...payload, stream: true }, {
+            input,
+            inputSize,
+            onMetrics: (jobMetrics) => {
+                metrics = jobMetrics;
+            },
+            onEvent: (event, data) => {
+                if (event !== 'page') {
+                    return;
+                }
+                for (const transaction of data.transactions) {
+                    transactions.push(transaction);
+                }
+                if (options.onTransactions) {
+                    options.onTransactions(data.transactions, data.page);
+                }
+            }
+        });
 
-        return result;
+        const parsedJson = {
+            transactions,
+            summary: final.summary,
+            categoryBreakdown: final.categoryBreakdown,
+            bankIdentifier: final.bankIdentifier,
+            statementPeriod: final.statementPeriod,
+            pageCount: final.pageCount,
+            categorizationCache: final.categorizationCache,
+            metrics
+        };
+        const bankName = parsedJson.bankIdentifier;
+        console.log(`Parsed ${parsedJson.pageCount} pages for bank: ${bankName} in ${metrics ? metrics.totalSeconds.toFixed(2) : '?'}s`);
+
+        return { bankName, parsedJson };
     } catch (error) {
         console.error('Error parsing bank statement:', error);
         throw error;
     }
 }
 
+/**
+ * Parse several bank statement PDFs
+ *
+ * Each PDF is its own pool job with the pool's usual timeout, so the batch
+ * is spread across the workers and a statement that fails or times out
+ * does not fail the others.
+ *
+ * @param {Buffer[]} pdfBuffers - The PDF files
+ * @returns {Promise<Array<{ok: boolean, bankName?: string, parsedJson?: Object, error?: string}>>} - One outcome per PDF, in input order
+ */
+async function parseBankStatements(pdfBuffers) {
+    const pool = getWorkerPool();
+
+    const settled = await Promise.allSettled(pdfBuffers.map(async (pdfBuffer) => {
+        let metrics = null;
+        const result = await pool.run('parse_statement', {}, {
+            input: pdfBuffer,
+            onMetrics: (jobMetrics) => {
+                metrics = jobMetrics;
+            }
+        });
+        return { ok: true, bankName: result.bankIdentifier, parsedJson: { ...result, metrics } };
+    }));
+
+    const outcomes = settled.map(result => (result.status === 'fulfilled'
+        ? result.value
+        : { ok: false, error: result.reason.message || 'Error processing the PDF' }));
+    console.log(`Parsed batch of ${outcomes.length} statements (${outcomes.filter(outcome => !outcome.ok).length} failed)`);
+    return outcomes;
+}
+
+/**
+ * Category breakdown, month-over-month changes, rolling averages and top
+ * merchants over a set of transactions
+ *
+ * The transactions are sent to a worker as columnar JSON and summarized
+ * there with NumPy group-bys.
+ *
+ * @param {Object} columns - Parallel date, amountCents, category, merchant and type arrays
+ * @param {Object} [options]
+ * @param {number} [options.top] - Number of top merchants
+ * @param {number[]} [options.windows] - Rolling average windows in days
+ * @returns {Promise<Object>} - The analytics
+ */
+async function analyzeTransactions(columns, options = {}) {
+    const payload = {};
+    if (options.top) {
+        payload.top = options.top;
+    }
+    if (options.windows) {
+        payload.windows = options.windows;
+    }
+    return getWorkerPool().run('analyze', payload, { input: Buffer.from(JSON.stringify(columns)) });
+}
+
+/**
+ * Current categories for the stored merchants a category rules change can affect
+ *
+ * Only merchant keys containing a keyword that was added, removed or moved
+ * since previousCategories are recategorized; with no previous table every
+ * merchant is.
+ *
+ * @param {string[]} merchants - Distinct normalized merchant keys
+ * @param {Object|null} previousCategories - Keyword table the stored categories came from
+ * @returns {Promise<{rulesVersion: string, rules: Object, changedKeywords: (number|null), checked: number, categories: Object}>}
+ */
+async function recategorizeMerchants(merchants, previousCategories) {
+    const input = Buffer.from(JSON.stringify({ merchants, previousCategories }));
+    return getWorkerPool().run('recategorize', {}, { input });
+}
+
+/**
+ * Current merchant keys and categories for stored transaction descriptions
+ *
+ * @param {string[]} descriptions - Distinct descriptions
+ * @returns {Promise<Object>} description -> { merchant, category }
+ */
+async function merchantKeys(descriptions) {
+    const input = Buffer.from(JSON.stringify({ descriptions }));
+    return getWorkerPool().run('merchant_keys', {}, { input });
+}
+
 module.exports = {
-    executePythonScript,
     identifyBankFromPdf,
+    loadBankPlugins,
     getParserForBank,
-    parseBankStatement
+    getParserInfo,
+    parseBankStatement,
+    parseBankStatements,
+    analyzeTransactions,
+    recategorizeMerchants,
+    merchantKeys
 };
\ No newline at end of file
@@ -0,0 +1,456 @@
+// utils/pythonWorkerPool.js
+const { spawn } = require('child_process');
+const path = require('path');
+const os = require('os');
+const readline = require('readline');
+const { stageSeconds, parserJobSeconds, parserJobs, observeParserMetrics } = require('./metrics');
+
+const WORKER_SCRIPT = path.join(__dirname, '..', 'scripts', 'parser_worker.py');
+
+// Buffer inputs are written in chunks of this size, waiting for 'drain' in between
+const INPUT_CHUNK_BYTES = 64 * 1024;
+
+/**
+ * Resolve the Python interpreter used for the parser scripts
+ *
+ * @returns {string} - Path to the Python executable
+ */
+function resolvePythonExecutable() {
+    if (process.env.PYTHON_EXECUTABLE) {
+        return process.env.PYTHON_EXECUTABLE;
+    }
+
+    if (os.platform() === 'win32') {
+        const userHome = process.env.USERPROFILE;
+        return `${userHome}\\AppData\\Local\\Microsoft\\WindowsApps\\python.exe`;
+    }
+
+    return '/usr/local/bin/python3';
+}
+
+/**
+ * Pool of long-lived Python parser workers.
+ *
+ * Each worker imports the identifier and bank parsers once and then serves
+ * jobs over a newline-delimited JSON protocol, so uploads no longer pay
+ * interpreter startup and the pdfplumber import on every statement.
+ *
+ * A job may carry binary input (a PDF) which is written to the worker's
+ * stdin straight after the request line, so statements never have to be
+ * written to a temporary file.
+ *
+ * Every response carries the worker's per-stage metrics; the pool adds the
+ * time the job waited for a worker (and, for a job that started a worker,
+ * the spawn and import time) and records them for /metrics.
+ */
+class PythonWorkerPool {
+    /**
+     * @param {Object} options
+     * @param {number} options.size - Maximum number of concurrent workers
+     * @param {number} options.jobTimeoutMs - Per-job timeout; the worker is killed when exceeded
+     * @param {number} options.maxJobsPerWorker - Recycle a worker after this many jobs
+     * @param {string} options.scriptPath - Worker script to run
+     */
+    constructor(options = {}) {
+        this.size = options.size || 2;
+        this.jobTimeoutMs = options.jobTimeoutMs || 120000;
+        this.maxJobsPerWorker = options.maxJobsPerWorker || 100;
+        this.scriptPath = options.scriptPath || WORKER_SCRIPT;
+
+        this.workers = [];
+        this.queue = [];
+        this.nextJobId = 1;
+        this.closed = false;
+    }
+
+    /**
+     * Run an operation on the next free worker
+     *
+     * @param {string} op - Worker operation (e.g. 'identify', 'parse')
+     * @param {Object} payload - Operation arguments
+     * @param {Object} [options]
+     * @param {Function} [options.onEvent] - Called with (event, data) for each streamed event
+     * @param {Buffer|Readable} [options.input] - Binary input sent after the request line
+     * @param {number} [options.inputSize] - Byte length of a Readable input
+     * @param {number} [options.timeoutMs] - Override the pool's per-job timeout
+     * @param {Function} [options.onMetrics] - Called with the job's metrics before it resolves
+     * @returns {Promise<*>} - The worker's result
+     */
+    run(op, payload = {}, options = {}) {
+        if (this.closed) {
+            return Promise.reject(new Error('Python worker pool is closed'));
+        }
+
+        const { input } = options;
+        const inputSize = Buffer.isBuffer(input) ? input.length : options.inputSize;
+        if (input && !Number.isInteger(inputSize)) {
+            return Promise.reject(new Error('inputSize is required when streaming input to a Python worker'));
+        }
+
+        return new Promise((resolve, reject) => {
+            this.queue.push({
+                id: this.nextJobId++,
+                message: input ? { ...payload, op, inputSize } : { ...payload, op },
+                input,
+                timeoutMs: options.timeoutMs || this.jobTimeoutMs,
+                onEvent: options.onEvent,
+                onMetrics: options.onMetrics,
+                submittedAt: process.hrtime.bigint(),
+                resolve,
+                reject
+            });
+            this.dispatch();
+        });
+    }
+
+    /**
+     * Hand queued jobs to idle workers, spawning new workers up to the pool size
+     */
+    dispatch() {
+        while (this.queue.length > 0) {
+            const worker = this.workers.find(w => w.ready && !w.job && !w.retiring);
+
+            if (worker) {
+                this.assign(worker, this.queue.shift());
+                continue;
+            }
+
+            // Spawn workers for the backlog; each calls dispatch() again once ready
+            const starting = this.workers.filter(w => !w.ready).length;
+            if (this.workers.length >= this.size || starting >= this.queue.length) {
+                return;
+            }
+            this.spawnWorker();
+        }
+    }
+
+    /**
+     * Environment for a new worker
+     *
+     * Each worker shards long statements across its own extraction process
+     * pool, which defaults to one process per CPU. Split the CPUs between
+     * the workers instead so a full pool runs about one extraction process
+     * per CPU rather than size × CPUs; an explicit PARSER_EXTRACT_PROCESSES
+     * is passed through unchanged.
+     */
+    workerEnv() {
+        if (process.env.PARSER_EXTRACT_PROCESSES) {
+            return process.env;
+        }
+        const extractProcesses = Math.max(1, Math.floor(os.cpus().length / this.size));
+        return { ...process.env, PARSER_EXTRACT_PROCESSES: String(extractProcesses) };
+    }
+
+    spawnWorker() {
+        const pythonExecutable = resolvePythonExecutable();
+        const child = spawn(pythonExecutable, [this.scriptPath], {
+            stdio: ['pipe', 'pipe', 'pipe'],
+            env: this.workerEnv()
+        });
+
+        const worker = {
+            process: child,
+            ready: false,
+            retiring: false,
+            job: null,
+            jobsCompleted: 0,
+            stderr: '',
+            spawnedAt: process.hrtime.bigint(),
+            startupStages: null
+        };
+        this.workers.push(worker);
+        console.log(`Spawned Python worker (pid ${child.pid}) using ${pythonExecutable}`);
+
+        const lines = readline.createInterface({ input: child.stdout });
+        lines.on('line', (line) => this.handleLine(worker, line));
+
+        // A worker that dies or is killed mid-write fails the pipe with EPIPE;
+        // without a listener that error would take the server down
+        child.stdin.on('error', (err) => {
+            if (!worker.retiring) {
+                console.warn(`Python worker (pid ${child.pid}) stdin failed: ${err.message}`);
+            }
+            this.removeWorker(worker, new Error(`Python worker stdin failed: ${err.message}`));
+        });
+
+        child.stderr.on('data', (data) => {
+            // Keep only the tail of stderr for error reporting
+            worker.stderr = (worker.stderr + data.toString()).slice(-4000);
+        });
+
+        child.on('error', (err) => {
+            console.error(`Failed to start Python worker: ${err.message}`);
+            this.removeWorker(worker, new Error(`Failed to start Python worker: ${err.message}`));
+        });
+
+        child.on('exit', (code, signal) => {
+            if (!worker.retiring) {
+                console.warn(`Python worker (pid ${child.pid}) exited with code ${code}${signal ? ` (${signal})` : ''}`);
+            }
+            this.removeWorker(worker, new Error(`Python worker exited with code ${code}: ${worker.stderr}`));
+        });
+
+        return worker;
+    }
+
+    handleLine(worker, line) {
+        let message;
+        try {
+            message = JSON.parse(line);
+        } catch (error) {
+            console.warn('Ignoring non-JSON output from Python worker:', line.substring(0, 100));
+            return;
+        }
+
+        if (message.event === 'ready') {
+            worker.ready = true;
+            const startupSeconds = secondsSince(worker.spawnedAt);
+            const importSeconds = message.importSeconds || 0;
+            worker.startupStages = { spawn: Math.max(0, startupSeconds - importSeconds), import: importSeconds };
+            stageSeconds.observe({ stage: 'spawn' }, worker.startupStages.spawn);
+            stageSeconds.observe({ stage: 'import' }, worker.startupStages.import);
+            this.dispatch();
+            return;
+        }
+
+        const job = worker.job;
+        if (!job || message.id !== job.id) {
+            return;
+        }
+
+        // Intermediate results from a streaming job
+        if (message.event) {
+            if (job.onEvent) {
+                try {
+                    job.onEvent(message.event, message.data);
+                } catch (error) {
+                    console.error(`Error handling ${message.event} event from Python worker:`, error);
+                }
+            }
+            return;
+        }
+
+        clearTimeout(job.timer);
+        worker.job = null;
+        worker.jobsCompleted++;
+
+        const op = job.message.op;
+        parserJobSeconds.observe({ op }, secondsSince(job.submittedAt));
+        parserJobs.inc({ op, status: message.ok ? 'ok' : 'error' });
+        observeParserMetrics(message.metrics);
+        if (job.onMetrics && message.metrics) {
+            try {
+                job.onMetrics(this.jobMetrics(worker, job, message.metrics));
+            } catch (error) {
+                console.error('Error handling metrics from Python worker:', error);
+            }
+        }
+        // Startup cost is charged to the first job a worker serves
+        worker.startupStages = null;
+
+        if (message.ok) {
+            job.resolve(message.result);
+        } else {
+            job.reject(new Error(message.error || 'Python worker job failed'));
+        }
+
+        if (worker.jobsCompleted >= this.maxJobsPerWorker) {
+            this.retireWorker(worker);
+        }
+
+        this.dispatch();
+    }
+
+    /**
+     * The worker's metrics for a job plus the stages only the pool can see
+     */
+    jobMetrics(worker, job, metrics) {
+        return {
+            ...metrics,
+            stages: { ...worker.startupStages, queue: job.queueSeconds, ...metrics.stages },
+            totalSeconds: secondsSince(job.submittedAt)
+        };
+    }
+
+    assign(worker, job) {
+        worker.job = job;
+        job.queueSeconds = secondsSince(job.submittedAt);
+        stageSeconds.observe({ stage: 'queue' }, job.queueSeconds);
+        job.timer = setTimeout(() => {
+            console.error(`Python worker job ${job.id} timed out after ${job.timeoutMs}ms`);
+            parserJobs.inc({ op: job.message.op, status: 'timeout' });
+            this.releaseInput(worker, job);
+            worker.job = null;
+            job.reject(new Error(`Python job timed out after ${job.timeoutMs}ms`));
+            this.retireWorker(worker, 'SIGKILL');
+        }, job.timeoutMs);
+
+        const stdin = worker.process.stdin;
+        stdin.write(JSON.stringify({ ...job.message, id: job.id }) + '\n');
+
+        if (!job.input) {
+            return;
+        }
+        if (Buffer.isBuffer(job.input)) {
+            this.writeInput(worker, job);
+            return;
+        }
+        this.pipeInput(worker, job);
+    }
+
+    /**
+     * Write a job's Buffer input to the worker, honouring backpressure
+     *
+     * Writing stops as soon as the job no longer owns the worker (it timed
+     * out or the worker died), so nothing is written to a dead pipe.
+     */
+    writeInput(worker, job) {
+        const stdin = worker.process.stdin;
+        const input = job.input;
+        let offset = 0;
+
+        const writeChunks = () => {
+            while (worker.job === job && offset < input.length) {
+                const chunk = input.subarray(offset, offset + INPUT_CHUNK_BYTES);
+                offset += chunk.length;
+                if (!stdin.write(chunk)) {
+                    stdin.once('drain', writeChunks);
+                    return;
+                }
+            }
+        };
+        writeChunks();
+    }
+
+    /**
+     * Stream a job's Readable input to the worker without ending its stdin
+     *
+     * The worker reads exactly inputSize bytes, so a source that fails or
+     * delivers a different length would desynchronise the protocol; the job
+     * is failed and the worker replaced instead.
+     */
+    pipeInput(worker, job) {
+        const stdin = worker.process.stdin;
+        const source = job.input;
+        let bytesSent = 0;
+
+        const fail = (error) => {
+            if (worker.job !== job) {
+                return;
+            }
+            this.releaseInput(worker, job);
+            clearTimeout(job.timer);
+            worker.job = null;
+            job.reject(error);
+            this.retireWorker(worker, 'SIGKILL');
+        };
+
+        source.on('data', (chunk) => {
+            bytesSent += chunk.length;
+        });
+        source.once('error', (error) => fail(new Error(`Failed to read job input: ${error.message}`)));
+        source.once('end', () => {
+            if (bytesSent !== job.message.inputSize) {
+                fail(new Error(`Job input was ${bytesSent} bytes, expected ${job.message.inputSize}`));
+            }
+        });
+        source.pipe(stdin, { end: false });
+    }
+
+    /**
+     * Stop streaming a job's Readable input to its worker and destroy it, so
+     * a source such as a GridFS download is not left open behind a job that
+     * no longer owns the worker
+     */
+    releaseInput(worker, job) {
+        if (!job.input || Buffer.isBuffer(job.input)) {
+            return;
+        }
+        job.input.unpipe(worker.process.stdin);
+        job.input.destroy();
+    }
+
+    /**
+     * Stop sending jobs to a worker and shut it down
+     *
+     * @param {Object} worker - Worker to retire
+     * @param {string} [signal] - Kill immediately with this signal instead of closing stdin
+     */
+    retireWorker(worker, signal) {
+        worker.retiring = true;
+        if (signal) {
+            worker.process.kill(signal);
+        } else {
+            worker.process.stdin.end();
+        }
+    }
+
+    removeWorker(worker, error) {
+        const index = this.workers.indexOf(worker);
+        if (index === -1) {
+            return;
+        }
+        this.workers.splice(index, 1);
+
+        if (worker.job) {
+            clearTimeout(worker.job.timer);
+            parserJobs.inc({ op: worker.job.message.op, status: 'error' });
+            this.releaseInput(worker, worker.job);
+            worker.job.reject(error);
+            worker.job = null;
+        }
+
+        // A worker that never became ready cannot serve the queue either
+        if (!worker.ready && this.workers.length === 0) {
+            this.queue.splice(0).forEach(job => job.reject(error));
+        }
+
+        if (!this.closed) {
+            this.dispatch();
+        }
+    }
+
+    /**
+     * Shut down all workers and reject any queued jobs
+     */
+    close() {
+        this.closed = true;
+        this.queue.splice(0).forEach(job => job.reject(new Error('Python worker pool is closed')));
+        this.workers.slice().forEach(worker => this.retireWorker(worker));
+    }
+}
+
+function secondsSince(started) {
+    return Number(process.hrtime.bigint() - started) / 1e9;
+}
+
+let defaultPool = null;
+
+/**
+ * Get the shared worker pool, configured from the environment
+ *
+ * PYTHON_POOL_SIZE        - number of workers (default: min(4, CPU count))
+ * PYTHON_JOB_TIMEOUT_MS   - per-job timeout in milliseconds (default: 120000)
+ * PYTHON_WORKER_MAX_JOBS  - jobs served before a worker is recycled (default: 100)
+ *
+ * Workers get PARSER_EXTRACT_PROCESSES = CPU count / pool size unless it is
+ * already set (see workerEnv).
+ *
+ * @returns {PythonWorkerPool}
+ */
+function getWorkerPool() {
+    if (!defaultPool) {
+        defaultPool = new PythonWorkerPool({
+            size: parseInt(process.env.PYTHON_POOL_SIZE, 10) || Math.min(4, os.cpus().length),
+            jobTimeoutMs: parseInt(process.env.PYTHON_JOB_TIMEOUT_MS, 10) || 120000,
+            maxJobsPerWorker: parseInt(process.env.PYTHON_WORKER_MAX_JOBS, 10) || 100
+        });
+    }
+    return defaultPool;
+}
+
+module.exports = {
+    PythonWorkerPool,
+    getWorkerPool,
+    resolvePythonExecutable
+};
@@ -0,0 +1,118 @@
+// utils/zipReader.js
+const zlib = require('zlib');
+const path = require('path');
+const { promisify } = require('util');
+
+const inflateRaw = promisify(zlib.inflateRaw);
+
+const EOCD_SIGNATURE = 0x06054b50;
+const CENTRAL_SIGNATURE = 0x02014b50;
+const LOCAL_SIGNATURE = 0x04034b50;
+const METHOD_STORED = 0;
+const METHOD_DEFLATE = 8;
+
+/**
+ * Locate the end-of-central-directory record, which may be followed by a
+ * comment of up to 64KB
+ */
+function findEndOfCentralDirectory(buffer) {
+    const earliest = Math.max(0, buffer.length - 22 - 0xffff);
+    for (let offset = buffer.length - 22; offset >= earliest; offset--) {
+        if (buffer.readUInt32LE(offset) === EOCD_SIGNATURE) {
+            return offset;
+        }
+    }
+    throw new Error('Not a zip archive');
+}
+
+/**
+ * Read the files in an in-memory zip archive
+ *
+ * Only stored and deflated entries are supported (what every common zip
+ * tool writes); inflation runs on the libuv thread pool so large archives
+ * do not block the event loop.
+ *
+ * @param {Buffer} buffer - The zip archive
+ * @param {Object} [options]
+ * @param {Function} [options.filter] - Called with each entry name; entries it rejects are skipped
+ * @param {number} [options.maxEntryBytes] - Reject entries larger than this once extracted
+ * @param {number} [options.maxEntries] - Stop once this many entries have been extracted
+ * @returns {Promise<Array<{name: string, data: Buffer}>>}
+ */
+async function readZipEntries(buffer, options = {}) {
+    if (buffer.length < 22) {
+        throw new Error('Not a zip archive');
+    }
+
+    const eocd = findEndOfCentralDirectory(buffer);
+    const entryCount = buffer.readUInt16LE(eocd + 10);
+    let offset = buffer.readUInt32LE(eocd + 16);
+    const entries = [];
+
+    for (let i = 0; i < entryCount; i++) {
+        if (options.maxEntries && entries.length >= options.maxEntries) {
+            break;
+        }
+        if (buffer.readUInt32LE(offset) !== CENTRAL_SIGNATURE) {
+            throw new Error('Corrupt zip central directory');
+        }
+        const flags = buffer.readUInt16LE(offset + 8);
+        const method = buffer.readUInt16LE(offset + 10);
+        const compressedSize = buffer.readUInt32LE(offset + 20);
+        const size = buffer.readUInt32LE(offset + 24);
+        const nameLength = buffer.readUInt16LE(offset + 28);
+        const extraLength = buffer.readUInt16LE(offset + 30);
+        const commentLength = buffer.readUInt16LE(offset + 32);
+        const localOffset = buffer.readUInt32LE(offset + 42);
+        const name = buffer.toString('utf8', offset + 46, offset + 46 + nameLength);
+        offset += 46 + nameLength + extraLength + commentLength;
+
+        // Directories, and anything the caller is not interested in
+        if (name.endsWith('/') || (options.filter && !options.filter(name))) {
+            continue;
+        }
+        if (flags & 0x1) {
+            throw new Error(`Encrypted zip entries are not supported: ${name}`);
+        }
+        if (compressedSize === 0xffffffff || size === 0xffffffff) {
+            throw new Error(`Zip64 entries are not supported: ${name}`);
+        }
+        if (options.maxEntryBytes && size > options.maxEntryBytes) {
+            throw new Error(`${name} is larger than ${options.maxEntryBytes} bytes`);
+        }
+
+        if (buffer.readUInt32LE(localOffset) !== LOCAL_SIGNATURE) {
+            throw new Error(`Corrupt zip entry: ${name}`);
+        }
+        const dataStart = localOffset + 30
+            + buffer.readUInt16LE(localOffset + 26)
+            + buffer.readUInt16LE(localOffset + 28);
+        const raw = buffer.subarray(dataStart, dataStart + compressedSize);
+
+        let data;
+        if (method === METHOD_STORED) {
+            data = raw;
+        } else if (method === METHOD_DEFLATE) {
+            // Never inflate past the size the directory declared; a zip bomb
+            // claiming a small size fails here instead of filling memory
+            try {
+                data = await inflateRaw(raw, { maxOutputLength: Math.max(size, 1) });
+            } catch (inflateError) {
+                throw new Error(`Corrupt zip entry: ${name}`);
+            }
+        } else {
+            throw new Error(`Unsupported compression method ${method} for ${name}`);
+        }
+
+        if (data.length !== size) {
+            throw new Error(`Corrupt zip entry: ${name}`);
+        }
+        entries.push({ name: path.posix.basename(name), data });
+    }
+
+    return entries;
+}
+
+module.exports = {
+    readZipEntries
+};
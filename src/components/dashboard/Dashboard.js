@@ -8,10 +8,14 @@ import {
     uploadBankStatement,
     fetchBankStatements,
     analyzeBankStatement,
+    fetchStatementJob,
     getAnalysisResults,
     deleteBankStatement
 } from '../../services/bankStatementService.js';
 
+// How often to check on a statement's processing job
+const JOB_POLL_INTERVAL_MS = 2000;
+
 const Dashboard = () => {
     const { user } = useAuth();
     const [expenses, setExpenses] = useState([]);
@@ -109,9 +113,9 @@ const Dashboard = () => {
             // Reload statements after upload
             await loadStatements();
 
-            // Offer to analyze the newly uploaded statement
+            // The upload already queued the statement; wait for its job to finish
             if (result.statementId) {
-                processStatement(result.statementId);
+                followProcessing(result.statementId);
             }
         } catch (error) {
             console.error('Upload error:', error);
@@ -132,16 +136,19 @@ const Dashboard = () => {
     };
 
 
-    const processStatement = async (statementId) => {
+    // Poll a statement's processing job until it completes or fails, then reload the statements
+    const followProcessing = async (statementId) => {
         setProcessing(true);
         try {
-            const result = await analyzeBankStatement(statementId);
-            console.log('Processing result:', result);
-
-            if (result.isProcessed) {
-                // If processed immediately, reload to get updated data
-                await loadStatements();
+            let job = await fetchStatementJob(statementId);
+            while (job.status === 'queued' || job.status === 'running') {
+                await new Promise(resolve => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+                job = await fetchStatementJob(statementId);
             }
+            if (job.status === 'failed') {
+                console.error('Processing failed:', job.lastError);
+            }
+            await loadStatements();
         } catch (error) {
             console.error('Processing error:', error);
         } finally {
@@ -149,6 +156,17 @@ const Dashboard = () => {
         }
     };
 
+    const processStatement = async (statementId) => {
+        try {
+            const result = await analyzeBankStatement(statementId);
+            console.log('Processing queued:', result);
+        } catch (error) {
+            console.error('Processing error:', error);
+            return;
+        }
+        await followProcessing(statementId);
+    };
+
     const viewAnalysis = async (statementId) => {
         try {
             const result = await getAnalysisResults(statementId);
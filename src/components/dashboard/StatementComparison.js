@@ -4,6 +4,7 @@ import { Chart as ChartJS, CategoryScale, LinearScale, BarElement, Title, Toolti
 import { Bar } from 'react-chartjs-2';
 import PercentageChangeTable from './PercentageChangeTable';
 import MonthlySpendingSummary from './MonthlySpendingSummary';
+import { compareBankStatements } from '../../services/bankStatementService';
 import './StatementComparison.css';
 
 // Register required Chart.js components
@@ -66,37 +67,19 @@ const StatementComparison = ({ statements }) => {
         }
     }, [selectedStatements]);
 
-    // Main comparison logic
-    const compareStatements = () => {
+    // Main comparison logic; the per-category deltas are aggregated on the server
+    const compareStatements = async () => {
         try {
             const { first, second } = selectedStatements;
+            const comparison = await compareBankStatements(first._id, second._id);
 
-            if (!first.mlResults || !second.mlResults) {
-                throw new Error('One or both statements are missing analysis data');
-            }
-
-            // Check if categoryBreakdown exists, as that's the most direct way to compare
-            if (!first.mlResults.categoryBreakdown || !second.mlResults.categoryBreakdown) {
-                throw new Error('Category breakdown data is missing');
-            }
-
-            // Get the categories from both statements
-            const firstCategories = Object.keys(first.mlResults.categoryBreakdown);
-            const secondCategories = Object.keys(second.mlResults.categoryBreakdown);
-
-            // Combine unique categories
-            const allCategories = [...new Set([...firstCategories, ...secondCategories])];
-
-            // Prepare data for comparison chart
-            const firstValues = allCategories.map(category =>
-                first.mlResults.categoryBreakdown[category] || 0
-            );
-
-            const secondValues = allCategories.map(category =>
-                second.mlResults.categoryBreakdown[category] || 0
-            );
+            // Categories come back sorted by the size of the change
+            const allCategories = comparison.categories.map(row => row.category);
+            const firstValues = comparison.categories.map(row => row.first);
+            const secondValues = comparison.categories.map(row => row.second);
 
             // Set chart data
+            setError(null);
             setComparisonData({
                 labels: allCategories,
                 datasets: [
@@ -128,7 +111,7 @@ const StatementComparison = ({ statements }) => {
 
         } catch (err) {
             console.error('Error comparing statements:', err);
-            setError('Could not compare statements: ' + err.message);
+            setError('Could not compare statements: ' + (err.response?.data?.error || err.message));
         }
     };
 
@@ -92,9 +92,12 @@ export const fetchBankStatements = async () => {
 };
 
 /**
- * Request processing for a bank statement that wasn't automatically processed
+ * Queue processing for a bank statement that wasn't automatically processed
+ *
+ * The server returns the statement's existing job if one is already queued.
+ *
  * @param {string} statementId - ID of the statement to process
- * @returns {Promise<Object>} - The processing response
+ * @returns {Promise<Object>} - { statementId, jobId, status }
  */
 export const analyzeBankStatement = async (statementId) => {
     try {
@@ -106,6 +109,21 @@ export const analyzeBankStatement = async (statementId) => {
     }
 };
 
+/**
+ * Get the latest processing job for a statement
+ * @param {string} statementId - ID of the statement
+ * @returns {Promise<Object>} - The job, with status 'queued', 'running', 'completed' or 'failed'
+ */
+export const fetchStatementJob = async (statementId) => {
+    try {
+        const response = await api.get(`/jobs/statement/${statementId}`);
+        return response.data;
+    } catch (error) {
+        console.error('Error fetching statement job:', error.response?.data || error.message);
+        throw error;
+    }
+};
+
 /**
  * Get analysis results for a processed bank statement
  * @param {string} statementId - ID of the processed statement
@@ -121,6 +139,67 @@ export const getAnalysisResults = async (statementId) => {
     }
 };
 
+/**
+ * Get total spending per category, aggregated on the server
+ * @param {Object} filters - Optional { bank, from, to }
+ * @returns {Promise<Object>} - { categories: [{ category, total, count }], total }
+ */
+export const fetchCategoryTotals = async (filters = {}) => {
+    try {
+        const response = await api.get('/analytics/categories', { params: filters });
+        return response.data;
+    } catch (error) {
+        console.error('Error fetching category totals:', error.response?.data || error.message);
+        throw error;
+    }
+};
+
+/**
+ * Get spending per month, aggregated on the server
+ * @param {Object} filters - Optional { bank, from, to, category }
+ * @returns {Promise<Array>} - [{ month, totalDebits, totalCredits, transactions }]
+ */
+export const fetchMonthlyTotals = async (filters = {}) => {
+    try {
+        const response = await api.get('/analytics/monthly', { params: filters });
+        return response.data;
+    } catch (error) {
+        console.error('Error fetching monthly totals:', error.response?.data || error.message);
+        throw error;
+    }
+};
+
+/**
+ * Get totals per bank, aggregated on the server
+ * @param {Object} filters - Optional { from, to }
+ * @returns {Promise<Array>} - [{ bankName, totalDebits, totalCredits, transactions, statements }]
+ */
+export const fetchBankTotals = async (filters = {}) => {
+    try {
+        const response = await api.get('/analytics/banks', { params: filters });
+        return response.data;
+    } catch (error) {
+        console.error('Error fetching bank totals:', error.response?.data || error.message);
+        throw error;
+    }
+};
+
+/**
+ * Compare spending per category between two statements
+ * @param {string} firstId - ID of the baseline statement
+ * @param {string} secondId - ID of the statement to compare against it
+ * @returns {Promise<Object>} - { first, second, totalChange, totalPercentChange, categories }
+ */
+export const compareBankStatements = async (firstId, secondId) => {
+    try {
+        const response = await api.get('/analytics/compare', { params: { first: firstId, second: secondId } });
+        return response.data;
+    } catch (error) {
+        console.error('Error comparing statements:', error.response?.data || error.message);
+        throw error;
+    }
+};
+
 export const deleteBankStatement = async (statementId) => {
     const response = await api.delete(`/bankStatements/statements/${statementId}`);
     return response.data;
@@ -130,6 +209,11 @@ export default {
     uploadBankStatement,
     fetchBankStatements,
     analyzeBankStatement,
+    fetchStatementJob,
     getAnalysisResults,
+    fetchCategoryTotals,
+    fetchMonthlyTotals,
+    fetchBankTotals,
+    compareBankStatements,
     deleteBankStatement
 };
\ No newline at end of file